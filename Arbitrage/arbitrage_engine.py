@@ -1,11 +1,15 @@
+import time
+from concurrent.futures import Future
 from typing import List, Dict, Any
 
 class ArbitrageEngine:
-    def __init__(self, fee_adjustment: float = 1.0):
+    def __init__(self, fee_adjustment: float = 1.0, executor=None):
         self.fee_adjustment = fee_adjustment
+        self.executor = executor  # Optional PaperExecutor (or any object with execute(opp))
 
     def find_opportunities(self, matched_pairs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         opportunities = []
+        detected_at = time.time()
         
         for pair in matched_pairs:
             market_a = pair['market_a']
@@ -25,7 +29,11 @@ class ArbitrageEngine:
                     "profit": profit_1,
                     "roi": (profit_1 / cost_1) * 100 if cost_1 > 0 else 0,
                     "category": market_a.get('category', 'Unknown'),
-                    "event_ticker": market_a.get('event_ticker', '')
+                    "event_ticker": market_a.get('event_ticker', ''),
+                    "side_a": "yes",
+                    "side_b": "no",
+                    "size": min(market_a.get('yes_volume') or 0, market_b.get('no_volume') or 0),
+                    "detected_at": detected_at
                 })
 
             # Check Direction 2: Buy No on A, Buy Yes on B
@@ -42,11 +50,27 @@ class ArbitrageEngine:
                     "profit": profit_2,
                     "roi": (profit_2 / cost_2) * 100 if cost_2 > 0 else 0,
                     "category": market_a.get('category', 'Unknown'),
-                    "event_ticker": market_a.get('event_ticker', '')
+                    "event_ticker": market_a.get('event_ticker', ''),
+                    "side_a": "no",
+                    "side_b": "yes",
+                    "size": min(market_a.get('no_volume') or 0, market_b.get('yes_volume') or 0),
+                    "detected_at": detected_at
                 })
                 
         return opportunities
 
+    def execute_opportunities(self, opportunities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Send opportunities to the configured executor and return execution reports."""
+        if self.executor is None:
+            return []
+        return [self.executor.execute(opp) for opp in opportunities]
+
+    def submit_opportunities(self, opportunities: List[Dict[str, Any]]) -> List[Future]:
+        """Hand opportunities to the executor without waiting for fills; futures resolve to execution reports."""
+        if self.executor is None:
+            return []
+        return [self.executor.submit(opp) for opp in opportunities]
+
     def _enhance_opportunity(self, opp: Dict[str, Any], market_a: Dict[str, Any], market_b: Dict[str, Any]) -> Dict[str, Any]:
         """Add metadata to the opportunity."""
         # derived from market_a for now, assuming they match
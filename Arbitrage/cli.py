@@ -5,11 +5,15 @@ Usage:
     python cli.py discover    # Run market discovery
     python cli.py monitor     # Run price monitor
     python cli.py run-all     # Run discovery then monitor
+    python cli.py latency-report  # Opportunity duration distributions
+    python cli.py paper-bench     # Paper-trading load test on mock venues
 """
 import sys
 from dotenv import load_dotenv
 import market_discovery
 import price_monitor
+import opportunity_store
+import executor
 
 # Load environment variables from .env file
 load_dotenv()
@@ -23,6 +27,8 @@ def print_usage():
     print("  python cli.py discover    # Run market discovery")
     print("  python cli.py monitor     # Run price monitor")
     print("  python cli.py run-all     # Run discovery then monitor")
+    print("  python cli.py latency-report  # Opportunity duration distributions")
+    print("  python cli.py paper-bench     # Paper-trading load test on mock venues")
     print("=" * 60)
 
 
@@ -46,6 +52,12 @@ def main():
         print("\nStarting price monitor...")
         price_monitor.monitor_loop()
     
+    elif command == "latency-report":
+        opportunity_store.print_latency_report()
+    
+    elif command == "paper-bench":
+        executor.print_load_test_report()
+    
     else:
         print(f"Unknown command: {command}")
         print_usage()
@@ -26,6 +26,7 @@ DATA_DIR = BASE_DIR / "data"
 MATCHED_MARKETS_FILE = DATA_DIR / "matched_markets.csv"
 POLYMARKET_ALL_FILE = DATA_DIR / "polymarket_all_markets.csv"
 KALSHI_ALL_FILE = DATA_DIR / "kalshi_all_markets.csv"
+OPPORTUNITIES_DB_FILE = DATA_DIR / "opportunities.db"
 
 # Ensure data directory exists
 DATA_DIR.mkdir(exist_ok=True)
@@ -42,3 +43,7 @@ RECIPIENT_EMAIL = os.getenv("RECIPIENT_EMAIL")
 
 # Arbitrage Settings
 FEE_ADJUSTMENT = 1.0  # Fee adjustment factor for arbitrage calculation
+
+# Paper Trading Settings
+PAPER_TRADING = os.getenv("PAPER_TRADING", "false").lower() == "true"  # Execute against mock venues
+PAPER_MAX_ORDER_SIZE = 100  # Max contracts per leg
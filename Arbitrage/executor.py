@@ -0,0 +1,357 @@
+"""
+Paper-Trading Executor Module
+
+This module executes arbitrage opportunities against pluggable venue adapters.
+Both legs are submitted at the same time, and each execution reports its
+detection-to-fill latency and leg risk (contracts left unhedged when one leg
+fills less than the other).
+
+It ships with in-process mock Kalshi/Polymarket order books that simulate
+fills, partial fills and latency, so the whole path can be measured under
+load without network access.
+"""
+import random
+import statistics
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Dict, Any, Optional
+import config
+
+
+class VenueAdapter(ABC):
+    """Abstract base class for execution venues."""
+
+    name = "Venue"
+
+    @abstractmethod
+    def submit_order(self, market: Dict[str, Any], side: str, limit_price: float, size: float) -> Dict[str, Any]:
+        """
+        Submits a marketable limit buy order and blocks until it is done.
+
+        Args:
+            market: Normalized market dictionary (see MarketClient.normalize_data)
+            side: 'yes' or 'no'
+            limit_price: Worst price we are willing to pay (0.01 to 0.99)
+            size: Number of contracts to buy
+
+        Returns:
+            Fill report:
+            {
+                'venue': str,
+                'market_id': str,
+                'side': str,
+                'requested': float,
+                'filled': float,
+                'avg_price': float,
+                'status': 'filled' | 'partial' | 'rejected',
+                'completed_at': float
+            }
+        """
+        pass
+
+
+class MockOrderBook:
+    """Ask-side order book for one binary market (YES and NO ladders)."""
+
+    def __init__(self, levels: Dict[str, List[List[float]]], quote: tuple = (), created_at: Optional[float] = None):
+        # levels: {'yes': [[price, size], ...], 'no': [...]}, sorted by price ascending
+        self.levels = levels
+        # Market quote the ladder was seeded from, and when
+        self.quote = quote
+        self.created_at = time.monotonic() if created_at is None else created_at
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def quote_of(market: Dict[str, Any]) -> tuple:
+        return tuple(market.get(f) for f in ('yes_price', 'no_price', 'yes_volume', 'no_volume'))
+
+    @classmethod
+    def from_market(cls, market: Dict[str, Any], rng: random.Random, depth: int = 3) -> "MockOrderBook":
+        """
+        Seed a ladder around the quoted prices of a normalized market.
+
+        The top level holds a random fraction of the quoted volume so that
+        large orders walk the book or fill partially.
+        """
+        levels = {}
+        for side in ('yes', 'no'):
+            price = market.get(f'{side}_price') or 0.5
+            volume = market.get(f'{side}_volume') or 100
+            ladder = []
+            for i in range(depth):
+                level_price = round(min(price + 0.01 * i, 0.99), 2)
+                level_size = max(1.0, round(volume * rng.uniform(0.02, 0.10)))
+                ladder.append([level_price, level_size])
+            levels[side] = ladder
+        return cls(levels, quote=cls.quote_of(market))
+
+    def take(self, side: str, limit_price: float, size: float) -> tuple:
+        """
+        Consume liquidity up to limit_price.
+
+        Returns:
+            tuple: (filled_size, average_price)
+        """
+        filled = 0.0
+        notional = 0.0
+        with self.lock:
+            for level in self.levels.get(side, []):
+                if filled >= size or level[0] > limit_price + 1e-9:
+                    break
+                take = min(level[1], size - filled)
+                level[1] -= take
+                filled += take
+                notional += take * level[0]
+            self.levels[side] = [level for level in self.levels.get(side, []) if level[1] > 0]
+        avg_price = notional / filled if filled > 0 else 0.0
+        return filled, avg_price
+
+
+class MockVenue(VenueAdapter):
+    """In-process venue with simulated latency, rejections and order books."""
+
+    name = "Mock"
+    latency_ms = 50.0
+    jitter_ms = 20.0
+    reject_rate = 0.01
+    # Seconds after which a book's consumed liquidity is restored (market makers re-quote)
+    replenish_seconds = 1.0
+
+    def __init__(self, seed: Optional[int] = None, latency_ms: Optional[float] = None,
+                 jitter_ms: Optional[float] = None, reject_rate: Optional[float] = None,
+                 replenish_seconds: Optional[float] = None):
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        if latency_ms is not None:
+            self.latency_ms = latency_ms
+        if jitter_ms is not None:
+            self.jitter_ms = jitter_ms
+        if reject_rate is not None:
+            self.reject_rate = reject_rate
+        if replenish_seconds is not None:
+            self.replenish_seconds = replenish_seconds
+        self.books: Dict[str, MockOrderBook] = {}
+        self.books_lock = threading.Lock()
+
+    def get_book(self, market: Dict[str, Any]) -> MockOrderBook:
+        """
+        The market's book, re-seeded from the current quote when the quote has moved or
+        replenish_seconds have passed. Orders inside that window share (and deplete)
+        the same liquidity, so concurrent load still walks the book.
+        """
+        market_id = market.get('id', '')
+        with self.books_lock:
+            book = self.books.get(market_id)
+            stale = (book is None or book.quote != MockOrderBook.quote_of(market)
+                     or time.monotonic() - book.created_at >= self.replenish_seconds)
+            if stale:
+                with self.rng_lock:
+                    book = MockOrderBook.from_market(market, self.rng)
+                self.books[market_id] = book
+            return book
+
+    def submit_order(self, market: Dict[str, Any], side: str, limit_price: float, size: float) -> Dict[str, Any]:
+        with self.rng_lock:
+            delay = max(0.0, self.rng.gauss(self.latency_ms, self.jitter_ms)) / 1000.0
+            rejected = self.rng.random() < self.reject_rate
+        time.sleep(delay)
+
+        filled, avg_price = (0.0, 0.0) if rejected else self.get_book(market).take(side, limit_price, size)
+
+        if rejected or filled == 0:
+            status = 'rejected'
+        elif filled < size:
+            status = 'partial'
+        else:
+            status = 'filled'
+
+        return {
+            'venue': self.name,
+            'market_id': market.get('id', ''),
+            'side': side,
+            'requested': size,
+            'filled': filled,
+            'avg_price': avg_price,
+            'status': status,
+            'completed_at': time.time()
+        }
+
+
+class MockKalshi(MockVenue):
+    name = "Kalshi"
+    latency_ms = 40.0
+    jitter_ms = 15.0
+
+
+class MockPolymarket(MockVenue):
+    # On-chain settlement makes Polymarket the slower, noisier leg
+    name = "Polymarket"
+    latency_ms = 120.0
+    jitter_ms = 60.0
+    reject_rate = 0.02
+
+
+class PaperExecutor:
+    def __init__(self, venues: Optional[Dict[str, VenueAdapter]] = None,
+                 max_order_size: float = config.PAPER_MAX_ORDER_SIZE, max_workers: int = 32):
+        if venues is None:
+            venues = {'Kalshi': MockKalshi(), 'Polymarket': MockPolymarket()}
+        self.venues = venues
+        self.max_order_size = max_order_size
+        # Leg orders; whole executions started with submit() run on their own pool so they
+        # never wait on leg slots held by other executions
+        self.pool = ThreadPoolExecutor(max_workers=max_workers)
+        self.dispatcher = ThreadPoolExecutor(max_workers=max(1, max_workers // 2))
+
+    def shutdown(self):
+        self.dispatcher.shutdown(wait=True)
+        self.pool.shutdown(wait=True)
+
+    def submit(self, opportunity: Dict[str, Any]) -> Future:
+        """
+        Execute an opportunity in the background without blocking the caller.
+
+        Returns:
+            Future resolving to the execution report (see execute)
+        """
+        return self.dispatcher.submit(self.execute, opportunity)
+
+    def execute(self, opportunity: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Submit both legs of an opportunity at the same time.
+
+        Args:
+            opportunity: Opportunity dictionary produced by ArbitrageEngine
+
+        Returns:
+            Execution report with both leg fills, detection-to-fill latency
+            and leg risk (unhedged contracts and their cost)
+        """
+        market_a = opportunity['market_a']
+        market_b = opportunity['market_b']
+        side_a = opportunity['side_a']
+        side_b = opportunity['side_b']
+        # A size of 0 means no liquidity: it must not become a full-size order
+        size = opportunity.get('size')
+        size = self.max_order_size if size is None else min(size, self.max_order_size)
+
+        venue_a = self.venues[market_a['platform']]
+        venue_b = self.venues[market_b['platform']]
+
+        submitted_at = time.time()
+        future_a = self.pool.submit(venue_a.submit_order, market_a, side_a, market_a[f'{side_a}_price'], size)
+        future_b = self.pool.submit(venue_b.submit_order, market_b, side_b, market_b[f'{side_b}_price'], size)
+        fill_a = future_a.result()
+        fill_b = future_b.result()
+
+        detected_at = opportunity.get('detected_at', submitted_at)
+        completed_at = max(fill_a['completed_at'], fill_b['completed_at'])
+
+        # Leg risk: contracts bought on one venue without the offsetting leg
+        hedged = min(fill_a['filled'], fill_b['filled'])
+        if fill_a['filled'] > fill_b['filled']:
+            unhedged_cost = (fill_a['filled'] - hedged) * fill_a['avg_price']
+        else:
+            unhedged_cost = (fill_b['filled'] - hedged) * fill_b['avg_price']
+
+        return {
+            'opportunity': opportunity.get('strategy', ''),
+            'leg_a': fill_a,
+            'leg_b': fill_b,
+            'hedged_size': hedged,
+            'unhedged_size': abs(fill_a['filled'] - fill_b['filled']),
+            'unhedged_cost': unhedged_cost,
+            'locked_profit': hedged * (1.0 - fill_a['avg_price'] - fill_b['avg_price']) if hedged > 0 else 0.0,
+            'detection_to_fill_ms': (completed_at - detected_at) * 1000,
+            'leg_skew_ms': abs(fill_a['completed_at'] - fill_b['completed_at']) * 1000
+        }
+
+
+def make_synthetic_opportunity(rng: random.Random, index: int) -> Dict[str, Any]:
+    """Build a random Polymarket/Kalshi opportunity for load testing."""
+    yes_a = round(rng.uniform(0.20, 0.70), 2)
+    no_b = round(rng.uniform(0.20, 0.95 - yes_a), 2)
+    market_a = {
+        'id': f'poly-{index}', 'platform': 'Polymarket', 'title': f'Synthetic market {index}',
+        'yes_price': yes_a, 'no_price': round(1 - yes_a + 0.01, 2),
+        'yes_volume': rng.uniform(500, 5000), 'no_volume': rng.uniform(500, 5000)
+    }
+    market_b = {
+        'id': f'kalshi-{index}', 'platform': 'Kalshi', 'title': f'Synthetic market {index}',
+        'yes_price': round(1 - no_b + 0.01, 2), 'no_price': no_b,
+        'yes_volume': rng.uniform(500, 5000), 'no_volume': rng.uniform(500, 5000)
+    }
+    cost = yes_a + no_b
+    return {
+        'type': 'Arbitrage',
+        'market_a': market_a,
+        'market_b': market_b,
+        'strategy': f"Buy YES on Polymarket ({yes_a}), Buy NO on Kalshi ({no_b})",
+        'cost': cost,
+        'profit': 1.0 - cost,
+        'roi': (1.0 - cost) / cost * 100,
+        'side_a': 'yes',
+        'side_b': 'no',
+        'size': min(market_a['yes_volume'], market_b['no_volume']),
+        'detected_at': time.time()
+    }
+
+
+def run_load_test(n_opportunities: int = 500, concurrency: int = 16, seed: int = 7) -> Dict[str, Any]:
+    """
+    Execute many synthetic opportunities concurrently against the mock venues.
+
+    Args:
+        n_opportunities: Number of opportunities to execute
+        concurrency: Number of opportunities in flight at once
+        seed: Random seed for opportunities and venue behaviour
+
+    Returns:
+        Summary of latency percentiles, fill outcomes and leg risk
+    """
+    rng = random.Random(seed)
+    venues = {'Kalshi': MockKalshi(seed=seed), 'Polymarket': MockPolymarket(seed=seed + 1)}
+    executor = PaperExecutor(venues=venues, max_workers=concurrency * 2)
+
+    opportunities = [make_synthetic_opportunity(rng, i) for i in range(n_opportunities)]
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        reports = list(pool.map(executor.execute, opportunities))
+    elapsed = time.time() - started
+    executor.shutdown()
+
+    latencies = sorted(r['detection_to_fill_ms'] for r in reports)
+    percentiles = statistics.quantiles(latencies, n=100, method='inclusive') if len(latencies) > 1 else latencies * 99
+    legged = [r for r in reports if r['unhedged_size'] > 0]
+
+    return {
+        'executions': len(reports),
+        'throughput_per_sec': len(reports) / elapsed if elapsed > 0 else 0.0,
+        'latency_p50_ms': percentiles[49],
+        'latency_p90_ms': percentiles[89],
+        'latency_p99_ms': percentiles[98],
+        'latency_max_ms': latencies[-1],
+        'mean_leg_skew_ms': statistics.fmean(r['leg_skew_ms'] for r in reports),
+        'fully_hedged': sum(1 for r in reports if r['unhedged_size'] == 0 and r['hedged_size'] > 0),
+        'legged_executions': len(legged),
+        'total_unhedged_size': sum(r['unhedged_size'] for r in legged),
+        'total_unhedged_cost': sum(r['unhedged_cost'] for r in legged),
+        'total_locked_profit': sum(r['locked_profit'] for r in reports)
+    }
+
+
+def print_load_test_report(n_opportunities: int = 500, concurrency: int = 16):
+    """Run the mock-exchange load test and print the summary."""
+    print("=" * 60)
+    print("PAPER-TRADING LOAD TEST (mock venues, no network)")
+    print("=" * 60)
+    summary = run_load_test(n_opportunities=n_opportunities, concurrency=concurrency)
+    for key, value in summary.items():
+        print(f"{key}: {value:.2f}" if isinstance(value, float) else f"{key}: {value}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    print_load_test_report()
@@ -0,0 +1,218 @@
+"""
+Opportunity Store Module
+
+This module persists every detected arbitrage opportunity to SQLite and
+tracks its lifecycle (first seen, last seen, peak edge, peak volume)
+so we can study how long each class of edge survives.
+
+Volume is the smaller of the two legs' traded volumes as quoted by the
+venues. It is a liquidity proxy, not order book depth: how many contracts
+could actually be filled at the quoted prices is not known here.
+"""
+import sqlite3
+import statistics
+import time
+from typing import List, Dict, Any, Optional
+import config
+
+
+def opportunity_key(opp: Dict[str, Any]) -> str:
+    """
+    Build a stable key identifying an opportunity across monitor iterations.
+
+    Args:
+        opp: Opportunity dictionary produced by ArbitrageEngine
+
+    Returns:
+        Key of the form "<id_a>|<id_b>|<side_a>"
+    """
+    return f"{opp['market_a'].get('id', '')}|{opp['market_b'].get('id', '')}|{opp.get('side_a', '')}"
+
+
+class OpportunityStore:
+    def __init__(self, db_path=config.OPPORTUNITIES_DB_FILE):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.init_db()
+
+    def init_db(self):
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS opportunities (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    opp_key TEXT NOT NULL,
+                    market_a_id TEXT,
+                    market_b_id TEXT,
+                    venue_a TEXT,
+                    venue_b TEXT,
+                    category TEXT,
+                    strategy TEXT,
+                    first_seen REAL NOT NULL,
+                    last_seen REAL NOT NULL,
+                    observations INTEGER NOT NULL DEFAULT 1,
+                    peak_profit REAL,
+                    peak_roi REAL,
+                    peak_volume REAL,
+                    is_open INTEGER NOT NULL DEFAULT 1
+                )
+            """)
+            # Stores created before the rename called the volume executable_size
+            columns = [row['name'] for row in self.conn.execute("PRAGMA table_info(opportunities)")]
+            if 'executable_size' in columns:
+                self.conn.execute("ALTER TABLE opportunities RENAME COLUMN executable_size TO peak_volume")
+            # Only one open lifecycle per key; closed rows keep the history
+            self.conn.execute("""
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_opportunities_open_key
+                ON opportunities (opp_key) WHERE is_open = 1
+            """)
+            self.conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_opportunities_category
+                ON opportunities (category, first_seen)
+            """)
+            self.conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_opportunities_venue
+                ON opportunities (venue_a, venue_b, first_seen)
+            """)
+
+    def close(self):
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+
+    def record(self, opportunities: List[Dict[str, Any]], seen_at: Optional[float] = None):
+        """
+        Record one monitor iteration worth of opportunities.
+
+        Opportunities already open are extended (last_seen, peak edge, volume),
+        new ones are inserted, and open ones missing from this iteration are closed.
+
+        Args:
+            opportunities: Opportunities found in this iteration
+            seen_at: Observation time (epoch seconds), defaults to now
+        """
+        if seen_at is None:
+            seen_at = time.time()
+
+        with self.conn:
+            for opp in opportunities:
+                key = opportunity_key(opp)
+                # ArbitrageEngine's 'size' is the smaller leg volume (see the module docstring)
+                volume = opp.get('size', 0) or 0
+
+                updated = self.conn.execute("""
+                    UPDATE opportunities
+                    SET last_seen = ?,
+                        observations = observations + 1,
+                        peak_profit = MAX(peak_profit, ?),
+                        peak_roi = MAX(peak_roi, ?),
+                        peak_volume = MAX(peak_volume, ?)
+                    WHERE opp_key = ? AND is_open = 1
+                """, (seen_at, opp['profit'], opp['roi'], volume, key)).rowcount
+
+                if updated == 0:
+                    self.conn.execute("""
+                        INSERT INTO opportunities (
+                            opp_key, market_a_id, market_b_id, venue_a, venue_b, category,
+                            strategy, first_seen, last_seen, peak_profit, peak_roi, peak_volume
+                        )
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """, (
+                        key,
+                        opp['market_a'].get('id', ''),
+                        opp['market_b'].get('id', ''),
+                        opp['market_a'].get('platform', ''),
+                        opp['market_b'].get('platform', ''),
+                        opp.get('category', 'Unknown'),
+                        opp.get('strategy', ''),
+                        seen_at,
+                        seen_at,
+                        opp['profit'],
+                        opp['roi'],
+                        volume
+                    ))
+
+            # Anything still open that was not refreshed this iteration has disappeared
+            self.conn.execute("""
+                UPDATE opportunities SET is_open = 0
+                WHERE is_open = 1 AND last_seen < ?
+            """, (seen_at,))
+
+    def duration_distribution(self, group_by: str = 'category', include_open: bool = False) -> List[Dict[str, Any]]:
+        """
+        Summarize opportunity lifetimes (last_seen - first_seen) per group.
+
+        Lifetimes are bounded below by the monitor interval: an opportunity seen
+        in a single iteration has a duration of 0 seconds.
+
+        Args:
+            group_by: 'category' or 'venue'
+            include_open: Include opportunities that are still open
+
+        Returns:
+            List of per-group summaries (count, mean, p50, p90, max, peak edge)
+        """
+        if group_by == 'category':
+            group_expr = "category"
+        elif group_by == 'venue':
+            group_expr = "venue_a || '/' || venue_b"
+        else:
+            raise ValueError(f"Unknown group_by: {group_by}")
+
+        where = "" if include_open else "WHERE is_open = 0"
+        rows = self.conn.execute(f"""
+            SELECT {group_expr} AS grp, last_seen - first_seen AS duration, peak_profit
+            FROM opportunities
+            {where}
+            ORDER BY grp
+        """).fetchall()
+
+        groups: Dict[str, Dict[str, list]] = {}
+        for row in rows:
+            group = groups.setdefault(row['grp'] or 'Unknown', {'durations': [], 'edges': []})
+            group['durations'].append(row['duration'])
+            group['edges'].append(row['peak_profit'] or 0.0)
+
+        summary = []
+        for name, values in groups.items():
+            durations = sorted(values['durations'])
+            if len(durations) > 1:
+                deciles = statistics.quantiles(durations, n=10, method='inclusive')
+                p50, p90 = deciles[4], deciles[8]
+            else:
+                p50 = p90 = durations[0]
+            summary.append({
+                'group': name,
+                'count': len(durations),
+                'mean_seconds': statistics.fmean(durations),
+                'p50_seconds': p50,
+                'p90_seconds': p90,
+                'max_seconds': durations[-1],
+                'mean_peak_profit': statistics.fmean(values['edges'])
+            })
+
+        return summary
+
+
+def print_latency_report():
+    """Print opportunity duration distributions by category and venue."""
+    store = OpportunityStore()
+    try:
+        for group_by in ('category', 'venue'):
+            print("=" * 60)
+            print(f"OPPORTUNITY DURATION BY {group_by.upper()}")
+            print("=" * 60)
+            summary = store.duration_distribution(group_by=group_by)
+            if not summary:
+                print("No closed opportunities recorded yet")
+                continue
+            for row in summary:
+                print(f"{row['group']}: n={row['count']} "
+                      f"p50={row['p50_seconds']:.1f}s p90={row['p90_seconds']:.1f}s "
+                      f"max={row['max_seconds']:.1f}s mean_edge=${row['mean_peak_profit']:.3f}")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    print_latency_report()
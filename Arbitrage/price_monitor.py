@@ -12,6 +12,8 @@ from polymarket import PolymarketClient
 from kalshi import KalshiClient
 from arbitrage_engine import ArbitrageEngine
 from notifier import Notifier
+from opportunity_store import OpportunityStore
+from executor import PaperExecutor
 import config
 
 
@@ -79,17 +81,19 @@ def fetch_current_prices(matched_markets: List[Dict]) -> List[Dict]:
     return pairs_with_prices
 
 
-def calculate_arbitrage(pairs_with_prices: List[Dict]) -> List[Dict]:
+def calculate_arbitrage(pairs_with_prices: List[Dict], engine: ArbitrageEngine = None) -> List[Dict]:
     """
     Calculate arbitrage opportunities from matched pairs with prices.
     
     Args:
         pairs_with_prices: List of matched pairs with current prices
+        engine: Engine to use (a default one is created if omitted)
     
     Returns:
         List of arbitrage opportunities
     """
-    engine = ArbitrageEngine(fee_adjustment=config.FEE_ADJUSTMENT)
+    if engine is None:
+        engine = ArbitrageEngine(fee_adjustment=config.FEE_ADJUSTMENT)
     opportunities = engine.find_opportunities(pairs_with_prices)
     
     if opportunities:
@@ -100,6 +104,18 @@ def calculate_arbitrage(pairs_with_prices: List[Dict]) -> List[Dict]:
     return opportunities
 
 
+def print_paper_fill(future):
+    """Print the execution report of a background paper trade once it completes."""
+    try:
+        report = future.result()
+    except Exception as e:
+        print(f"Paper execution failed: {e}")
+        return
+    print(f"Paper fill: {report['hedged_size']:.0f} hedged, "
+          f"{report['unhedged_size']:.0f} unhedged, "
+          f"{report['detection_to_fill_ms']:.0f} ms detection-to-fill")
+
+
 def monitor_loop():
     """
     Continuous monitoring loop that checks for arbitrage opportunities.
@@ -116,6 +132,9 @@ def monitor_loop():
         return
     
     notifier = Notifier()
+    store = OpportunityStore()
+    executor = PaperExecutor() if config.PAPER_TRADING else None
+    engine = ArbitrageEngine(fee_adjustment=config.FEE_ADJUSTMENT, executor=executor)
     iteration = 0
     
     print(f"Monitoring {len(matched_markets)} matched market pairs")
@@ -133,7 +152,15 @@ def monitor_loop():
             pairs_with_prices = fetch_current_prices(matched_markets)
             
             # Calculate arbitrage
-            opportunities = calculate_arbitrage(pairs_with_prices)
+            opportunities = calculate_arbitrage(pairs_with_prices, engine)
+            
+            # Track opportunity lifecycles (also closes ones that disappeared)
+            store.record(opportunities)
+            
+            # Paper-trade both legs against the mock venues in the background,
+            # so slow fills don't hold up the next scan
+            for future in engine.submit_opportunities(opportunities):
+                future.add_done_callback(print_paper_fill)
             
             # Send notifications if opportunities found
             if opportunities:
@@ -146,6 +173,11 @@ def monitor_loop():
     except KeyboardInterrupt:
         print("\n\nMonitoring stopped by user")
         print("=" * 60)
+    
+    finally:
+        store.close()
+        if executor:
+            executor.shutdown()
 
 
 if __name__ == "__main__":
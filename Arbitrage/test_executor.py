@@ -0,0 +1,97 @@
+"""
+Tests for the paper-trading mock venues.
+
+Run with: python -m pytest test_executor.py
+"""
+import time
+
+from executor import MockVenue, PaperExecutor
+
+
+MARKET = {'id': 'm1', 'platform': 'Mock', 'yes_price': 0.40, 'no_price': 0.61,
+          'yes_volume': 1000, 'no_volume': 1000}
+
+
+def make_venue(**kwargs):
+    return MockVenue(seed=1, latency_ms=0.0, jitter_ms=0.0, reject_rate=0.0, **kwargs)
+
+
+def test_book_depletes_within_replenish_window():
+    venue = make_venue(replenish_seconds=60.0)
+    first = venue.submit_order(MARKET, 'yes', 0.42, 20)
+    assert first['status'] == 'filled'
+
+    # Keep taking until the three-level ladder is exhausted
+    reports = [venue.submit_order(MARKET, 'yes', 0.42, 50) for _ in range(10)]
+    assert reports[-1]['status'] == 'rejected'
+
+
+def test_repeated_submits_fill_after_replenish():
+    venue = make_venue(replenish_seconds=0.05)
+    for _ in range(5):
+        report = venue.submit_order(MARKET, 'yes', 0.42, 20)
+        assert report['status'] == 'filled'
+        # Drain whatever is left, then wait for the book to be re-quoted
+        venue.submit_order(MARKET, 'yes', 0.42, 10_000)
+        time.sleep(0.06)
+
+
+def test_new_quote_rebuilds_book():
+    venue = make_venue(replenish_seconds=60.0)
+    venue.submit_order(MARKET, 'yes', 0.42, 10_000)
+    assert venue.submit_order(MARKET, 'yes', 0.42, 20)['status'] == 'rejected'
+
+    moved = {**MARKET, 'yes_price': 0.41}
+    assert venue.submit_order(moved, 'yes', 0.43, 20)['status'] == 'filled'
+
+
+def test_executor_replays_same_opportunity():
+    venues = {'A': make_venue(replenish_seconds=0.05), 'B': make_venue(replenish_seconds=0.05)}
+    executor = PaperExecutor(venues=venues, max_order_size=20)
+    opportunity = {
+        'market_a': {**MARKET, 'id': 'a', 'platform': 'A'},
+        'market_b': {**MARKET, 'id': 'b', 'platform': 'B'},
+        'side_a': 'yes', 'side_b': 'no', 'size': 20
+    }
+    try:
+        for _ in range(4):
+            report = executor.execute(opportunity)
+            assert report['leg_a']['status'] == 'filled'
+            assert report['leg_b']['status'] == 'filled'
+            time.sleep(0.06)
+    finally:
+        executor.shutdown()
+
+
+def make_opportunity(size):
+    return {
+        'market_a': {**MARKET, 'id': 'a', 'platform': 'A'},
+        'market_b': {**MARKET, 'id': 'b', 'platform': 'B'},
+        'side_a': 'yes', 'side_b': 'no', 'size': size
+    }
+
+
+def test_order_size_is_capped_and_zero_stays_zero():
+    executor = PaperExecutor(venues={'A': make_venue(), 'B': make_venue()}, max_order_size=20)
+    try:
+        assert executor.execute(make_opportunity(5))['leg_a']['requested'] == 5
+        assert executor.execute(make_opportunity(500))['leg_a']['requested'] == 20
+        assert executor.execute(make_opportunity(None))['leg_a']['requested'] == 20
+        report = executor.execute(make_opportunity(0))
+        assert report['leg_a']['requested'] == 0
+        assert report['hedged_size'] == 0
+    finally:
+        executor.shutdown()
+
+
+def test_submit_runs_in_background():
+    venues = {'A': make_venue(), 'B': make_venue()}
+    venues['A'].latency_ms = 100.0
+    executor = PaperExecutor(venues=venues, max_order_size=20)
+    try:
+        started = time.monotonic()
+        futures = [executor.submit(make_opportunity(5)) for _ in range(3)]
+        assert time.monotonic() - started < 0.05
+        assert all(f.result()['hedged_size'] == 5 for f in futures)
+    finally:
+        executor.shutdown()
@@ -0,0 +1,97 @@
+"""
+Tests for the opportunity lifecycle store.
+
+Run with: python -m pytest test_opportunity_store.py
+"""
+import sqlite3
+
+import pytest
+
+from opportunity_store import OpportunityStore, opportunity_key
+
+
+def make_opportunity(profit, size=100.0, category='Politics', market_b='k1'):
+    return {
+        'market_a': {'id': 'p1', 'platform': 'Polymarket'},
+        'market_b': {'id': market_b, 'platform': 'Kalshi'},
+        'side_a': 'yes', 'side_b': 'no', 'category': category,
+        'strategy': 'Buy YES on Polymarket, Buy NO on Kalshi',
+        'profit': profit, 'roi': profit * 100, 'size': size
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = OpportunityStore(db_path=tmp_path / "opportunities.db")
+    yield store
+    store.close()
+
+
+def rows(store):
+    return [dict(row) for row in store.conn.execute("SELECT * FROM opportunities ORDER BY id")]
+
+
+def test_open_update_close_lifecycle(store):
+    store.record([make_opportunity(0.02, size=50)], seen_at=100.0)
+    store.record([make_opportunity(0.05, size=80)], seen_at=110.0)
+    store.record([make_opportunity(0.03, size=20)], seen_at=120.0)
+
+    [row] = rows(store)
+    assert row['opp_key'] == opportunity_key(make_opportunity(0.02))
+    assert (row['first_seen'], row['last_seen'], row['observations']) == (100.0, 120.0, 3)
+    assert (row['peak_profit'], row['peak_volume']) == (0.05, 80)
+    assert row['is_open'] == 1
+
+    # Gone from the next iteration: closed
+    store.record([], seen_at=130.0)
+    [row] = rows(store)
+    assert row['is_open'] == 0 and row['last_seen'] == 120.0
+
+
+def test_reappearing_opportunity_starts_a_new_lifecycle(store):
+    store.record([make_opportunity(0.02)], seen_at=100.0)
+    store.record([], seen_at=110.0)
+    store.record([make_opportunity(0.04)], seen_at=120.0)
+
+    first, second = rows(store)
+    assert first['is_open'] == 0 and second['is_open'] == 1
+    assert (second['first_seen'], second['observations'], second['peak_profit']) == (120.0, 1, 0.04)
+
+
+def test_only_missing_opportunities_close(store):
+    store.record([make_opportunity(0.02), make_opportunity(0.03, market_b='k2')], seen_at=100.0)
+    store.record([make_opportunity(0.02)], seen_at=110.0)
+    assert [row['is_open'] for row in rows(store)] == [1, 0]
+
+
+def test_duration_distribution(store):
+    store.record([make_opportunity(0.02), make_opportunity(0.03, market_b='k2', category='Sports')], seen_at=100.0)
+    store.record([make_opportunity(0.02)], seen_at=160.0)
+    store.record([], seen_at=170.0)
+
+    summary = {row['group']: row for row in store.duration_distribution()}
+    assert summary['Politics']['count'] == 1 and summary['Politics']['max_seconds'] == 60.0
+    assert summary['Sports']['max_seconds'] == 0.0
+    [venue] = store.duration_distribution(group_by='venue')
+    assert venue['group'] == 'Polymarket/Kalshi' and venue['count'] == 2
+
+
+def test_renames_executable_size_column(tmp_path):
+    path = tmp_path / "old.db"
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE opportunities (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, opp_key TEXT NOT NULL, market_a_id TEXT, market_b_id TEXT,
+            venue_a TEXT, venue_b TEXT, category TEXT, strategy TEXT, first_seen REAL NOT NULL,
+            last_seen REAL NOT NULL, observations INTEGER NOT NULL DEFAULT 1, peak_profit REAL,
+            peak_roi REAL, executable_size REAL, is_open INTEGER NOT NULL DEFAULT 1
+        )
+    """)
+    conn.close()
+
+    store = OpportunityStore(db_path=path)
+    try:
+        store.record([make_opportunity(0.02, size=40)], seen_at=100.0)
+        assert rows(store)[0]['peak_volume'] == 40
+    finally:
+        store.close()
@@ -1,136 +1,116 @@
 import pandas as pd
 import numpy as np
 from .database import Database
+from .snapshot import AnalyticSnapshot, league_rows
+from .betting import BetEvaluator
+from .profiling import timed
 from .models import PoissonModel, DixonColesModel
+from .implied_probability import add_fair_columns, fair_matrix
+from .prediction_cache import walk_forward_predict
 import logging
 from datetime import timedelta
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Odds columns of one market, de-vigged together
+MARKET_COLUMNS = {'1x2': ['odd_h', 'odd_d', 'odd_a']}
+
 class Backtester:
-    def __init__(self, start_date='2023-09-01', bankroll=10000.0, stake_size=100.0):
-        self.db = Database()
-        self.model = DixonColesModel() # Use Dixon-Coles
+    def __init__(self, start_date='2023-09-01', bankroll=10000.0, stake_size=100.0, model=None, edge_threshold=0.10, prediction_cache=None, db=None, league=None, devig='multiplicative'):
+        self.db = db or Database()
+        self.snapshot = AnalyticSnapshot(db=self.db)
+        self.league = league
+        # Use Dixon-Coles (pass DixonColesModel(fit='mle') for the maximum-likelihood fit)
+        self.model = model if model is not None else DixonColesModel(db=self.db, league=league)
         self.start_date = pd.to_datetime(start_date)
+        self.initial_bankroll = bankroll
         self.bankroll = bankroll
         self.stake_size = stake_size
+        self.edge_threshold = edge_threshold
+        # Overround removal method for the implied probabilities (implied_probability.METHODS);
+        # None compares against the raw 1/odds
+        self.devig = devig
+        # Optional PredictionCache shared across backtests of the same model configuration
+        self.prediction_cache = prediction_cache
         self.history = []
+        self.evaluator = BetEvaluator(['H', 'D', 'A'])
 
-    def run(self):
-        """Runs the backtest simulation."""
-        logger.info("Starting backtest...")
+    @timed()
+    def load_data(self) -> pd.DataFrame:
+        """Loads matches joined with Bet365 odds (plus their fair probabilities), ordered by date."""
+        # Matches joined with Bet365 odds, both read from the Parquet snapshot
+        matches = league_rows(self.snapshot.load('matches', nullable=False, columns=[
+            'id', 'match_no', 'date', 'home_team', 'away_team', 'home_score', 'away_score', 'league']), self.league)
+        odds = self.snapshot.load('odds', nullable=False, columns=['match_no', 'bookmaker', 'home_win', 'draw', 'away_win'])
+        odds = odds[odds['bookmaker'] == 'Bet365'].rename(columns={'home_win': 'odd_h', 'draw': 'odd_d', 'away_win': 'odd_a'})
+        data = matches.merge(odds, on='match_no').sort_values('date', kind='stable').reset_index(drop=True)
+        data = data[['id', 'date', 'home_team', 'away_team', 'home_score', 'away_score',
+                     'odd_h', 'odd_d', 'odd_a', 'bookmaker']]
         
-        # Fetch all matches and odds
-        self.db.connect()
-        # Join matches and odds
-        query = """
-            SELECT m.id, m.date, m.home_team, m.away_team, m.home_score, m.away_score,
-                   o.home_win as odd_h, o.draw as odd_d, o.away_win as odd_a, o.bookmaker
-            FROM matches m
-            JOIN odds o ON m.id = o.match_id
-            WHERE o.bookmaker = 'Bet365'
-            ORDER BY m.date ASC
+        data['date'] = pd.to_datetime(data['date'])
+        if self.devig is not None:
+            data = add_fair_columns(data, MARKET_COLUMNS, self.devig)
+        return data
+
+    @timed()
+    def predict(self, test_matches: pd.DataFrame, history: pd.DataFrame = None) -> pd.DataFrame:
+        """Walk-forward predictions aligned with test_matches (see prediction_cache.walk_forward_predict)."""
+        return walk_forward_predict(self.model, test_matches, history, self.prediction_cache)
+
+    @timed()
+    def run(self, data: pd.DataFrame = None, history: pd.DataFrame = None):
         """
-        data = pd.read_sql_query(query, self.db.conn)
-        self.db.close()
+        Runs the backtest simulation.
+        data/history can be passed in (e.g. by the parameter sweep) to skip the database reads.
+        """
+        logger.info("Starting backtest...")
         
-        data['date'] = pd.to_datetime(data['date'])
+        if data is None:
+            data = self.load_data()
         
         # Filter matches after start_date (give model some data to train on first)
         test_matches = data[data['date'] >= self.start_date]
         
         logger.info(f"Backtesting on {len(test_matches)} matches starting from {self.start_date.date()}")
         
-        total_bets = 0
-        wins = 0
+        preds = self.predict(test_matches, history)
+        
+        # Betting Logic (Value Betting)
+        # Edge = Model_Prob - Implied_Prob
+        # Implied_Prob = margin-free probability (or 1 / Odds with devig=None)
+        probs = preds[['home_win', 'draw', 'away_win']].to_numpy(dtype=float)
+        odds = test_matches[['odd_h', 'odd_d', 'odd_a']].to_numpy(dtype=float)
+        implied = None if self.devig is None else fair_matrix(test_matches, MARKET_COLUMNS, self.devig)
         
-        # Iterate through matches
-        # Optimization: Re-train model weekly instead of every match to save time?
-        # For 380 matches, every match is fine.
+        # Result: H, D, A
+        home_score = test_matches['home_score'].to_numpy()
+        away_score = test_matches['away_score'].to_numpy()
+        result = np.select([home_score > away_score, away_score > home_score], ['H', 'A'], 'D')
+        outcomes = result[:, None] == np.array(self.evaluator.markets)[None, :]
         
-        current_date = None
+        # Flat staking for now
+        strategy = {'name': 'backtest', 'edge_threshold': self.edge_threshold, 'stake': self.stake_size}
+        bets, summary = self.evaluator.evaluate(probs, odds, outcomes, [strategy], implied=implied, bankroll=self.bankroll)
         
-        for idx, row in test_matches.iterrows():
-            match_date = row['date']
-            
-            # Re-train model if it's a new day (or just every match, but let's do new day for efficiency)
-            if current_date != match_date:
-                self.model.train(max_date=match_date)
-                current_date = match_date
-            
-            # Predict
-            pred = self.model.predict_match(row['home_team'], row['away_team'])
-            if not pred:
-                continue
-                
-            # Betting Logic (Value Betting)
-            # Edge = Model_Prob - Implied_Prob
-            # Implied_Prob = 1 / Odds
-            
-            bets = []
-            
-            # Home Win
-            if row['odd_h'] > 1.0:
-                implied_h = 1.0 / row['odd_h']
-                edge_h = pred['home_win'] - implied_h
-                if edge_h > 0.10: # 10% edge threshold
-                    bets.append(('H', row['odd_h'], pred['home_win'], edge_h))
-            
-            # Draw
-            if row['odd_d'] > 1.0:
-                implied_d = 1.0 / row['odd_d']
-                edge_d = pred['draw'] - implied_d
-                if edge_d > 0.10:
-                    bets.append(('D', row['odd_d'], pred['draw'], edge_d))
-                    
-            # Away Win
-            if row['odd_a'] > 1.0:
-                implied_a = 1.0 / row['odd_a']
-                edge_a = pred['away_win'] - implied_a
-                if edge_a > 0.10:
-                    bets.append(('A', row['odd_a'], pred['away_win'], edge_a))
-            
-            # Execute Bets
-            # Result: H, D, A
-            result = 'D'
-            if row['home_score'] > row['away_score']:
-                result = 'H'
-            elif row['away_score'] > row['home_score']:
-                result = 'A'
-                
-            for bet_type, odds, prob, edge in bets:
-                total_bets += 1
-                wager = self.stake_size # Flat staking for now
-                
-                pnl = -wager
-                if bet_type == result:
-                    pnl = wager * (odds - 1)
-                    wins += 1
-                
-                self.bankroll += pnl
-                
-                self.history.append({
-                    'date': match_date,
-                    'match': f"{row['home_team']} vs {row['away_team']}",
-                    'bet': bet_type,
-                    'odds': odds,
-                    'prob': prob,
-                    'edge': edge,
-                    'result': result,
-                    'pnl': pnl,
-                    'bankroll': self.bankroll
-                })
+        rows = test_matches.iloc[bets['row'].to_numpy()]
+        self.history = pd.DataFrame({
+            'date': rows['date'].to_numpy(),
+            'match': (rows['home_team'] + ' vs ' + rows['away_team']).to_numpy(),
+            'bet': bets['bet'].to_numpy(),
+            'odds': bets['odds'].to_numpy(),
+            'prob': bets['prob'].to_numpy(),
+            'edge': bets['edge'].to_numpy(),
+            'result': result[bets['row'].to_numpy()],
+            'pnl': bets['pnl'].to_numpy(),
+            'bankroll': bets['bankroll'].to_numpy()
+        })
         
         # Summary
-        roi = ((self.bankroll - 10000.0) / (total_bets * self.stake_size)) * 100 if total_bets > 0 else 0
-        logger.info(f"Backtest Complete.")
-        logger.info(f"Total Bets: {total_bets}")
-        logger.info(f"Win Rate: {wins/total_bets:.2%}" if total_bets > 0 else "Win Rate: 0%")
-        logger.info(f"Final Bankroll: ${self.bankroll:.2f}")
-        logger.info(f"ROI: {roi:.2f}%")
+        self.bankroll = summary.iloc[0]['final_bankroll']
+        self.evaluator.log_summary(summary.iloc[0])
         
-        return pd.DataFrame(self.history)
+        return self.history
 
 if __name__ == "__main__":
     backtester = Backtester()
@@ -0,0 +1,148 @@
+import pandas as pd
+import numpy as np
+import logging
+import time
+from typing import Dict, List, Any, Tuple
+from .backtester import Backtester
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Staking strategies are dicts:
+#   {'name': str, 'staking': 'flat', 'stake': float}
+#   {'name': str, 'staking': 'kelly', 'kelly_multiplier': float, 'max_fraction': float (optional cap)}
+DEFAULT_STRATEGIES = [
+    {'name': 'flat_100', 'staking': 'flat', 'stake': 100.0},
+    {'name': 'kelly_full', 'staking': 'kelly', 'kelly_multiplier': 1.0},
+    {'name': 'kelly_quarter', 'staking': 'kelly', 'kelly_multiplier': 0.25},
+    {'name': 'kelly_half_capped_2pct', 'staking': 'kelly', 'kelly_multiplier': 0.5, 'max_fraction': 0.02}
+]
+
+
+def kelly_fraction(probs: np.ndarray, odds: np.ndarray) -> np.ndarray:
+    """Full-Kelly bankroll fraction (p*o - 1) / (o - 1), clipped to [0, 1)."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        f = (probs * odds - 1.0) / (odds - 1.0)
+    return np.clip(np.nan_to_num(f, nan=0.0), 0.0, 0.999)
+
+
+def _path_metrics(path: np.ndarray, staked: np.ndarray, initial_bankroll: float,
+                  ruin_level: float) -> Dict[str, np.ndarray]:
+    """Per-path final bankroll, ROI, max drawdown and ruin flag for a (paths, bets) bankroll matrix."""
+    start = np.full((path.shape[0], 1), initial_bankroll)
+    peak = np.maximum.accumulate(np.concatenate([start, path], axis=1), axis=1)[:, 1:]
+    total_staked = staked.sum(axis=1)
+    final = path[:, -1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        roi = np.where(total_staked > 0, (final - initial_bankroll) / total_staked * 100, 0.0)
+    return {
+        'final_bankroll': final,
+        'roi': roi,
+        'max_drawdown': ((peak - path) / peak).max(axis=1),
+        'ruined': path.min(axis=1) <= ruin_level
+    }
+
+
+def simulate_chunk(returns: np.ndarray, fractions: np.ndarray, strategy: Dict[str, Any],
+                   initial_bankroll: float, ruin_level: float) -> Dict[str, np.ndarray]:
+    """
+    Bankroll paths for one chunk of resampled bets.
+    returns: (paths, bets) net return per unit staked (odds - 1 if won, else -1)
+    fractions: (paths, bets) full-Kelly fraction of each resampled bet
+    """
+    if strategy['staking'] == 'flat':
+        stake = float(strategy.get('stake', 100.0))
+        pnl = stake * returns
+        # Stop betting once the bankroll can no longer cover a stake
+        before = initial_bankroll + np.concatenate(
+            [np.zeros((returns.shape[0], 1)), np.cumsum(pnl, axis=1)[:, :-1]], axis=1)
+        alive = np.logical_and.accumulate(before >= stake, axis=1)
+        pnl = np.where(alive, pnl, 0.0)
+        path = initial_bankroll + np.cumsum(pnl, axis=1)
+        staked = np.where(alive, stake, 0.0)
+    elif strategy['staking'] == 'kelly':
+        f = fractions * strategy.get('kelly_multiplier', 1.0)
+        if strategy.get('max_fraction') is not None:
+            f = np.minimum(f, strategy['max_fraction'])
+        # Stakes are a fraction of the current bankroll, so the path is a running product
+        path = initial_bankroll * np.cumprod(1.0 + f * returns, axis=1)
+        before = np.concatenate([np.full((returns.shape[0], 1), initial_bankroll), path[:, :-1]], axis=1)
+        staked = f * before
+    else:
+        raise ValueError(f"Unknown staking: {strategy['staking']}")
+
+    return _path_metrics(path, staked, initial_bankroll, ruin_level)
+
+
+def simulate(bets: pd.DataFrame, strategies: List[Dict[str, Any]] = None, n_paths: int = 100_000,
+             n_bets: int = None, initial_bankroll: float = 10000.0, ruin_fraction: float = 0.05,
+             chunk_size: int = 10_000, seed: int = None) -> Tuple[pd.DataFrame, Dict[str, pd.DataFrame]]:
+    """
+    Monte Carlo bankroll simulation by resampling a backtest's bets with replacement.
+
+    bets: one row per bet with 'odds', 'prob' (model probability) and 'won' (or 'pnl', won = pnl > 0)
+    n_bets: bets per path (default: as many as in the backtest)
+    ruin_fraction: a path is ruined once its bankroll falls to this fraction of the initial bankroll
+
+    Paths are generated chunk_size at a time, so memory is bounded by chunk_size * n_bets
+    regardless of n_paths. The same resampled bets are used for every strategy.
+
+    Returns (summary, distributions):
+        summary: one row per strategy (ruin probability, ROI / drawdown / final bankroll quantiles)
+        distributions: per-strategy DataFrame with one row per path
+    """
+    strategies = strategies or DEFAULT_STRATEGIES
+    odds = bets['odds'].to_numpy(dtype=float)
+    probs = bets['prob'].to_numpy(dtype=float)
+    won = bets['won'].to_numpy(dtype=bool) if 'won' in bets.columns else bets['pnl'].to_numpy() > 0
+    if len(odds) == 0:
+        raise ValueError("No bets to resample.")
+
+    n_bets = n_bets or len(odds)
+    bet_returns = np.where(won, odds - 1.0, -1.0)
+    bet_fractions = kelly_fraction(probs, odds)
+    ruin_level = initial_bankroll * ruin_fraction
+    rng = np.random.default_rng(seed)
+
+    started = time.time()
+    chunks: Dict[str, List[Dict[str, np.ndarray]]] = {s['name']: [] for s in strategies}
+    for offset in range(0, n_paths, chunk_size):
+        size = min(chunk_size, n_paths - offset)
+        idx = rng.integers(0, len(odds), size=(size, n_bets))
+        returns = bet_returns[idx]
+        fractions = bet_fractions[idx]
+        for strategy in strategies:
+            chunks[strategy['name']].append(
+                simulate_chunk(returns, fractions, strategy, initial_bankroll, ruin_level))
+
+    distributions = {}
+    summary = []
+    for name, parts in chunks.items():
+        dist = pd.DataFrame({key: np.concatenate([p[key] for p in parts]) for key in parts[0]})
+        distributions[name] = dist
+        summary.append({
+            'strategy': name,
+            'ruin_probability': dist['ruined'].mean(),
+            'roi_mean': dist['roi'].mean(),
+            'roi_p5': dist['roi'].quantile(0.05),
+            'roi_p50': dist['roi'].quantile(0.50),
+            'roi_p95': dist['roi'].quantile(0.95),
+            'max_drawdown_p50': dist['max_drawdown'].quantile(0.50),
+            'max_drawdown_p95': dist['max_drawdown'].quantile(0.95),
+            'final_bankroll_p5': dist['final_bankroll'].quantile(0.05),
+            'final_bankroll_p50': dist['final_bankroll'].quantile(0.50),
+            'final_bankroll_p95': dist['final_bankroll'].quantile(0.95)
+        })
+
+    logger.info(f"Simulated {n_paths} paths x {n_bets} bets x {len(strategies)} strategies "
+                f"in {time.time() - started:.1f}s")
+    return pd.DataFrame(summary), distributions
+
+
+if __name__ == "__main__":
+    history = Backtester().run()
+    if history.empty:
+        logger.warning("Backtest produced no bets.")
+    else:
+        summary, _ = simulate(history, seed=0)
+        print(summary.to_string(index=False))
@@ -0,0 +1,167 @@
+import pandas as pd
+import numpy as np
+import datetime
+import logging
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable
+from .database import Database
+from .models import PoissonModel, DixonColesModel
+from .ml_models import MLModel
+from .backtester import Backtester
+from .niche_backtester import NicheBacktester
+from .synthetic import SCALES, build_database
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+RESULTS_PATH = Path(__file__).parent / "data" / "benchmark_results.csv"
+
+# A benchmark is flagged when it is this much slower than the median of earlier runs
+REGRESSION_TOLERANCE = 0.25
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=Path(__file__).parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def build_suite(db: Database) -> Dict[str, Callable[[], object]]:
+    """
+    Benchmarks against one database, name -> zero-argument callable.
+    The prediction benchmarks use a model trained once up front and predict
+    every fixture of the latest season. The single-fixture benchmarks start each
+    repeat from a cold all-pairs table (see PoissonModel.pair_table) so they time what
+    one call after a state change costs, not just the cached lookups.
+    """
+    db.connect()
+    matches = pd.read_sql_query("SELECT date, home_team, away_team, season FROM matches ORDER BY date", db.conn)
+    db.close()
+    fixtures = matches[matches['season'] == matches['season'].max()][['home_team', 'away_team']]
+    pairs = list(zip(fixtures['home_team'], fixtures['away_team']))
+    # Leave the backtesters a month of history before betting
+    start_date = pd.to_datetime(matches['date'].min()) + pd.Timedelta(days=30)
+
+    trained = DixonColesModel(db=db)
+    trained.train()
+
+    def cold(predict: Callable[[str, str], Dict[str, float]]) -> Callable[[], object]:
+        def run():
+            trained._pair_table = None
+            return [predict(h, a) for h, a in pairs]
+        return run
+
+    return {
+        'PoissonModel.train': lambda: PoissonModel(db=db).train(),
+        'DixonColesModel.predict_batch': lambda: trained.predict_batch(fixtures),
+        'DixonColesModel.precompute_pairs': lambda: trained.precompute_pairs(),
+        'DixonColesModel.predict_match': cold(trained.predict_match),
+        'DixonColesModel.predict_ou_btts': cold(trained.predict_ou_btts),
+        'MLModel.prepare_features': lambda: MLModel(db=db).prepare_features(use_cache=False),
+        'Backtester.run': lambda: Backtester(start_date=start_date, db=db).run(),
+        'NicheBacktester.run': lambda: NicheBacktester(start_date=start_date, db=db).run()
+    }
+
+
+def time_call(fn: Callable[[], object], repeat: int = 3) -> float:
+    """Best wall time of `repeat` calls (the minimum is the least noisy estimate)."""
+    best = np.inf
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def run_benchmarks(scales: Iterable[int] = tuple(SCALES), repeat: int = 3, workdir: Path = None,
+                   only: Iterable[str] = None, seed: int = 0, output_path: Path = RESULTS_PATH) -> pd.DataFrame:
+    """
+    Times the suite on synthetic databases at each data scale (see synthetic.SCALES).
+    Databases are generated in workdir (reused across runs if given, a temporary
+    directory otherwise). Results are appended to output_path so later runs can be
+    compared with check_regressions().
+    """
+    run_at = datetime.datetime.now().isoformat(timespec='seconds')
+    commit = _git_commit()
+    rows = []
+
+    root_logger = logging.getLogger()
+    level = root_logger.level
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(workdir or tmp)
+        workdir.mkdir(parents=True, exist_ok=True)
+        for scale in scales:
+            db = build_database(workdir / f"synthetic_{scale}x_seed{seed}.db", scale=scale, seed=seed)
+            db.connect()
+            n_matches = db.cursor.execute("SELECT COUNT(*) FROM matches").fetchone()[0]
+
+            # The models and backtesters log every run; keep the benchmark output readable
+            root_logger.setLevel(logging.WARNING)
+            try:
+                suite = build_suite(db)
+                for name, fn in suite.items():
+                    if only and name not in only:
+                        continue
+                    seconds = time_call(fn, repeat)
+                    rows.append({'run_at': run_at, 'commit': commit, 'scale': scale, 'n_matches': n_matches,
+                                 'benchmark': name, 'seconds': seconds})
+                    logger.warning(f"{scale:>4}x {name:<34} {seconds:9.3f}s")
+            finally:
+                root_logger.setLevel(level)
+                db.close(force=True)
+
+    results = pd.DataFrame(rows)
+    if output_path and not results.empty:
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        results.to_csv(output_path, mode='a', header=not output_path.exists(), index=False)
+        logger.info(f"Results appended to {output_path}")
+    return results
+
+
+def scaling_exponents(results: pd.DataFrame) -> pd.Series:
+    """
+    Slope of log(seconds) against log(n_matches) per benchmark: ~1 is linear in the
+    data, ~2 quadratic. Needs at least two scales.
+    """
+    def slope(group: pd.DataFrame) -> float:
+        if group['n_matches'].nunique() < 2:
+            return np.nan
+        return float(np.polyfit(np.log(group['n_matches']), np.log(group['seconds'].clip(lower=1e-6)), 1)[0])
+
+    return results.groupby('benchmark')[['n_matches', 'seconds']].apply(slope).rename('exponent')
+
+
+def check_regressions(results: pd.DataFrame, history: pd.DataFrame = None,
+                      tolerance: float = REGRESSION_TOLERANCE) -> pd.DataFrame:
+    """
+    Compares a run with the median of earlier runs (history defaults to the stored results,
+    excluding this run) per benchmark and scale. Rows slower than (1 + tolerance) x baseline
+    are flagged and logged.
+    """
+    if history is None:
+        history = pd.read_csv(RESULTS_PATH) if RESULTS_PATH.exists() else pd.DataFrame(columns=results.columns)
+        history = history[~history['run_at'].isin(results['run_at'].unique())]
+
+    baseline = history.groupby(['benchmark', 'scale'])['seconds'].median().rename('baseline_seconds')
+    report = results.join(baseline, on=['benchmark', 'scale'])
+    report['ratio'] = report['seconds'] / report['baseline_seconds']
+    report['regression'] = report['ratio'] > 1 + tolerance
+
+    for row in report[report['regression']].itertuples():
+        logger.warning(f"Regression: {row.benchmark} at {row.scale}x took {row.seconds:.3f}s "
+                       f"({row.ratio:.2f}x the baseline {row.baseline_seconds:.3f}s)")
+    return report
+
+
+if __name__ == "__main__":
+    results = run_benchmarks()
+    print(results.pivot(index='benchmark', columns='scale', values='seconds').to_string())
+    print(scaling_exponents(results).to_string())
+    report = check_regressions(results)
+    print(f"{int(report['regression'].sum())} regressions")
@@ -0,0 +1,114 @@
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Any, Tuple
+import logging
+from .profiling import timed
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class BetEvaluator:
+    """
+    Vectorized value-bet evaluation for any set of markets.
+
+    Inputs are aligned (n_matches, n_markets) arrays of model probabilities,
+    decimal odds and outcomes (True if the selection won). Strategies are dicts:
+        {
+            'name': str,
+            'edge_threshold': float,       # bet when prob - implied > threshold
+            'stake': float,                # flat stake per bet (default 100)
+            'markets': list,               # subset of market labels (default all)
+            'max_bets_per_match': int      # 1 = first qualifying market only (default unlimited)
+        }
+    Every strategy is evaluated in a single pass with broadcasting over a
+    (n_strategies, n_matches, n_markets) bet mask.
+    """
+
+    def __init__(self, markets: List[str]):
+        self.markets = list(markets)
+
+    @timed()
+    def evaluate(self, probs: np.ndarray, odds: np.ndarray, outcomes: np.ndarray,
+                 strategies: List[Dict[str, Any]], implied: np.ndarray = None,
+                 bankroll: float = 10000.0) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Computes edges, bet masks, stakes and P&L for every strategy.
+        implied defaults to 1/odds (vig included).
+
+        Returns (bets, summary):
+            bets: one row per placed bet in chronological order, with running bankroll per strategy
+            summary: one row per strategy
+        """
+        probs = np.asarray(probs, dtype=float)
+        odds = np.asarray(odds, dtype=float)
+        outcomes = np.asarray(outcomes, dtype=bool)
+        n_matches, n_markets = probs.shape
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if implied is None:
+                implied = 1.0 / odds
+            edges = probs - np.asarray(implied, dtype=float)
+
+        valid = (odds > 1.0) & np.isfinite(edges)
+        edges = np.where(valid, edges, -np.inf)
+
+        names = [s.get('name', f"strategy_{i}") for i, s in enumerate(strategies)]
+        thresholds = np.array([s['edge_threshold'] for s in strategies], dtype=float)
+        stakes = np.array([s.get('stake', 100.0) for s in strategies], dtype=float)
+        market_mask = np.array([
+            [m in s.get('markets', self.markets) for m in self.markets] for s in strategies
+        ], dtype=bool)
+
+        # (n_strategies, n_matches, n_markets)
+        mask = (edges[None, :, :] > thresholds[:, None, None]) & market_mask[:, None, :]
+
+        for i, s in enumerate(strategies):
+            max_bets = s.get('max_bets_per_match')
+            if max_bets:
+                # Keep only the first max_bets qualifying markets (in market order)
+                mask[i] &= np.cumsum(mask[i], axis=1) <= max_bets
+
+        win_pnl = stakes[:, None, None] * (odds[None, :, :] - 1.0)
+        pnl = np.where(mask, np.where(outcomes[None, :, :], win_pnl, -stakes[:, None, None]), 0.0)
+
+        s_idx, m_idx, k_idx = np.nonzero(mask)
+        bets = pd.DataFrame({
+            'strategy': np.array(names, dtype=object)[s_idx],
+            'row': m_idx,
+            'bet': np.array(self.markets, dtype=object)[k_idx],
+            'odds': odds[m_idx, k_idx],
+            'prob': probs[m_idx, k_idx],
+            'edge': edges[m_idx, k_idx],
+            'won': outcomes[m_idx, k_idx],
+            'stake': stakes[s_idx],
+            'pnl': pnl[s_idx, m_idx, k_idx]
+        })
+        bets['bankroll'] = bankroll + bets.groupby('strategy', sort=False)['pnl'].cumsum()
+
+        summary = []
+        for i, name in enumerate(names):
+            strategy_pnl = pnl[i][mask[i]]
+            n_bets = int(mask[i].sum())
+            path = bankroll + np.cumsum(strategy_pnl)
+            peak = np.maximum.accumulate(np.concatenate([[bankroll], path]))
+            drawdown = (peak[1:] - path) / peak[1:] if n_bets else np.zeros(1)
+            wins = int((mask[i] & outcomes).sum())
+            summary.append({
+                'strategy': name,
+                'bets': n_bets,
+                'wins': wins,
+                'win_rate': wins / n_bets if n_bets else 0.0,
+                'pnl': float(strategy_pnl.sum()),
+                'roi': float(strategy_pnl.sum() / (n_bets * stakes[i]) * 100) if n_bets else 0.0,
+                'final_bankroll': float(path[-1]) if n_bets else bankroll,
+                'max_drawdown': float(drawdown.max())
+            })
+
+        return bets, pd.DataFrame(summary)
+
+    def log_summary(self, summary_row: Dict[str, Any]):
+        logger.info(f"Backtest Complete.")
+        logger.info(f"Total Bets: {summary_row['bets']}")
+        logger.info(f"Win Rate: {summary_row['win_rate']:.2%}" if summary_row['bets'] > 0 else "Win Rate: 0%")
+        logger.info(f"Final Bankroll: ${summary_row['final_bankroll']:.2f}")
+        logger.info(f"ROI: {summary_row['roi']:.2f}%")
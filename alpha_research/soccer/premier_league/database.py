@@ -1,27 +1,342 @@
 import sqlite3
+import pandas as pd
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 import datetime
+from .teams import TEAM_ALIASES, DEFAULT_LEAGUE, canonical_team, canonical_match_id
+from .profiling import timed
 
 # Updated path to be relative to this file
 DB_PATH = Path(__file__).parent / "data" / "premier_league.db"
 
+# Applied to every new connection. WAL lets readers run alongside the writer,
+# and synchronous=NORMAL only fsyncs at checkpoints instead of every commit.
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'temp_store': 'MEMORY',
+    'cache_size': -64000,      # KiB (negative) -> 64 MB page cache
+    'mmap_size': 268435456     # 256 MB memory-mapped I/O
+}
+
+def sync_team_aliases(cursor: sqlite3.Cursor):
+    """Mirrors teams.TEAM_ALIASES into the teams/team_aliases tables (insert-only)."""
+    cursor.executemany("INSERT OR IGNORE INTO teams (name) VALUES (?)", [(name,) for name in TEAM_ALIASES])
+    cursor.executemany("""
+        INSERT OR IGNORE INTO team_aliases (alias, team_id)
+        SELECT ?, id FROM teams WHERE name = ?
+    """, [(alias, name) for name, aliases in TEAM_ALIASES.items() for alias in [name, *aliases]])
+
+
+def stage_match_ids(cursor: sqlite3.Cursor, match_ids):
+    """
+    Records the match ids a bulk save writes in the temp table written_match_ids, so
+    link_keys(written_only=True) and _match_seasons only touch those rows.
+    """
+    cursor.execute("CREATE TEMP TABLE IF NOT EXISTS written_match_ids (id TEXT PRIMARY KEY)")
+    cursor.execute("DELETE FROM written_match_ids")
+    cursor.executemany("INSERT OR IGNORE INTO written_match_ids (id) VALUES (?)", [(i,) for i in match_ids])
+
+
+def link_keys(cursor: sqlite3.Cursor, written_only: bool = False):
+    """
+    Fills the integer keys of rows written since the last call: match_no for matches
+    (and for odds/team_stats/player_stats via their text match_id) and team ids via
+    team_aliases. Team names not in the alias table are registered as new teams.
+
+    With written_only, only rows keyed by the ids in written_match_ids (see stage_match_ids)
+    are looked at, so a save costs O(rows written) however many rows never resolve
+    (e.g. odds of a league whose matches aren't imported). Migrations link everything.
+    """
+    written = "IN (SELECT id FROM written_match_ids)"
+    match_scope = f"id {written}" if written_only else "1 = 1"
+    row_scope = f"match_id {written}" if written_only else "1 = 1"
+    cursor.execute(f"""
+        INSERT OR IGNORE INTO teams (name)
+        SELECT home_team FROM matches WHERE {match_scope} AND home_team NOT IN (SELECT alias FROM team_aliases)
+        UNION
+        SELECT away_team FROM matches WHERE {match_scope} AND away_team NOT IN (SELECT alias FROM team_aliases)
+    """)
+    cursor.execute("""
+        INSERT OR IGNORE INTO team_aliases (alias, team_id)
+        SELECT name, id FROM teams WHERE name NOT IN (SELECT alias FROM team_aliases)
+    """)
+    cursor.execute(f"""
+        UPDATE matches SET
+            match_no = COALESCE(match_no, rowid),
+            home_team_id = (SELECT team_id FROM team_aliases WHERE alias = matches.home_team),
+            away_team_id = (SELECT team_id FROM team_aliases WHERE alias = matches.away_team)
+        WHERE {match_scope} AND (match_no IS NULL OR home_team_id IS NULL OR away_team_id IS NULL)
+    """)
+    # Rows saved before their match were versioned under 'unknown'; once the match exists they
+    # move to its season's partition, so bump both (table_versions only exists from migration 5)
+    versioned = cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'table_versions'").fetchone()
+    for table in ('odds', 'team_stats', 'player_stats') if versioned else ():
+        resolved = [row[0] for row in cursor.execute(f"""
+            SELECT DISTINCT COALESCE(m.season, 'unknown') FROM {table} t JOIN matches m ON m.id = t.match_id
+            WHERE t.{row_scope} AND t.match_no IS NULL
+        """).fetchall()]
+        if resolved:
+            bump_versions(cursor, table, ['unknown', *resolved])
+    cursor.execute(f"""
+        UPDATE odds SET match_no = (SELECT match_no FROM matches WHERE id = odds.match_id)
+        WHERE {row_scope} AND match_no IS NULL
+    """)
+    for table in ('team_stats', 'player_stats'):
+        cursor.execute(f"""
+            UPDATE {table} SET
+                match_no = (SELECT match_no FROM matches WHERE id = {table}.match_id),
+                team_id = (SELECT team_id FROM team_aliases WHERE alias = {table}.team)
+            WHERE {row_scope} AND (match_no IS NULL OR team_id IS NULL)
+        """)
+
+
+def league_clause(league: Optional[str], column: str = 'league') -> Tuple[str, tuple]:
+    """SQL condition and parameters restricting a query to one league (None = every league)."""
+    if league is None:
+        return "1 = 1", ()
+    return f"{column} = ?", (league,)
+
+
+def _canonicalize_names(cursor: sqlite3.Cursor):
+    """Rewrites team names and text match ids stored under non-canonical aliases."""
+    for table, columns in (('matches', ['home_team', 'away_team']),
+                           ('team_stats', ['team']), ('player_stats', ['team'])):
+        for column in columns:
+            names = [row[0] for row in cursor.execute(f"SELECT DISTINCT {column} FROM {table}").fetchall()]
+            _rename_keys(cursor, table, column, [(canonical_team(n), n) for n in names if canonical_team(n) != n])
+
+    for table, column in (('matches', 'id'), ('odds', 'match_id'),
+                          ('team_stats', 'match_id'), ('player_stats', 'match_id')):
+        ids = [row[0] for row in cursor.execute(f"SELECT DISTINCT {column} FROM {table}").fetchall()]
+        _rename_keys(cursor, table, column, [(canonical_match_id(i), i) for i in ids if canonical_match_id(i) != i])
+
+
+def _rename_keys(cursor: sqlite3.Cursor, table: str, column: str, renames: List[Tuple[str, str]]):
+    """
+    Applies (new, old) renames to a column. A row whose renamed key would collide with an
+    existing row under the canonical key is a duplicate: the canonical row is kept and the
+    alias-keyed one is deleted (both would otherwise survive).
+    """
+    cursor.executemany(f"UPDATE OR IGNORE {table} SET {column} = ? WHERE {column} = ?", renames)
+    cursor.executemany(f"DELETE FROM {table} WHERE {column} = ?", [(old,) for _, old in renames])
+
+
+# Tables mirrored by the Parquet snapshot (snapshot.py), partitioned by their match's season.
+# Every bulk save that changes rows bumps table_versions once per affected (table, season)
+# (see _save_by_season), and link_keys bumps the season of rows saved before their match,
+# so the snapshot can tell which partitions changed without reading the tables.
+VERSIONED_TABLES = ['matches', 'odds', 'team_stats', 'player_stats']
+
+
+def _unchanged_guard(columns: List[str]) -> str:
+    """WHERE clause for an upsert's DO UPDATE that skips rows whose values are identical."""
+    return "WHERE " + " OR ".join(f"{c} IS NOT excluded.{c}" for c in columns)
+
+
+def _match_seasons(cursor: sqlite3.Cursor, match_ids) -> Dict[str, str]:
+    """
+    Stages match_ids (see stage_match_ids) and returns the season of those already
+    stored ('unknown' when missing, as in table_versions).
+    """
+    stage_match_ids(cursor, match_ids)
+    return dict(cursor.execute("""
+        SELECT m.id, COALESCE(m.season, 'unknown') FROM matches m JOIN written_match_ids w ON w.id = m.id
+    """).fetchall())
+
+
+def bump_versions(cursor: sqlite3.Cursor, table: str, seasons):
+    """Increments the table_versions counters of one table's seasons (once each)."""
+    cursor.executemany("""
+        INSERT INTO table_versions (table_name, season, version) VALUES (?, ?, 1)
+        ON CONFLICT (table_name, season) DO UPDATE SET version = version + 1
+    """, [(table, season) for season in sorted(set(seasons))])
+
+
+def _save_by_season(cursor: sqlite3.Cursor, table: str, sql: str, rows: List[tuple], seasons: List[str]) -> List[str]:
+    """
+    Runs an upsert with executemany once per season and bumps table_versions for the
+    seasons where rows were actually inserted or changed (the upserts skip identical
+    rows, so rowcount is 0 for a no-op re-import). Returns the bumped seasons.
+    """
+    groups: Dict[str, List[tuple]] = {}
+    for row, season in zip(rows, seasons):
+        groups.setdefault(season, []).append(row)
+    changed = []
+    for season, group in groups.items():
+        cursor.executemany(sql, group)
+        if cursor.rowcount > 0:
+            changed.append(season)
+    bump_versions(cursor, table, changed)
+    return changed
+
+
+# Schema migrations, applied in order on top of the base schema in init_db.
+# The applied version is tracked in PRAGMA user_version; never edit a shipped
+# migration, append a new one instead. A statement may also be a callable
+# taking the cursor, for data migrations that need Python.
+MIGRATIONS = [
+    (1, "Unique keys for odds/team_stats and lookup indexes", [
+        # Keep the latest row of any duplicates left by earlier re-imports
+        """
+        DELETE FROM odds WHERE id NOT IN (
+            SELECT MAX(id) FROM odds GROUP BY match_id, bookmaker
+        )
+        """,
+        """
+        DELETE FROM team_stats WHERE id NOT IN (
+            SELECT MAX(id) FROM team_stats GROUP BY match_id, team
+        )
+        """,
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_odds_match_bookmaker ON odds (match_id, bookmaker)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_team_stats_match_team ON team_stats (match_id, team)",
+        "CREATE INDEX IF NOT EXISTS idx_market_snapshots_market_time ON market_snapshots (market_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_matches_date ON matches (date)",
+        "ANALYZE"
+    ]),
+    (2, "Integer surrogate keys for teams and matches", [
+        """
+        CREATE TABLE IF NOT EXISTS teams (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS team_aliases (
+            alias TEXT PRIMARY KEY,
+            team_id INTEGER NOT NULL,
+            FOREIGN KEY (team_id) REFERENCES teams (id)
+        )
+        """,
+        "ALTER TABLE matches ADD COLUMN match_no INTEGER",
+        "ALTER TABLE matches ADD COLUMN home_team_id INTEGER REFERENCES teams (id)",
+        "ALTER TABLE matches ADD COLUMN away_team_id INTEGER REFERENCES teams (id)",
+        "ALTER TABLE odds ADD COLUMN match_no INTEGER REFERENCES matches (match_no)",
+        "ALTER TABLE team_stats ADD COLUMN match_no INTEGER REFERENCES matches (match_no)",
+        "ALTER TABLE team_stats ADD COLUMN team_id INTEGER REFERENCES teams (id)",
+        "ALTER TABLE player_stats ADD COLUMN match_no INTEGER REFERENCES matches (match_no)",
+        "ALTER TABLE player_stats ADD COLUMN team_id INTEGER REFERENCES teams (id)",
+        _canonicalize_names,
+        sync_team_aliases,
+        link_keys,
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_matches_match_no ON matches (match_no)",
+        "CREATE INDEX IF NOT EXISTS idx_odds_match_no ON odds (match_no, bookmaker)",
+        "CREATE INDEX IF NOT EXISTS idx_team_stats_match_no ON team_stats (match_no, team_id)",
+        "CREATE INDEX IF NOT EXISTS idx_player_stats_match_no ON player_stats (match_no, team_id)",
+        "ANALYZE"
+    ]),
+    (3, "OHLC bars for downsampled market snapshots", [
+        """
+        CREATE TABLE IF NOT EXISTS market_bars (
+            market_id TEXT NOT NULL,
+            bar_seconds INTEGER NOT NULL,
+            bar_start TIMESTAMP NOT NULL,
+            yes_open REAL,
+            yes_high REAL,
+            yes_low REAL,
+            yes_close REAL,
+            no_open REAL,
+            no_high REAL,
+            no_low REAL,
+            no_close REAL,
+            yes_volume REAL, -- last value in the bar
+            no_volume REAL,
+            snapshots INTEGER NOT NULL,
+            PRIMARY KEY (market_id, bar_seconds, bar_start),
+            FOREIGN KEY (market_id) REFERENCES markets (id)
+        )
+        """
+    ]),
+    (4, "League dimension for matches", [
+        f"ALTER TABLE matches ADD COLUMN league TEXT NOT NULL DEFAULT '{DEFAULT_LEAGUE}'",
+        "CREATE INDEX IF NOT EXISTS idx_matches_league_date ON matches (league, date)",
+        "ANALYZE"
+    ]),
+    (5, "Per-season change counters for the Parquet snapshot", [
+        """
+        CREATE TABLE IF NOT EXISTS table_versions (
+            table_name TEXT NOT NULL,
+            season TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            PRIMARY KEY (table_name, season)
+        )
+        """,
+        # Seed every existing partition at version 1
+        """
+        INSERT OR IGNORE INTO table_versions (table_name, season, version)
+        SELECT 'matches', COALESCE(season, 'unknown'), 1 FROM matches GROUP BY 2
+        """,
+        *[f"""
+        INSERT OR IGNORE INTO table_versions (table_name, season, version)
+        SELECT '{table}', COALESCE(m.season, 'unknown'), 1
+        FROM {table} t LEFT JOIN matches m ON m.id = t.match_id GROUP BY 2
+        """ for table in VERSIONED_TABLES if table != 'matches']
+    ])
+]
+
 class Database:
-    def __init__(self, db_path: Path = DB_PATH):
+    def __init__(self, db_path: Path = DB_PATH, persistent: bool = True):
+        """
+        persistent: keep one connection open for the lifetime of the object.
+        close() is then a no-op (use close(force=True) or the context manager to release it).
+        """
         self.db_path = db_path
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.persistent = persistent
         self.conn = None
         self.cursor = None
         self.init_db()
 
+    def __getstate__(self):
+        # Connections can't cross process boundaries; the copy reconnects on first use
+        state = self.__dict__.copy()
+        state['conn'] = None
+        state['cursor'] = None
+        return state
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(force=True)
+
+    @timed()
     def connect(self):
+        if self.conn is not None:
+            return self.conn
         self.conn = sqlite3.connect(self.db_path)
         self.conn.row_factory = sqlite3.Row
+        for pragma, value in PRAGMAS.items():
+            self.conn.execute(f"PRAGMA {pragma} = {value}")
         self.cursor = self.conn.cursor()
+        return self.conn
 
-    def close(self):
-        if self.conn:
+    def close(self, force: bool = False):
+        if self.conn and (force or not self.persistent):
             self.conn.close()
+            self.conn = None
+            self.cursor = None
+
+    @contextmanager
+    def transaction(self):
+        """
+        Runs the enclosed writes in a single transaction (commit on success, rollback on error).
+        Nested calls join the outer transaction.
+        """
+        self.connect()
+        outer = not self.conn.in_transaction
+        if outer:
+            self.conn.execute("BEGIN")
+        try:
+            yield self.cursor
+            if outer:
+                self.conn.commit()
+        except Exception:
+            if outer:
+                self.conn.rollback()
+            raise
 
     def init_db(self):
         self.connect()
@@ -119,38 +434,93 @@ class Database:
         """)
         
         self.conn.commit()
+        self.migrate()
         self.close()
 
-    def save_market_snapshot(self, market: Dict[str, Any]):
+    @property
+    def schema_version(self) -> int:
         self.connect()
-        try:
+        return self.conn.execute("PRAGMA user_version").fetchone()[0]
+
+    @timed()
+    def migrate(self):
+        """Applies any migrations newer than the database's user_version, each in its own transaction."""
+        current = self.schema_version
+        for version, description, statements in MIGRATIONS:
+            if version <= current:
+                continue
+            with self.transaction() as cursor:
+                for statement in statements:
+                    if callable(statement):
+                        statement(cursor)
+                    else:
+                        cursor.execute(statement)
+                cursor.execute(f"PRAGMA user_version = {version}")
+            current = version
+
+        # Pick up aliases added to teams.py since the last run
+        with self.transaction() as cursor:
+            sync_team_aliases(cursor)
+
+    @timed()
+    def read_sql(self, query: str, params=()) -> pd.DataFrame:
+        """Runs a SELECT into a DataFrame on the open connection (timed as its own profiling stage)."""
+        self.connect()
+        return pd.read_sql_query(query, self.conn, params=params)
+
+    @timed()
+    def table_versions(self) -> Dict[Tuple[str, str], int]:
+        """Change counter per (table, season) for the VERSIONED_TABLES."""
+        self.connect()
+        rows = self.conn.execute("SELECT table_name, season, version FROM table_versions").fetchall()
+        self.close()
+        return {(row[0], row[1]): row[2] for row in rows}
+
+    def leagues(self) -> List[str]:
+        """Leagues with at least one stored match."""
+        self.connect()
+        rows = self.conn.execute("SELECT DISTINCT league FROM matches ORDER BY league").fetchall()
+        self.close()
+        return [row[0] for row in rows]
+
+    def save_market_snapshot(self, market: Dict[str, Any]):
+        self.save_market_snapshots_bulk([market])
+
+    def save_market_snapshots_bulk(self, markets: List[Dict[str, Any]]):
+        """Saves market info (first sighting only) and one snapshot per market in one transaction."""
+        with self.transaction() as cursor:
             # Upsert market info
-            self.cursor.execute("""
+            cursor.executemany("""
                 INSERT OR IGNORE INTO markets (id, platform, title, url, expiry_date)
                 VALUES (?, ?, ?, ?, ?)
-            """, (
-                market['id'],
-                market['platform'],
-                market['title'],
-                market['url'],
-                market['expiry_date']
-            ))
+            """, [(
+                m['id'],
+                m['platform'],
+                m['title'],
+                m['url'],
+                m['expiry_date']
+            ) for m in markets])
             
-            # Insert snapshot
-            self.cursor.execute("""
+            # Insert snapshots
+            cursor.executemany("""
                 INSERT INTO market_snapshots (market_id, yes_price, no_price, yes_volume, no_volume)
                 VALUES (?, ?, ?, ?, ?)
-            """, (
-                market['id'],
-                market['yes_price'],
-                market['no_price'],
-                market['yes_volume'],
-                market['no_volume']
-            ))
-            
-            self.conn.commit()
-        finally:
-            self.close()
+            """, [(
+                m['id'],
+                m['yes_price'],
+                m['no_price'],
+                m['yes_volume'],
+                m['no_volume']
+            ) for m in markets])
+
+    def get_latest_snapshots(self) -> Dict[str, Dict[str, Any]]:
+        """Most recent snapshot of every market, keyed by market_id."""
+        self.connect()
+        rows = self.conn.execute("""
+            SELECT s.* FROM market_snapshots s
+            JOIN (SELECT MAX(id) AS id FROM market_snapshots GROUP BY market_id) latest ON latest.id = s.id
+        """).fetchall()
+        return {row['market_id']: dict(row) for row in rows}
 
     def get_market_history(self, market_id: str) -> List[Dict[str, Any]]:
         self.connect()
@@ -164,21 +534,99 @@ class Database:
         finally:
             self.close()
 
+    def get_market_bars(self, market_id: str, bar_seconds: int = 3600) -> List[Dict[str, Any]]:
+        self.connect()
+        rows = self.conn.execute("""
+            SELECT * FROM market_bars
+            WHERE market_id = ? AND bar_seconds = ?
+            ORDER BY bar_start ASC
+        """, (market_id, bar_seconds)).fetchall()
+        return [dict(row) for row in rows]
+
+    def downsample_snapshots(self, cutoff: datetime.datetime, bar_seconds: int = 3600) -> int:
+        """
+        Rolls snapshots older than cutoff into OHLC bars of bar_seconds and deletes them.
+        The cutoff is floored to a bar boundary so only complete bars are written;
+        bars that already exist are merged. Returns the number of snapshots removed.
+        Timestamps are UTC (SQLite CURRENT_TIMESTAMP).
+        """
+        if cutoff.tzinfo is None:
+            cutoff = cutoff.replace(tzinfo=datetime.timezone.utc)
+        cutoff_epoch = int(cutoff.timestamp()) // bar_seconds * bar_seconds
+        with self.transaction() as cursor:
+            cursor.execute("""
+                INSERT INTO market_bars (
+                    market_id, bar_seconds, bar_start,
+                    yes_open, yes_high, yes_low, yes_close,
+                    no_open, no_high, no_low, no_close,
+                    yes_volume, no_volume, snapshots
+                )
+                SELECT market_id, :bar, datetime(bucket, 'unixepoch'),
+                       yes_open, MAX(yes_price), MIN(yes_price), yes_close,
+                       no_open, MAX(no_price), MIN(no_price), no_close,
+                       yes_last_volume, no_last_volume, COUNT(*)
+                FROM (
+                    SELECT market_id, yes_price, no_price, bucket,
+                           FIRST_VALUE(yes_price) OVER w AS yes_open,
+                           LAST_VALUE(yes_price) OVER w AS yes_close,
+                           FIRST_VALUE(no_price) OVER w AS no_open,
+                           LAST_VALUE(no_price) OVER w AS no_close,
+                           LAST_VALUE(yes_volume) OVER w AS yes_last_volume,
+                           LAST_VALUE(no_volume) OVER w AS no_last_volume
+                    FROM (
+                        SELECT *, CAST(strftime('%s', timestamp) AS INTEGER) / :bar * :bar AS bucket
+                        FROM market_snapshots
+                        WHERE timestamp < datetime(:cutoff, 'unixepoch')
+                    )
+                    WINDOW w AS (PARTITION BY market_id, bucket ORDER BY timestamp, id
+                                 ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING)
+                )
+                WHERE true
+                GROUP BY market_id, bucket
+                ON CONFLICT (market_id, bar_seconds, bar_start) DO UPDATE SET
+                    yes_high = MAX(yes_high, excluded.yes_high), yes_low = MIN(yes_low, excluded.yes_low),
+                    yes_close = excluded.yes_close,
+                    no_high = MAX(no_high, excluded.no_high), no_low = MIN(no_low, excluded.no_low),
+                    no_close = excluded.no_close,
+                    yes_volume = excluded.yes_volume, no_volume = excluded.no_volume,
+                    snapshots = snapshots + excluded.snapshots
+            """, {'bar': bar_seconds, 'cutoff': cutoff_epoch})
+            removed = cursor.execute(
+                "DELETE FROM market_snapshots WHERE timestamp < datetime(?, 'unixepoch')", (cutoff_epoch,)
+            ).rowcount
+        return removed
+
     def save_player_stats(self, match_id: str, stats_list: list):
         """
         Saves a list of player stats dictionaries.
         stats_list item: {team, player, position, minutes, goals, assists, shots, shots_on_target, xg, xa, npxg}
         """
-        self.connect()
-        try:
-            self.cursor.executemany("""
-                INSERT OR REPLACE INTO player_stats (
+        self.save_player_stats_bulk([{**s, 'match_id': match_id} for s in stats_list])
+
+    @timed()
+    def save_player_stats_bulk(self, stats: List[Dict[str, Any]]):
+        """
+        Upserts player stats for many matches in one transaction.
+        stats item: {match_id, team, player, position, minutes, goals, assists, shots, shots_on_target, xg, xa, npxg}
+        """
+        columns = ['team', 'position', 'minutes', 'goals', 'assists', 'shots', 'shots_on_target', 'xg', 'xa', 'npxg']
+        with self.transaction() as cursor:
+            season_of = _match_seasons(cursor, [s['match_id'] for s in stats])
+            _save_by_season(cursor, 'player_stats', f"""
+                INSERT INTO player_stats (
                     match_id, team, player, position, minutes, goals, assists, 
                     shots, shots_on_target, xg, xa, npxg
                 )
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (match_id, player) DO UPDATE SET
+                    team = excluded.team, position = excluded.position, minutes = excluded.minutes,
+                    goals = excluded.goals, assists = excluded.assists, shots = excluded.shots,
+                    shots_on_target = excluded.shots_on_target, xg = excluded.xg,
+                    xa = excluded.xa, npxg = excluded.npxg,
+                    team_id = NULL
+                {_unchanged_guard(columns)}
             """, [(
-                match_id,
+                s['match_id'],
                 s['team'],
                 s['player'],
                 s['position'],
@@ -190,10 +638,103 @@ class Database:
                 s['xg'],
                 s['xa'],
                 s['npxg']
-            ) for s in stats_list])
-            self.conn.commit()
-        finally:
-            self.close()
+            ) for s in stats], [season_of.get(s['match_id'], 'unknown') for s in stats])
+            link_keys(cursor, written_only=True)
+
+    @timed()
+    def save_matches_bulk(self, matches: List[Dict[str, Any]]):
+        """
+        Upserts many match results in one transaction.
+        matches item: {id, date, home_team, away_team, home_score, away_score, season, league}
+        (league is optional and defaults to teams.DEFAULT_LEAGUE)
+        """
+        columns = ['date', 'home_team', 'away_team', 'home_score', 'away_score', 'season', 'league']
+        with self.transaction() as cursor:
+            season_of = _match_seasons(cursor, [m['id'] for m in matches])
+            seasons = [m['season'] or 'unknown' for m in matches]
+            changed = _save_by_season(cursor, 'matches', f"""
+                INSERT INTO matches (id, date, home_team, away_team, home_score, away_score, season, league)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (id) DO UPDATE SET
+                    date = excluded.date, home_team = excluded.home_team, away_team = excluded.away_team,
+                    home_score = excluded.home_score, away_score = excluded.away_score, season = excluded.season,
+                    league = excluded.league, home_team_id = NULL, away_team_id = NULL
+                {_unchanged_guard(columns)}
+            """, [(
+                m['id'],
+                m['date'],
+                m['home_team'],
+                m['away_team'],
+                m['home_score'],
+                m['away_score'],
+                m['season'],
+                m.get('league', DEFAULT_LEAGUE)
+            ) for m in matches], seasons)
+            # A match moved to another season also changes the partition it left
+            moved = [season_of[m['id']] for m, season in zip(matches, seasons)
+                     if season in changed and season_of.get(m['id'], season) != season]
+            bump_versions(cursor, 'matches', moved)
+            link_keys(cursor, written_only=True)
+
+    @timed()
+    def save_team_stats_bulk(self, stats: List[Dict[str, Any]]):
+        """
+        Upserts many team stats rows (one per match and team) in one transaction.
+        stats item: {match_id, team, xg, shots, shots_on_target, corners, possession}
+        """
+        columns = ['xg', 'shots', 'shots_on_target', 'corners', 'possession']
+        with self.transaction() as cursor:
+            season_of = _match_seasons(cursor, [s['match_id'] for s in stats])
+            _save_by_season(cursor, 'team_stats', f"""
+                INSERT INTO team_stats (match_id, team, xg, shots, shots_on_target, corners, possession)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (match_id, team) DO UPDATE SET
+                    xg = excluded.xg, shots = excluded.shots, shots_on_target = excluded.shots_on_target,
+                    corners = excluded.corners, possession = excluded.possession
+                {_unchanged_guard(columns)}
+            """, [(
+                s['match_id'],
+                s['team'],
+                s['xg'],
+                s['shots'],
+                s['shots_on_target'],
+                s['corners'],
+                s['possession']
+            ) for s in stats], [season_of.get(s['match_id'], 'unknown') for s in stats])
+            link_keys(cursor, written_only=True)
+
+    @timed()
+    def save_odds_bulk(self, odds: List[Dict[str, Any]]):
+        """
+        Upserts many odds rows (one per match and bookmaker) in one transaction.
+        odds item: {match_id, bookmaker, home_win, draw, away_win, over_2_5, under_2_5, btts_yes, btts_no}
+        (the over/under and BTTS prices are optional)
+        """
+        columns = ['home_win', 'draw', 'away_win', 'over_2_5', 'under_2_5', 'btts_yes', 'btts_no']
+        with self.transaction() as cursor:
+            season_of = _match_seasons(cursor, [o['match_id'] for o in odds])
+            # Identical prices are left alone, so updated_at is the time of the last price change
+            _save_by_season(cursor, 'odds', f"""
+                INSERT INTO odds (match_id, bookmaker, home_win, draw, away_win, over_2_5, under_2_5, btts_yes, btts_no)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (match_id, bookmaker) DO UPDATE SET
+                    home_win = excluded.home_win, draw = excluded.draw, away_win = excluded.away_win,
+                    over_2_5 = excluded.over_2_5, under_2_5 = excluded.under_2_5,
+                    btts_yes = excluded.btts_yes, btts_no = excluded.btts_no,
+                    updated_at = CURRENT_TIMESTAMP
+                {_unchanged_guard(columns)}
+            """, [(
+                o['match_id'],
+                o['bookmaker'],
+                o['home_win'],
+                o['draw'],
+                o['away_win'],
+                o.get('over_2_5'),
+                o.get('under_2_5'),
+                o.get('btts_yes'),
+                o.get('btts_no')
+            ) for o in odds], [season_of.get(o['match_id'], 'unknown') for o in odds])
+            link_keys(cursor, written_only=True)
 
     def save_match_stats(self, match_data: Dict[str, Any], home_stats: Dict[str, Any], away_stats: Dict[str, Any]):
         """
@@ -201,69 +742,24 @@ class Database:
         match_data: {id, date, home_team, away_team, home_score, away_score, season}
         stats: {team, xg, shots, shots_on_target, corners, possession}
         """
-        self.connect()
-        try:
-            # Save Match
-            self.cursor.execute("""
-                INSERT OR REPLACE INTO matches (id, date, home_team, away_team, home_score, away_score, season)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (
-                match_data['id'],
-                match_data['date'],
-                match_data['home_team'],
-                match_data['away_team'],
-                match_data['home_score'],
-                match_data['away_score'],
-                match_data['season']
-            ))
-            
-            # Save Home Stats
-            self.cursor.execute("""
-                INSERT INTO team_stats (match_id, team, xg, shots, shots_on_target, corners, possession)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (
-                match_data['id'],
-                home_stats['team'],
-                home_stats['xg'],
-                home_stats['shots'],
-                home_stats['shots_on_target'],
-                home_stats['corners'],
-                home_stats['possession']
-            ))
-            
-            # Save Away Stats
-            self.cursor.execute("""
-                INSERT INTO team_stats (match_id, team, xg, shots, shots_on_target, corners, possession)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (
-                match_data['id'],
-                away_stats['team'],
-                away_stats['xg'],
-                away_stats['shots'],
-                away_stats['shots_on_target'],
-                away_stats['corners'],
-                away_stats['possession']
-            ))
-            
-            self.conn.commit()
-        finally:
-            self.close()
+        with self.transaction():
+            self.save_matches_bulk([match_data])
+            self.save_team_stats_bulk([
+                {**home_stats, 'match_id': match_data['id']},
+                {**away_stats, 'match_id': match_data['id']}
+            ])
 
     def save_odds(self, match_id: str, bookmaker: str, home: float, draw: float, away: float, 
                   over_2_5: float = None, under_2_5: float = None, btts_yes: float = None, btts_no: float = None):
         """Saves historical odds for a match."""
-        self.connect()
-        try:
-            # Check if columns exist (migration hack for sqlite)
-            # For now, we might need to drop/recreate table or alter it if it exists.
-            # Since this is dev, let's just use INSERT and assume table is updated or we recreate it.
-            # Actually, to be safe, I should probably handle the schema update.
-            # But for simplicity in this agent flow, I will assume I can recreate the db or table.
-            
-            self.cursor.execute("""
-                INSERT INTO odds (match_id, bookmaker, home_win, draw, away_win, over_2_5, under_2_5, btts_yes, btts_no)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (match_id, bookmaker, home, draw, away, over_2_5, under_2_5, btts_yes, btts_no))
-            self.conn.commit()
-        finally:
-            self.close()
+        self.save_odds_bulk([{
+            'match_id': match_id,
+            'bookmaker': bookmaker,
+            'home_win': home,
+            'draw': draw,
+            'away_win': away,
+            'over_2_5': over_2_5,
+            'under_2_5': under_2_5,
+            'btts_yes': btts_yes,
+            'btts_no': btts_no
+        }])
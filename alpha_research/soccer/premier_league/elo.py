@@ -0,0 +1,161 @@
+import pandas as pd
+import numpy as np
+import logging
+from typing import Dict, Any, Tuple
+from .models import PoissonModel, EWMState
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+INITIAL_RATING = 1500.0
+ELO_K = 20.0
+ELO_HOME_ADVANTAGE = 60.0
+
+# Goal supremacy per rating point before any matches are seen (~0.4 goals for the home advantage)
+DEFAULT_GOALS_PER_POINT = 0.4 / ELO_HOME_ADVANTAGE
+MIN_XG = 0.05
+
+
+def expected_score(rating_diff):
+    """Elo expected score (win = 1, draw = 0.5) for a rating difference including home advantage."""
+    return 1.0 / (1.0 + 10.0 ** (-np.asarray(rating_diff, dtype=float) / 400.0))
+
+
+def goal_multiplier(goal_diff: float) -> float:
+    """World Football Elo K multiplier: 1 for a one-goal margin, 1.5 for two, (11 + n) / 8 for n >= 3."""
+    # Scalar arithmetic: this runs once per match on the hot path
+    margin = abs(goal_diff)
+    return 1.0 if margin <= 1 else 1.5 if margin == 2 else (11.0 + margin) / 8.0
+
+
+def rating_change(diff: float, goal_diff: float, k: float) -> float:
+    """Points moved from the away to the home team after a match with the given pre-match difference."""
+    result = 1.0 if goal_diff > 0 else 0.5 if goal_diff == 0 else 0.0
+    return k * goal_multiplier(goal_diff) * (result - 1.0 / (1.0 + 10.0 ** (-diff / 400.0)))
+
+
+class EloRatings:
+    """Team ratings under the Elo update rule, shared by EloModel and elo_ratings_before."""
+
+    def __init__(self, k: float = ELO_K, home_advantage: float = ELO_HOME_ADVANTAGE,
+                 initial_rating: float = INITIAL_RATING):
+        self.k = k
+        self.home_advantage = home_advantage
+        self.initial_rating = initial_rating
+        self.ratings: Dict[str, float] = {}
+
+    def get(self, team: str) -> float:
+        return self.ratings.get(team, self.initial_rating)
+
+    def update(self, home_team: str, away_team: str, home_score: float, away_score: float) -> Tuple[float, float]:
+        """Applies one played match in O(1); returns the (home, away) ratings entering it."""
+        rh = self.get(home_team)
+        ra = self.get(away_team)
+        delta = rating_change(rh + self.home_advantage - ra, home_score - away_score, self.k)
+        self.ratings[home_team] = rh + delta
+        self.ratings[away_team] = ra - delta
+        return rh, ra
+
+
+def elo_ratings_before(matches: pd.DataFrame, k: float = ELO_K, home_advantage: float = ELO_HOME_ADVANTAGE,
+                       initial_rating: float = INITIAL_RATING) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pre-match (home, away) ratings for matches in date order, in one O(n) pass.
+    Used as MLModel features; unplayed matches (NaN scores) don't move the ratings.
+    """
+    elo = EloRatings(k, home_advantage, initial_rating)
+    home_before = np.empty(len(matches))
+    away_before = np.empty(len(matches))
+    for i, (home, away, hs, aws) in enumerate(zip(matches['home_team'].values, matches['away_team'].values,
+                                                  matches['home_score'].values, matches['away_score'].values)):
+        if pd.isna(hs) or pd.isna(aws):
+            home_before[i] = elo.get(home)
+            away_before[i] = elo.get(away)
+            continue
+        home_before[i], away_before[i] = elo.update(home, away, hs, aws)
+    return home_before, away_before
+
+
+class EloModel(PoissonModel):
+    """
+    Incremental Elo ratings as a cheap baseline: O(1) per match, with home advantage
+    and goal-difference scaled K.
+
+    Predictions go through expected goals so the model produces the same outputs as
+    PoissonModel (1X2, O/U 2.5, BTTS): the rating difference sets the goal supremacy
+    (goals per rating point fitted online by an EWM regression of goal difference on
+    rating difference) around the league's EWM goal total. Supremacy is capped so
+    neither side drops below MIN_XG, which keeps the total at the league's.
+    """
+
+    def __init__(self, k: float = ELO_K, home_advantage: float = ELO_HOME_ADVANTAGE,
+                 initial_rating: float = INITIAL_RATING, supremacy_span: int = 200, **kwargs):
+        self.k = k
+        self.home_advantage = home_advantage
+        self.initial_rating = initial_rating
+        self.supremacy_span = supremacy_span
+        super().__init__(**kwargs)
+
+    @property
+    def params(self) -> Dict[str, Any]:
+        return {**super().params, 'k': self.k, 'home_advantage': self.home_advantage,
+                'initial_rating': self.initial_rating, 'supremacy_span': self.supremacy_span}
+
+    def reset(self):
+        super().reset()
+        self.elo = EloRatings(self.k, self.home_advantage, self.initial_rating)
+        # EWM moments for the supremacy regression (through the origin)
+        self.supremacy_xy = EWMState(self.supremacy_span)
+        self.supremacy_xx = EWMState(self.supremacy_span)
+
+    @property
+    def ratings(self) -> Dict[str, float]:
+        return self.elo.ratings
+
+    def _update(self, home_team: str, away_team: str, home_score: float, away_score: float):
+        super()._update(home_team, away_team, home_score, away_score)
+        rh, ra = self.elo.update(home_team, away_team, home_score, away_score)
+        diff = rh + self.home_advantage - ra
+        self.supremacy_xy.update((home_score - away_score) * diff)
+        self.supremacy_xx.update(diff * diff)
+
+    @property
+    def goals_per_point(self) -> float:
+        xx = self.supremacy_xx.mean
+        return self.supremacy_xy.mean / xx if xx > 0 else DEFAULT_GOALS_PER_POINT
+
+    def expected_goals_batch(self, home_teams, away_teams) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        teams = list(self.team_state)
+        index = {team: i for i, team in enumerate(teams)}
+        home_idx = np.array([index.get(t, -1) for t in home_teams], dtype=np.int64)
+        away_idx = np.array([index.get(t, -1) for t in away_teams], dtype=np.int64)
+        valid = (home_idx >= 0) & (away_idx >= 0)
+        if not teams:
+            nan = np.full(len(home_idx), np.nan)
+            return nan, nan.copy(), valid
+
+        ratings = np.array([self.elo.get(t) for t in teams])
+        diff = ratings[home_idx] + self.home_advantage - ratings[away_idx]
+        total = self.league_avg_home_goals + self.league_avg_away_goals
+        # Clipping one side at MIN_XG would inflate the total instead; cap the supremacy
+        limit = max(total - 2 * MIN_XG, 0.0)
+        supremacy = np.clip(self.goals_per_point * diff, -limit, limit)
+
+        home_xg = np.where(valid, np.maximum((total + supremacy) / 2, MIN_XG), np.nan)
+        away_xg = np.where(valid, np.maximum((total - supremacy) / 2, MIN_XG), np.nan)
+        return home_xg, away_xg, valid
+
+    def win_probability(self, home_team: str, away_team: str) -> float:
+        """Plain Elo expected score of the home team (draws count half)."""
+        return float(expected_score(self.elo.get(home_team) + self.home_advantage - self.elo.get(away_team)))
+
+
+if __name__ == "__main__":
+    model = EloModel()
+    model.train()
+    top = sorted(model.ratings.items(), key=lambda item: item[1], reverse=True)[:5]
+    for team, rating in top:
+        print(f"{team:<20} {rating:7.1f}")
+    prediction = model.predict_match("Manchester City", "Arsenal")
+    if prediction:
+        print(f"Man City vs Arsenal: H {prediction['home_win']:.2%} D {prediction['draw']:.2%} A {prediction['away_win']:.2%}")
@@ -0,0 +1,61 @@
+import pandas as pd
+import hashlib
+import logging
+from pathlib import Path
+from typing import Optional
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+FEATURE_DIR = Path(__file__).parent / "data" / "features"
+
+class FeatureStore:
+    """
+    Parquet cache for derived feature tables.
+    Entries are keyed by a fingerprint of the source tables (and a feature version),
+    so a cached table is reused until the underlying data or feature code changes.
+    """
+
+    def __init__(self, root: Path = FEATURE_DIR):
+        self.root = Path(root)
+
+    @staticmethod
+    def fingerprint(*frames: pd.DataFrame, version: str = "") -> str:
+        """Content hash of the given DataFrames (values and column names) plus a version tag."""
+        digest = hashlib.sha256(version.encode())
+        for frame in frames:
+            digest.update(",".join(map(str, frame.columns)).encode())
+            digest.update(str(len(frame)).encode())
+            if not frame.empty:
+                digest.update(pd.util.hash_pandas_object(frame, index=False).values.tobytes())
+        return digest.hexdigest()[:16]
+
+    def path(self, name: str, fingerprint: str) -> Path:
+        return self.root / f"{name}_{fingerprint}.parquet"
+
+    def load(self, name: str, fingerprint: str) -> Optional[pd.DataFrame]:
+        path = self.path(name, fingerprint)
+        if not path.exists():
+            return None
+        try:
+            df = pd.read_parquet(path)
+        except ImportError:
+            logger.warning("Parquet support (pyarrow) not installed; feature cache disabled.")
+            return None
+        logger.info(f"Loaded cached features from {path.name}")
+        return df
+
+    def save(self, name: str, fingerprint: str, df: pd.DataFrame):
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.path(name, fingerprint)
+        try:
+            df.to_parquet(path, index=False)
+        except ImportError:
+            logger.warning("Parquet support (pyarrow) not installed; feature cache disabled.")
+            return
+
+        # Drop stale entries for the same table
+        for old in self.root.glob(f"{name}_*.parquet"):
+            if old != path:
+                old.unlink()
+        logger.info(f"Cached features to {path.name}")
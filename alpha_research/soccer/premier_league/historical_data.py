@@ -1,104 +1,183 @@
 import soccerdata as sd
 import pandas as pd
+import numpy as np
 import logging
 import time
 from pathlib import Path
+from typing import Dict, List, Tuple, Union
 from .database import Database
+from .teams import DEFAULT_LEAGUE, canonical_team
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# soccerdata page cache (raw FBref HTML); a re-run with a warm cache makes no requests
+FBREF_CACHE_DIR = Path(__file__).parent / "data" / "fbref_cache"
+
+# "H–A" (en-dash) or "H-A"; anything else (postponed, abandoned) is skipped
+SCORE_PATTERN = r'^\s*(\d+)\s*[–-]\s*(\d+)'
+
+# FBref team match stat table -> {flattened column: team_stats column}
+TEAM_STAT_COLUMNS = {
+    'shooting': {'Standard_Sh': 'shots', 'Standard_SoT': 'shots_on_target'},
+    'passing_types': {'Pass Types_CK': 'corners'},
+    'possession': {'Poss': 'possession'}
+}
+TEAM_STAT_FIELDS = ['xg', 'shots', 'shots_on_target', 'corners', 'possession']
+
+def _flatten(df: pd.DataFrame) -> pd.DataFrame:
+    """Index to columns, ('Standard', 'Sh') -> 'Standard_Sh' (same as player_stats_collector)."""
+    df = df.reset_index()
+    df.columns = ['_'.join(col).strip('_') if isinstance(col, tuple) else col for col in df.columns.values]
+    return df
+
+def _match_ids(dates: pd.Series, home: pd.Series, away: pd.Series) -> pd.Series:
+    """Vectorized teams.make_match_id for already canonical names."""
+    return (pd.to_datetime(dates).dt.strftime('%Y-%m-%d') + '_' + home + '_' + away).str.replace(' ', '', regex=False)
+
+def _canonical(names: pd.Series) -> pd.Series:
+    """canonical_team over a column, resolving each distinct name once."""
+    mapping = {name: canonical_team(name) for name in pd.unique(names.dropna())}
+    return names.map(mapping)
+
 class HistoricalDataCollector:
-    def __init__(self, seasons: list = ['2324']):
-        self.seasons = seasons
-        self.db = Database()
-        # Initialize FBref scraper
-        logger.info(f"Initializing FBref scraper for seasons: {seasons}")
-        self.fbref = sd.FBref(leagues=['ENG-Premier League'], seasons=seasons)
-
-    def fetch_and_save_season_data(self):
-        """Fetches match schedule and stats, then saves to DB."""
+    """
+    Imports FBref results and team match stats (xG, shots, corners, possession) for
+    several seasons and leagues. Seasons are fetched and parsed one at a time (a single
+    scraper keeps the combined FBref request rate at soccerdata's per-scraper limit) from
+    the page cache in cache_dir; parsing is vectorized and every season is written in one
+    bulk transaction.
+    """
+
+    def __init__(self, seasons: Union[str, List[str]] = None, leagues: Union[str, List[str]] = DEFAULT_LEAGUE,
+                 cache_dir: Path = FBREF_CACHE_DIR, force_cache: bool = False, db=None):
+        seasons = ['2324'] if seasons is None else seasons
+        self.seasons = [seasons] if isinstance(seasons, str) else list(seasons)
+        self.leagues = [leagues] if isinstance(leagues, str) else list(leagues)
+        self.cache_dir = Path(cache_dir)
+        # soccerdata always reads completed seasons from the cache and re-downloads only the
+        # season still in progress, so the default picks up newly played matches; pass True
+        # to read the current season from the cache as well (offline re-runs)
+        self.force_cache = force_cache
+        self.db = db or Database()
+
+    @staticmethod
+    def parse_schedule(schedule: pd.DataFrame) -> pd.DataFrame:
+        """
+        Vectorized conversion of an FBref schedule into matches rows (completed matches only),
+        with the schedule's xG kept as home_xg / away_xg.
+        """
+        columns = ['id', 'date', 'home_team', 'away_team', 'home_score', 'away_score', 'season', 'league',
+                   'home_xg', 'away_xg']
+        if schedule.empty or 'score' not in schedule.columns:
+            logger.warning("No 'score' column found in schedule.")
+            return pd.DataFrame(columns=columns)
+
+        df = _flatten(schedule)
+        df = df[df['score'].notna() & df['date'].notna()]
+        scores = df['score'].astype(str).str.extract(SCORE_PATTERN)
+        parsed = scores.notna().all(axis=1)
+        if (~parsed).any():
+            logger.warning(f"Could not parse {int((~parsed).sum())} scores: {df.loc[~parsed, 'score'].unique()[:5].tolist()}")
+        df = df[parsed]
+        scores = scores[parsed].astype(int)
+
+        home = _canonical(df['home_team']).astype(str)
+        away = _canonical(df['away_team']).astype(str)
+        matches = pd.DataFrame({
+            'id': _match_ids(df['date'], home, away),
+            'date': pd.to_datetime(df['date']).dt.strftime('%Y-%m-%d %H:%M:%S'),
+            'home_team': home,
+            'away_team': away,
+            'home_score': scores[0],
+            'away_score': scores[1],
+            'season': df['season'].astype(str),
+            'league': df['league'].astype(str),
+            'home_xg': pd.to_numeric(df['home_xg'], errors='coerce') if 'home_xg' in df.columns else np.nan,
+            'away_xg': pd.to_numeric(df['away_xg'], errors='coerce') if 'away_xg' in df.columns else np.nan
+        })
+        return matches.drop_duplicates('id', keep='last')[columns]
+
+    @staticmethod
+    def parse_team_stats(matches: pd.DataFrame, tables: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+        """
+        team_stats rows (one per match and team) from parsed matches and FBref team match
+        stat tables keyed by stat type. Team rows are matched to fixtures by date, team,
+        opponent and venue; stats that are unavailable stay NULL.
+        """
+        stats = pd.concat([
+            pd.DataFrame({'match_id': matches['id'], 'team': matches['home_team'], 'xg': matches['home_xg']}),
+            pd.DataFrame({'match_id': matches['id'], 'team': matches['away_team'], 'xg': matches['away_xg']})
+        ], ignore_index=True)
+
+        for stat_type, columns in TEAM_STAT_COLUMNS.items():
+            df = tables.get(stat_type)
+            present = {src: dst for src, dst in columns.items() if df is not None and src in df.columns}
+            if not present:
+                for dst in columns.values():
+                    stats[dst] = np.nan
+                continue
+
+            team = _canonical(df['team']).astype(str)
+            opponent = _canonical(df['opponent']).astype(str)
+            home = df['venue'].eq('Home')
+            values = df[list(present)].rename(columns=present).apply(pd.to_numeric, errors='coerce')
+            values['match_id'] = _match_ids(df['date'], team.where(home, opponent), opponent.where(home, team))
+            values['team'] = team
+            values = values.drop_duplicates(['match_id', 'team'], keep='last')
+            stats = stats.merge(values, on=['match_id', 'team'], how='left')
+            for dst in set(columns.values()) - set(present.values()):
+                stats[dst] = np.nan
+
+        return stats[['match_id', 'team'] + TEAM_STAT_FIELDS]
+
+    def fetch_season(self, season: str, refresh: bool = False) -> Dict[str, pd.DataFrame]:
+        """Reads one season's schedule and team stat tables (from the page cache where possible)."""
+        force_cache = self.force_cache and not refresh
+        fbref = sd.FBref(leagues=self.leagues, seasons=season, data_dir=self.cache_dir)
+        started = time.time()
+        tables = {'schedule': fbref.read_schedule(force_cache=force_cache)}
+        for stat_type in TEAM_STAT_COLUMNS:
+            try:
+                tables[stat_type] = _flatten(fbref.read_team_match_stats(stat_type=stat_type, force_cache=force_cache))
+            except Exception as e:
+                logger.warning(f"{season}: no '{stat_type}' team stats ({e})")
+        logger.info(f"Fetched {season} in {time.time() - started:.1f}s")
+        return tables
+
+    def parse_season(self, season: str, tables: Dict[str, pd.DataFrame]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """(matches, team_stats) rows for one fetched season."""
+        matches = self.parse_schedule(tables['schedule'])
+        logger.info(f"{season}: found {len(matches)} completed matches.")
+        return matches, self.parse_team_stats(matches, tables)
+
+    def fetch_and_save_season_data(self, refresh: bool = False) -> int:
+        """
+        Fetches and parses the seasons serially (FBref blocks clients that go much above
+        ~10 requests/min, and parsing is a small fraction of a season's fetch time, so there
+        is nothing worth overlapping) and writes all matches and team stats in one transaction.
+        Returns the number of matches saved.
+        """
         try:
-            logger.info("Fetching match schedule...")
-            schedule = self.fbref.read_schedule()
-            
-            # Filter for completed matches
-            # Check if 'score' exists and is not null
-            if 'score' in schedule.columns:
-                completed_matches = schedule[schedule['score'].notna()]
-            else:
-                logger.warning("No 'score' column found in schedule.")
-                return
-                
-            logger.info(f"Found {len(completed_matches)} completed matches.")
-            
-            # We iterate through the schedule to save matches
-            for idx, row in completed_matches.iterrows():
-                # idx is usually (league, season, game_id)
-                league, season, game_id = idx
-                
-                date = row['date']
-                home_team = row['home_team']
-                away_team = row['away_team']
-                
-                # Parse score "H-A"
-                score = row['score']
-                try:
-                    home_score, away_score = map(int, str(score).split('–')) # Note: might be en-dash or hyphen
-                except ValueError:
-                    try:
-                        home_score, away_score = map(int, str(score).split('-'))
-                    except ValueError:
-                        logger.warning(f"Could not parse score: {score} for {home_team} vs {away_team}")
-                        continue
-                
-                match_id = f"{date.strftime('%Y-%m-%d')}_{home_team}_{away_team}".replace(" ", "")
-                
-                match_data = {
-                    'id': match_id,
-                    'date': date.to_pydatetime() if hasattr(date, 'to_pydatetime') else date,
-                    'home_team': str(home_team),
-                    'away_team': str(away_team),
-                    'home_score': int(home_score),
-                    'away_score': int(away_score),
-                    'season': str(season)
-                }
-                
-                # Extract stats
-                home_xg = row.get('home_xg', 0.0)
-                away_xg = row.get('away_xg', 0.0)
-                
-                # Handle NaN xG
-                if pd.isna(home_xg): home_xg = 0.0
-                if pd.isna(away_xg): away_xg = 0.0
-                
-                # Construct stats objects (simplified for now)
-                home_stats = {
-                    'team': str(home_team),
-                    'xg': float(home_xg),
-                    'shots': 0, # Need deeper scrape for this
-                    'shots_on_target': 0,
-                    'corners': 0,
-                    'possession': 0.0
-                }
-                
-                away_stats = {
-                    'team': str(away_team),
-                    'xg': float(away_xg),
-                    'shots': 0,
-                    'shots_on_target': 0,
-                    'corners': 0,
-                    'possession': 0.0
-                }
-                
-                self.db.save_match_stats(match_data, home_stats, away_stats)
-                
-            logger.info("Historical data import complete.")
-            
+            parsed = [self.parse_season(season, self.fetch_season(season, refresh=refresh))
+                      for season in self.seasons]
+
+            matches = pd.concat([m for m, _ in parsed], ignore_index=True)
+            team_stats = pd.concat([t for _, t in parsed], ignore_index=True)
+            # NaN -> None so SQLite stores NULL
+            team_stats = team_stats.astype(object).where(team_stats.notna(), None)
+
+            with self.db.transaction():
+                self.db.save_matches_bulk(matches.drop(columns=['home_xg', 'away_xg']).to_dict('records'))
+                self.db.save_team_stats_bulk(team_stats.to_dict('records'))
+            logger.info(f"Historical data import complete ({len(matches)} matches).")
+            return len(matches)
+
         except Exception as e:
             logger.error(f"Error fetching historical data: {e}")
             import traceback
             traceback.print_exc()
+            return 0
 
 if __name__ == "__main__":
     # Fetch last season (2023-2024)
@@ -0,0 +1,194 @@
+import pandas as pd
+import numpy as np
+import logging
+from typing import Callable, Dict, Sequence
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Mutually exclusive outcome groups in the odds table
+MARKET_GROUPS = {
+    '1x2': ['home_win', 'draw', 'away_win'],
+    'ou_2_5': ['over_2_5', 'under_2_5'],
+    'btts': ['btts_yes', 'btts_no']
+}
+
+# football-data pseudo-bookmakers (best / mean price across books); left out of the consensus
+AGGREGATE_BOOKMAKERS = ('Max', 'Average')
+
+_BISECTION_STEPS = 60
+
+
+def _prepare(odds) -> tuple:
+    """(raw implied probabilities, booksum, valid rows) for an (n, k) odds array."""
+    odds = np.atleast_2d(np.asarray(odds, dtype=float))
+    valid = np.all(np.isfinite(odds) & (odds > 1.0), axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        raw = np.where(valid[:, None], 1.0 / odds, np.nan)
+    return raw, raw.sum(axis=1), valid
+
+
+def overround(odds) -> np.ndarray:
+    """Bookmaker margin per row: sum(1 / odds) - 1."""
+    _, booksum, _ = _prepare(odds)
+    return booksum - 1.0
+
+
+def multiplicative(odds) -> np.ndarray:
+    """Normalizes 1/odds to sum to 1 (the margin is spread in proportion to each probability)."""
+    raw, booksum, _ = _prepare(odds)
+    return raw / booksum[:, None]
+
+
+def additive(odds) -> np.ndarray:
+    """Subtracts an equal share of the margin from every outcome (clipped at 0 and renormalized)."""
+    raw, booksum, _ = _prepare(odds)
+    probs = np.clip(raw - (booksum[:, None] - 1.0) / raw.shape[1], 0.0, None)
+    return probs / probs.sum(axis=1, keepdims=True)
+
+
+def _bisect(total: Callable[[np.ndarray], np.ndarray], lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    """Row-wise root of total(x) = 1 for a total that decreases in x, by vectorized bisection."""
+    for _ in range(_BISECTION_STEPS):
+        mid = (lo + hi) / 2
+        above = total(mid) > 1.0
+        lo = np.where(above, mid, lo)
+        hi = np.where(above, hi, mid)
+    return (lo + hi) / 2
+
+
+def shin(odds) -> np.ndarray:
+    """
+    Shin (1993) probabilities: the margin is attributed to insider trading with
+    share z, solved per row so the probabilities sum to 1:
+        p_i = (sqrt(z^2 + 4 (1 - z) pi_i^2 / B) - z) / (2 (1 - z)),  pi_i = 1/odds_i, B = sum(pi)
+    The favourite-longshot bias this implies shifts more of the margin onto longshots.
+    """
+    raw, booksum, valid = _prepare(odds)
+    raw = np.where(valid[:, None], raw, 0.5)
+    booksum = np.where(valid, booksum, 1.0)
+
+    def probabilities(z: np.ndarray) -> np.ndarray:
+        z = z[:, None]
+        return (np.sqrt(z ** 2 + 4 * (1 - z) * raw ** 2 / booksum[:, None]) - z) / (2 * (1 - z))
+
+    n = len(raw)
+    z = _bisect(lambda z: probabilities(z).sum(axis=1), np.zeros(n), np.full(n, 0.999))
+    probs = probabilities(z)
+    return np.where(valid[:, None], probs / probs.sum(axis=1, keepdims=True), np.nan)
+
+
+def power(odds) -> np.ndarray:
+    """Raises 1/odds to the power k >= 1 that makes them sum to 1 (solved per row)."""
+    raw, _, valid = _prepare(odds)
+    raw = np.where(valid[:, None], raw, 0.5)
+    n = len(raw)
+    k = _bisect(lambda k: (raw ** k[:, None]).sum(axis=1), np.ones(n), np.full(n, 50.0))
+    probs = raw ** k[:, None]
+    return np.where(valid[:, None], probs / probs.sum(axis=1, keepdims=True), np.nan)
+
+
+METHODS: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    'multiplicative': multiplicative,
+    'additive': additive,
+    'shin': shin,
+    'power': power
+}
+
+
+def fair_probabilities(odds, method: str = 'multiplicative') -> np.ndarray:
+    """
+    Margin-free probabilities for an (n, k) array of decimal odds covering one market's
+    mutually exclusive outcomes. Rows with missing or invalid (<= 1) odds are NaN.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown de-vig method: {method} (expected one of {list(METHODS)})")
+    return METHODS[method](odds)
+
+
+def add_fair_columns(df: pd.DataFrame, groups: Dict[str, Sequence[str]] = None, method: str = 'multiplicative',
+                     prefix: str = 'fair_') -> pd.DataFrame:
+    """
+    Adds prefix + column fair-probability columns, and overround_<group>, for every
+    market group whose odds columns are all present (one array pass per group).
+    """
+    groups = MARKET_GROUPS if groups is None else groups
+    df = df.copy()
+    for group, columns in groups.items():
+        columns = list(columns)
+        if not set(columns) <= set(df.columns):
+            continue
+        odds = df[columns].to_numpy(dtype=float)
+        df[[prefix + c for c in columns]] = fair_probabilities(odds, method)
+        df[f"overround_{group}"] = overround(odds)
+    return df
+
+
+def fair_matrix(df: pd.DataFrame, groups: Dict[str, Sequence[str]], method: str = 'multiplicative',
+                prefix: str = 'fair_') -> np.ndarray:
+    """
+    Fair probabilities for the groups' odds columns, in column order. Reads the columns
+    precomputed by add_fair_columns when present and de-vigs the odds otherwise.
+    """
+    blocks = []
+    for columns in groups.values():
+        fair = [prefix + c for c in columns]
+        if set(fair) <= set(df.columns):
+            blocks.append(df[fair].to_numpy(dtype=float))
+        else:
+            blocks.append(fair_probabilities(df[list(columns)].to_numpy(dtype=float), method))
+    return np.hstack(blocks)
+
+
+def consensus(odds: pd.DataFrame, method: str = 'power', weights: Dict[str, float] = None,
+              exclude: Sequence[str] = AGGREGATE_BOOKMAKERS, groups: Dict[str, Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Multi-bookmaker consensus from an odds table with one row per (match_id, bookmaker):
+    each bookmaker's prices are de-vigged, then averaged per match (optionally weighted by
+    bookmaker, e.g. {'Pinnacle': 2.0}) and renormalized. Bookmakers missing a market are
+    skipped for that market.
+
+    Returns one row per match_id with, for each odds column c: fair_c (consensus
+    probability), consensus_c (its fair price, 1 / fair_c) and best_c (highest price
+    offered), plus n_bookmakers.
+    """
+    groups = MARKET_GROUPS if groups is None else groups
+    odds = odds[~odds['bookmaker'].isin(exclude)]
+    weight = odds['bookmaker'].map(weights or {}).fillna(1.0).to_numpy() if weights else np.ones(len(odds))
+    codes, match_ids = pd.factorize(odds['match_id'])
+
+    result = pd.DataFrame({'match_id': match_ids})
+    result['n_bookmakers'] = np.bincount(codes, minlength=len(match_ids))
+    for columns in groups.values():
+        columns = list(columns)
+        if not set(columns) <= set(odds.columns):
+            continue
+        prices = odds[columns].to_numpy(dtype=float)
+        fair = fair_probabilities(prices, method)
+        present = np.isfinite(fair).all(axis=1)
+        w = np.where(present, weight, 0.0)
+
+        # Weighted mean per match with bincount (one pass, no groupby)
+        totals = np.bincount(codes, weights=w, minlength=len(match_ids))
+        mean = np.column_stack([
+            np.bincount(codes, weights=np.where(present, fair[:, j], 0.0) * w, minlength=len(match_ids))
+            for j in range(len(columns))
+        ])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = mean / totals[:, None]
+            mean = mean / mean.sum(axis=1, keepdims=True)
+
+        best = pd.DataFrame(prices, columns=columns).groupby(codes).max().reindex(range(len(match_ids)))
+        for j, column in enumerate(columns):
+            result[f"fair_{column}"] = mean[:, j]
+            with np.errstate(divide='ignore'):
+                result[f"consensus_{column}"] = 1.0 / mean[:, j]
+            result[f"best_{column}"] = best[column].to_numpy()
+    return result
+
+
+if __name__ == "__main__":
+    odds = np.array([[1.50, 4.20, 6.50], [2.60, 3.30, 2.80], [1.10, 9.00, 26.0]])
+    print(f"Overround: {np.round(overround(odds), 4)}")
+    for name in METHODS:
+        print(f"{name:>15}: {np.round(fair_probabilities(odds, name), 4).tolist()}")
@@ -0,0 +1,104 @@
+import pandas as pd
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Any, Tuple
+from .database import Database, DB_PATH
+from .models import PoissonModel, DixonColesModel
+from .backtester import Backtester
+from .niche_backtester import NicheBacktester
+from .snapshot import AnalyticSnapshot
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+BACKTESTERS = {'1x2': Backtester, 'niche': NicheBacktester}
+
+
+def _train_league(job: Tuple[type, str, Path, Any, Dict[str, Any]]) -> Tuple[str, PoissonModel]:
+    """Process pool task: trains one league's model against its own connection."""
+    model_cls, league, db_path, max_date, model_kwargs = job
+    logging.getLogger().setLevel(logging.WARNING)
+    model = model_cls(db=Database(db_path=db_path), league=league, **model_kwargs)
+    model.train(max_date)
+    model.db.close(force=True)
+    return league, model
+
+
+def _backtest_league(job: Tuple[str, str, Path, Dict[str, Any]]) -> pd.DataFrame:
+    """Process pool task: runs one league's backtest and tags its bets with the league."""
+    kind, league, db_path, kwargs = job
+    logging.getLogger().setLevel(logging.WARNING)
+    backtester = BACKTESTERS[kind](db=Database(db_path=db_path), league=league, **kwargs)
+    history = backtester.run()
+    backtester.db.close(force=True)
+    if len(history) == 0:
+        return pd.DataFrame()
+    return history.assign(league=league)
+
+
+def _resolve(leagues: List[str], db_path: Path) -> List[str]:
+    with Database(db_path=db_path) as db:
+        if leagues is None:
+            leagues = db.leagues()
+        # Brought up to date once here, so the workers only read the snapshot
+        AnalyticSnapshot(db=db).refresh()
+    return list(leagues)
+
+
+def train_league_models(leagues: List[str] = None, model_cls: type = DixonColesModel, max_date=None,
+                        max_workers: int = None, db_path: Path = DB_PATH,
+                        **model_kwargs) -> Dict[str, PoissonModel]:
+    """
+    Trains one model per league (default: every league in the database) across a process pool.
+    Each worker reads only its league's partition; the trained models are returned keyed by league.
+    """
+    leagues = _resolve(leagues, db_path)
+    jobs = [(model_cls, league, Path(db_path), max_date, model_kwargs) for league in leagues]
+
+    started = time.time()
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        models = dict(pool.map(_train_league, jobs))
+    logger.info(f"Trained {len(models)} league models in {time.time() - started:.1f}s")
+    return models
+
+
+def predict_leagues(models: Dict[str, PoissonModel], fixtures: pd.DataFrame) -> pd.DataFrame:
+    """
+    predict_batch across leagues: fixtures need home_team, away_team and league columns,
+    and each league's fixtures are predicted by that league's model (NaN if it has none).
+    """
+    preds = []
+    for league, group in fixtures.groupby('league', sort=False):
+        model = models.get(league)
+        if model is None:
+            logger.warning(f"No model for league {league}")
+            preds.append(pd.DataFrame(index=group.index))
+            continue
+        preds.append(model.predict_batch(group).set_index(group.index))
+    if not preds:
+        return pd.DataFrame()
+    return pd.concat(preds).reindex(fixtures.index).assign(league=fixtures['league'])
+
+
+def run_league_backtests(leagues: List[str] = None, backtester: str = '1x2', max_workers: int = None,
+                         db_path: Path = DB_PATH, **kwargs) -> pd.DataFrame:
+    """
+    Runs the same backtest (Backtester or NicheBacktester, with kwargs) for every league
+    in parallel and returns all bets in one table with a league column.
+    """
+    leagues = _resolve(leagues, db_path)
+    jobs = [(backtester, league, Path(db_path), kwargs) for league in leagues]
+
+    started = time.time()
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        histories = [h for h in pool.map(_backtest_league, jobs) if not h.empty]
+    logger.info(f"Backtested {len(leagues)} leagues in {time.time() - started:.1f}s")
+    return pd.concat(histories, ignore_index=True) if histories else pd.DataFrame()
+
+
+if __name__ == "__main__":
+    models = train_league_models()
+    for league, model in models.items():
+        print(f"{league}: {model.n_matches} matches, {len(model.team_state)} teams")
@@ -1,363 +1,323 @@
 import pandas as pd
 import numpy as np
 import xgboost as xgb
-from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, log_loss
 from .database import Database
+from .snapshot import AnalyticSnapshot, league_rows
+from .betting import BetEvaluator
+from .feature_store import FeatureStore
+from .elo import elo_ratings_before
+from .implied_probability import fair_probabilities
+from .profiling import timed
+import hashlib
+import json
 import logging
+import re
+from pathlib import Path
+from typing import Dict, List
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Bump when the feature definitions change to invalidate the feature store
+FEATURE_VERSION = "2"
+FORM_SPAN = 5
+
+MODEL_DIR = Path(__file__).parent / "data" / "models"
+# Training windows whose artifacts (model + DMatrix buffers) are kept in model_dir, most recently used first
+MAX_MODEL_WINDOWS = 64
+XGB_PARAMS = {
+    'max_depth': 4,
+    'eta': 0.1,
+    'objective': 'multi:softprob',
+    'num_class': 3,
+    'eval_metric': 'mlogloss'
+}
+
+def _ewm_before(series: pd.Series, keys: pd.Series, span: int = FORM_SPAN) -> pd.Series:
+    """EWM mean of each group's previous rows (shifted by one, so no lookahead)."""
+    return series.groupby(keys, sort=False).transform(lambda x: x.ewm(span=span).mean().shift(1))
+
+@timed()
+def build_match_features(matches: pd.DataFrame, ts_df: pd.DataFrame, ps_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Vectorized feature pipeline (one row per match, in date order):
+      - Team form: EWM (span 5) of xG, goals and points over the team's previous matches
+      - Player form: minutes-weighted average of the rolling form (entering that match)
+        of the players in the team's last lineup, found with an as-of join.
+      - Elo: both teams' ratings entering the match (see elo.EloModel)
+    """
+    matches = matches.copy()
+    matches['date'] = pd.to_datetime(matches['date'])
+    matches = matches.reset_index(drop=True)
+    
+    # Long format: one row per (match, team), home rows before away rows
+    n = len(matches)
+    long = pd.concat([
+        pd.DataFrame({'order': np.arange(n) * 2, 'match_id': matches['id'], 'date': matches['date'],
+                      'team': matches['home_team'], 'goals': matches['home_score'],
+                      'conceded': matches['away_score']}),
+        pd.DataFrame({'order': np.arange(n) * 2 + 1, 'match_id': matches['id'], 'date': matches['date'],
+                      'team': matches['away_team'], 'goals': matches['away_score'],
+                      'conceded': matches['home_score']})
+    ]).sort_values('order').reset_index(drop=True)
+    
+    long['points'] = np.select([long['goals'] > long['conceded'], long['goals'] == long['conceded']], [3, 1], 0)
+    
+    # Actual xG from team_stats (missing data counts as 0)
+    xg = ts_df.drop_duplicates(['match_id', 'team'], keep='last')
+    long = long.merge(xg, on=['match_id', 'team'], how='left')
+    long['xg'] = long['xg'].fillna(0.0)
+    
+    # 1. Team Form (no history -> 0)
+    first_match = long.groupby('team', sort=False).cumcount() == 0
+    for col, name in [('xg', 'roll_xg'), ('goals', 'roll_gls'), ('points', 'roll_pts')]:
+        long[name] = _ewm_before(long[col].astype(float), long['team']).mask(first_match, 0.0)
+    
+    # 2. Player Form (form of the players in the team's last lineup)
+    long['player_xg'] = 0.0
+    long['player_gls'] = 0.0
+    if not ps_df.empty:
+        ps = ps_df.copy()
+        ps['date'] = ps['match_id'].map(matches.set_index('id')['date'])
+        ps = ps.dropna(subset=['date']).sort_values('date', kind='stable')
+        ps['roll_xg'] = _ewm_before(ps['xg'].astype(float), ps['player']).fillna(0)
+        ps['roll_goals'] = _ewm_before(ps['goals'].astype(float), ps['player']).fillna(0)
+        
+        # Minutes-weighted lineup form per (match, team)
+        ps['w_xg'] = ps['roll_xg'] * ps['minutes']
+        ps['w_goals'] = ps['roll_goals'] * ps['minutes']
+        lineups = ps.groupby(['match_id', 'team'], sort=False)[['minutes', 'w_xg', 'w_goals']].sum()
+        total_min = lineups['minutes'].where(lineups['minutes'] > 0)
+        lineups['lineup_xg'] = (lineups['w_xg'] / total_min).fillna(0.0)
+        lineups['lineup_gls'] = (lineups['w_goals'] / total_min).fillna(0.0)
+        lineups = lineups[['lineup_xg', 'lineup_gls']].reset_index().rename(columns={'match_id': 'last_match_id'})
+        
+        # As-of join: each team's last match strictly before the current date
+        played = long[['date', 'team', 'match_id']].rename(columns={'match_id': 'last_match_id'}).sort_values('date', kind='stable')
+        current = long[['order', 'date', 'team']].sort_values('date', kind='stable')
+        asof = pd.merge_asof(current, played, on='date', by='team', allow_exact_matches=False)
+        asof = asof.merge(lineups, on=['last_match_id', 'team'], how='left').set_index('order')
+        
+        long['player_xg'] = asof['lineup_xg'].reindex(long['order']).fillna(0.0).to_numpy()
+        long['player_gls'] = asof['lineup_gls'].reindex(long['order']).fillna(0.0).to_numpy()
+    
+    home = long.iloc[0::2].reset_index(drop=True)
+    away = long.iloc[1::2].reset_index(drop=True)
+    home_elo, away_elo = elo_ratings_before(matches)
+    
+    features = pd.DataFrame({
+        'match_id': matches['id'],
+        'date': matches['date'],
+        'home_roll_xg': home['roll_xg'],
+        'home_roll_gls': home['roll_gls'],
+        'home_roll_pts': home['roll_pts'],
+        'home_player_xg': home['player_xg'],
+        'home_player_gls': home['player_gls'],
+        
+        'away_roll_xg': away['roll_xg'],
+        'away_roll_gls': away['roll_gls'],
+        'away_roll_pts': away['roll_pts'],
+        'away_player_xg': away['player_xg'],
+        'away_player_gls': away['player_gls'],
+        
+        'home_elo': home_elo,
+        'away_elo': away_elo,
+        'elo_diff': home_elo - away_elo,
+        
+        # 0: Draw, 1: Home Win, 2: Away Win (Mapping for XGBoost)
+        'target': np.select([matches['home_score'] > matches['away_score'],
+                             matches['away_score'] > matches['home_score']], [1, 2], 0)
+    })
+    return features
+
 class MLModel:
-    def __init__(self):
-        self.db = Database()
+    def __init__(self, nthread: int = None, model_dir: Path = MODEL_DIR, valid_fraction: float = 0.2,
+                 early_stopping_rounds: int = 20, num_boost_round: int = 500, min_boost_rounds: int = 10,
+                 max_windows: int = MAX_MODEL_WINDOWS, db: Database = None, league: str = None):
+        self.db = db or Database()
+        self.snapshot = AnalyticSnapshot(db=self.db)
+        # Only matches of this league are used (None = every league in the database)
+        self.league = league
         self.model = None
         self.feature_cols = []
-        
-    def prepare_features(self):
+        self.feature_store = FeatureStore()
+        self.features_fingerprint = None
+        # None = let XGBoost use all cores
+        self.nthread = nthread
+        self.model_dir = Path(model_dir)
+        self.valid_fraction = valid_fraction
+        self.early_stopping_rounds = early_stopping_rounds
+        self.num_boost_round = num_boost_round
+        # Floor on the refit's boosting rounds (early stopping can pick iteration 0 on a noisy fold)
+        self.min_boost_rounds = min_boost_rounds
+        self.max_windows = max_windows
+        
+    @timed()
+    def prepare_features(self, use_cache: bool = True) -> pd.DataFrame:
         """
         Loads data and generates features for ML training.
+        Features are computed *prior* to each match. Results are cached in the
+        Parquet feature store, keyed by a fingerprint of the source tables.
         """
         logger.info("Loading data for feature engineering...")
-        self.db.connect()
-        
-        # Load Matches
-        matches = pd.read_sql_query("""
-            SELECT id, date, home_team, away_team, home_score, away_score, season 
-            FROM matches 
-            ORDER BY date
-        """, self.db.conn)
-        
-        # Load Player Stats
-        # We might not check player stats if the collector isn't finished yet, 
-        # but let's assume valid data exists.
-        try:
-            player_stats = pd.read_sql_query("SELECT * FROM player_stats", self.db.conn)
-        except Exception:
-            logger.warning("player_stats table not found or empty. Using only team stats.")
-            player_stats = pd.DataFrame()
-            
-        self.db.close()
-        
-        matches['date'] = pd.to_datetime(matches['date'])
-        
-        # Feature Engineering DataFrame
-        # We need to compute features *prior* to each match.
         
-        df_features = []
+        # Load Matches from the Parquet snapshot (stats are restricted to the same league through match_no)
+        matches = self.snapshot.load('matches', nullable=False, columns=[
+            'id', 'match_no', 'date', 'home_team', 'away_team', 'home_score', 'away_score', 'season', 'league'])
+        matches = league_rows(matches, self.league).sort_values('date', kind='stable')
+        in_league = matches['match_no']
+        matches = matches.drop(columns=['match_no', 'league']).reset_index(drop=True)
+        
+        ts_df = self.snapshot.load('team_stats', nullable=False, columns=['match_no', 'match_id', 'team', 'xg'])
+        ts_df = ts_df[ts_df['match_no'].isin(in_league)].drop(columns='match_no').reset_index(drop=True)
+        
+        # We might not have player stats if the collector isn't finished yet
+        ps_df = self.snapshot.load('player_stats', nullable=False, columns=[
+            'match_no', 'match_id', 'team', 'player', 'minutes', 'goals', 'xg'])
+        ps_df = ps_df[ps_df['match_no'].isin(in_league)].drop(columns='match_no').reset_index(drop=True)
+        if ps_df.empty:
+            logger.warning("player_stats is empty. Using only team stats.")
+        else:
+            logger.info(f"Loaded {len(ps_df)} player stats rows.")
         
-        teams = pd.concat([matches['home_team'], matches['away_team']]).unique()
-        team_stats = {team: [] for team in teams} # Store history
+        fingerprint = FeatureStore.fingerprint(matches, ts_df, ps_df, version=FEATURE_VERSION)
+        self.features_fingerprint = fingerprint
+        # One cache entry per league, so leagues don't evict each other
+        table = 'match_features' if self.league is None else f"match_features-{re.sub(r'[^a-z0-9]+', '-', self.league.lower())}"
+        if use_cache:
+            cached = self.feature_store.load(table, fingerprint)
+            if cached is not None:
+                return cached
         
         logger.info("Generating features...")
-        for idx, row in matches.iterrows():
-            match_date = row['date']
-            home = row['home_team']
-            away = row['away_team']
-            
-            # --- Generate Features for this match based on history ---
-            
-            # 1. Team Form (Rolling Averages)
-            def get_form(team, history, span=5):
-                if not history:
-                    return {'xg': 0, 'goals': 0, 'conceded': 0, 'points': 0}
-                
-                df_hist = pd.DataFrame(history)
-                # Filter before match date (already implicit by loop order but good to be safe)
-                
-                # EWM xG
-                xg_avg = df_hist['xg'].ewm(span=span).mean().iloc[-1]
-                goals_avg = df_hist['goals'].ewm(span=span).mean().iloc[-1]
-                conceded_avg = df_hist['conceded'].ewm(span=span).mean().iloc[-1]
-                points_avg = df_hist['points'].ewm(span=span).mean().iloc[-1]
-                
-                return {
-                    'xg': xg_avg,
-                    'goals': goals_avg,
-                    'conceded': conceded_avg,
-                    'points': points_avg
-                }
-            
-            home_form = get_form(home, team_stats[home])
-            away_form = get_form(away, team_stats[away])
-            
-            # 2. Player Features (Aggregated)
-            # We want to know if the "Best XI" is available or performing well.
-            # Proxy: Weighted average rating/xG of the team's players in the LAST match.
-            # This is a bit naive but captures "current player form".
-            
-            features = {
-                'home_form_xg': home_form['xg'],
-                'home_form_goals': home_form['goals'],
-                'home_form_conceded': home_form['conceded'],
-                'home_form_points': home_form['points'],
-                
-                'away_form_xg': away_form['xg'],
-                'away_form_goals': away_form['goals'],
-                'away_form_conceded': away_form['conceded'],
-                'away_form_points': away_form['points'],
-                
-                'is_home': 1 # Redundant if model tree handles it, but good for linear benchmarks
-            }
-            
-            # Add Targets
-            # 0: Draw, 1: Home Win, 2: Away Win (Mapping for XGBoost)
-            if row['home_score'] > row['away_score']:
-                target = 1
-            elif row['away_score'] > row['home_score']:
-                target = 2
-            else:
-                target = 0
-                
-            features['target'] = target
-            features['date'] = match_date
-            
-            df_features.append(features)
-            
-            # --- Update History ---
-            # We assume we only know the result AFTER the match predictions 
-            # (which is true for the NEXT iteration)
-            
-            # Add stats to home team history
-            # Need to find xG for this match. 
-            # We can use the actual match stats if we had them loaded in 'matches' or separate table.
-            # For now, let's look up in player_stats or assume we have team_stats table.
-            # Wait, I have 'team_stats' table in DB! I should load that.
-            
-            # Update: Let's fetch team stats for this match ID.
-            # This is slow inside loop. Ideally, we pre-join everything.
-            pass 
-        
-        # Optimizing Pre-computation:
-        # Load 'team_stats' table: match_id, team, xg, shots...
-        self.db.connect()
-        ts_df = pd.read_sql_query("SELECT * FROM team_stats", self.db.conn)
-        self.db.close()
-        
-        # Merge matches with team stats
-        # Matches has home_team, away_team.
-        # We need to map match_id to xG.
-        # matches row -> home_xg, away_xg
-        
-        matches_enriched = matches.copy()
+        features = build_match_features(matches, ts_df, ps_df)
         
-        # Helper map match_id + team -> xG
-        # ts_df has match_id, team, xg
-        ts_indexed = ts_df.set_index(['match_id', 'team'])
-        
-        # Pre-load player stats for efficiency
-        # We need a quick lookup: match_id -> list of players with stats
-        try:
-            self.db.connect()
-            ps_df = pd.read_sql_query("SELECT * FROM player_stats", self.db.conn)
-            self.db.close()
-            logger.info(f"Loaded {len(ps_df)} player stats rows.")
-        except Exception as e:
-            logger.error(f"Failed to load player stats: {e}")
-            ps_df = pd.DataFrame()
-            
-        if not ps_df.empty:
-            # Join with match dates to allow time-based filtering
-            # matches_lookup = matches[['id', 'date']].rename(columns={'id': 'match_id'})
-            # ps_df = ps_df.merge(matches_lookup, on='match_id', how='left')
-            # Actually, let's just create a big map: Player -> List of (Date, Stat)
-            
-            # Map valid match_ids to dates
-            match_date_map = matches.set_index('id')['date'].to_dict()
-            ps_df['date'] = ps_df['match_id'].map(match_date_map)
-            ps_df = ps_df.dropna(subset=['date']).sort_values('date')
-            
-            # Create a dictionary: Team -> Date -> List of Players
-            # And Player -> History
-            
-            # We want "Last Match Lineup" for a Team at a given Date.
-            # team_match_history = {team: [ (date, match_id), ... ]}
-            team_match_history = {team: [] for team in teams}
-            # Fill with match IDs
-            # We can use the 'matches' DF for this
-            for idx, row in matches.sort_values('date').iterrows():
-                team_match_history[row['home_team']].append((row['date'], row['id']))
-                team_match_history[row['away_team']].append((row['date'], row['id']))
-                
-            # Helper to get previous match ID
-            def get_last_match_id(team, current_date):
-                hist = team_match_history.get(team, [])
-                # Find last match before current_date
-                # Assuming hist is sorted
-                last_id = None
-                for d, mid in hist:
-                    if d < current_date:
-                        last_id = mid
-                    else:
-                        break
-                return last_id
+        if use_cache:
+            self.feature_store.save(table, fingerprint, features)
+        return features
 
-            # Helper to get aggregated player stats from a specific match
-            # But we want the "Form" of the players who played in THAT match, 
-            # based on THEIR history prior to CURRENT date.
-            # That's O(N^2) or worse if we scan player history every time.
-            
-            # Optimized Approach:
-            # Maintain a tailored "Rolling Form" dictionary for every player.
-            # player_rolling_stats = {player: {'xg': ewm_obj, 'goals': ewm_obj}} 
-            # But EWM object is hard to maintain incrementally without overhead.
-            # Simpler: Just Pre-calculate Rolling 5-game avg for every player key intersection?
-            
-            # Let's pivot ps_df?
-            # Creating a 'Player Form Database'
-            # ps_df has 10k rows? 380 * 22 = 8360. Small enough.
-            
-            # Calculate rolling stats for each player
-            ps_df['player_roll_xg'] = ps_df.groupby('player')['xg'].transform(lambda x: x.ewm(span=5).mean().shift(1)) # shift 1 to avoid lookahead
-            ps_df['player_roll_goals'] = ps_df.groupby('player')['goals'].transform(lambda x: x.ewm(span=5).mean().shift(1))
-            
-            # Indexed access
-            # (match_id, team) -> [List of {player, roll_xg, minutes}]
-            # We group by match_id and team to get the lineup of that match
-            lineups = ps_df.groupby(['match_id', 'team'])
-            
-            def get_team_player_form(team, current_date):
-                # 1. Get last match ID
-                last_mid = get_last_match_id(team, current_date)
-                if not last_mid:
-                    return 0.0, 0.0 # No history
-                
-                # 2. Get players who played in that match
-                try:
-                    squad_stats = lineups.get_group((last_mid, team))
-                except KeyError:
-                    return 0.0, 0.0
-                
-                # 3. Aggregate their rolling stats (which were computed relative to THAT match)
-                # ERROR: 'player_roll_xg' in ps_df is the rolling average PRIOR to the match in that row.
-                # So if we look at Last Match, we get the form ENTERING last match.
-                # Ideally we want form ENTERING Current Match.
-                # But using "Form entering last match" is a 1-game lag proxy, which is acceptable and safe.
-                # OR we could update their form including the last match?
-                # Yes, we should use the `values` from the Last Match row to update the EWM?
-                # Complex. Let's stick to "Weighted Average of Rolling Form of Players in Last Lineup".
-                
-                total_min = squad_stats['minutes'].sum()
-                if total_min == 0: return 0.0, 0.0
-                
-                # Weighted average
-                weighted_xg = (squad_stats['player_roll_xg'].fillna(0) * squad_stats['minutes']).sum() / total_min
-                weighted_goals = (squad_stats['player_roll_goals'].fillna(0) * squad_stats['minutes']).sum() / total_min
-                
-                return weighted_xg, weighted_goals
+    def _window_name(self, train_start, train_end) -> str:
+        """Artifact name: feature version + training window + hash of data fingerprint and training config."""
+        config = json.dumps({
+            'features': self.features_fingerprint,
+            'params': XGB_PARAMS,
+            'valid_fraction': self.valid_fraction,
+            'early_stopping_rounds': self.early_stopping_rounds,
+            'num_boost_round': self.num_boost_round,
+            'min_boost_rounds': self.min_boost_rounds,
+            'refit': True
+        }, sort_keys=True)
+        key = hashlib.sha256(config.encode()).hexdigest()[:10]
+        return f"xgb_v{FEATURE_VERSION}_{train_start:%Y%m%d}_{train_end:%Y%m%d}_{key}"
 
-        else:
-            def get_team_player_form(team, date): return 0.0, 0.0
+    def _dmatrix(self, frame: pd.DataFrame, name: str) -> xgb.DMatrix:
+        """DMatrix for a frame, cached on disk as an XGBoost binary buffer."""
+        path = self.model_dir / f"{name}.buffer"
+        if path.exists():
+            return xgb.DMatrix(str(path), nthread=self.nthread)
+        dmatrix = xgb.DMatrix(frame[self.feature_cols], label=frame['target'], nthread=self.nthread)
+        dmatrix.save_binary(str(path))
+        return dmatrix
 
-        history = {team: [] for team in teams}
-        final_data = []
-        
-        for idx, row in matches_enriched.iterrows():
-            mid = row['id']
-            h_team = row['home_team']
-            a_team = row['away_team']
-            match_date = row['date']
-            
-            # 1. Feature Extraction
-            h_stats = get_form(h_team, history[h_team])
-            a_stats = get_form(a_team, history[a_team])
-            
-            # Player Stats
-            h_pxg, h_pgls = get_team_player_form(h_team, match_date)
-            a_pxg, a_pgls = get_team_player_form(a_team, match_date)
-            
-            feat = {
-                'match_id': mid,
-                'date': match_date,
-                'home_roll_xg': h_stats['xg'],
-                'home_roll_gls': h_stats['goals'],
-                'home_roll_pts': h_stats['points'],
-                'home_player_xg': h_pxg,
-                'home_player_gls': h_pgls,
-                
-                'away_roll_xg': a_stats['xg'],
-                'away_roll_gls': a_stats['goals'],
-                'away_roll_pts': a_stats['points'],
-                'away_player_xg': a_pxg,
-                'away_player_gls': a_pgls,
-                
-                'target': 1 if row['home_score'] > row['away_score'] else (2 if row['away_score'] > row['home_score'] else 0)
-            }
-            final_data.append(feat)
-            
-            # 2. Update History (using Current Result)
-            # Get actual stats from ts_indexed
-            try:
-                h_xg = ts_indexed.loc[(mid, h_team), 'xg']
-            except KeyError:
-                h_xg = 0.0 # Missing data
-            
-            try:
-                a_xg = ts_indexed.loc[(mid, a_team), 'xg']
-            except KeyError:
-                a_xg = 0.0
-            
-            h_pts = 3 if row['home_score'] > row['away_score'] else (1 if row['home_score'] == row['away_score'] else 0)
-            a_pts = 3 if row['away_score'] > row['home_score'] else (1 if row['away_score'] == row['home_score'] else 0)
-            
-            history[h_team].append({
-                'xg': h_xg,
-                'goals': row['home_score'],
-                'conceded': row['away_score'],
-                'points': h_pts
-            })
-            
-            history[a_team].append({
-                'xg': a_xg,
-                'goals': row['away_score'],
-                'conceded': row['home_score'],
-                'points': a_pts
-            })
-            
-        return pd.DataFrame(final_data)
+    def _evict(self):
+        """Deletes the artifacts of all but the max_windows most recently used training windows."""
+        windows: Dict[str, List[Path]] = {}
+        for path in self.model_dir.glob("xgb_*"):
+            name = re.sub(r'(_train|_valid|_full)?\.(json|buffer)$', '', path.name)
+            windows.setdefault(name, []).append(path)
+        last_used = {name: max(p.stat().st_mtime for p in paths) for name, paths in windows.items()}
+        stale = sorted(last_used, key=last_used.get, reverse=True)[self.max_windows:]
+        for name in stale:
+            for path in windows[name]:
+                path.unlink(missing_ok=True)
+        if stale:
+            logger.info(f"Evicted {len(stale)} model windows from {self.model_dir}")
 
-    def train_and_eval(self):
+    @timed()
+    def train_window(self, data: pd.DataFrame, train_end) -> xgb.Booster:
+        """
+        Trains (or loads a persisted) model on every match before train_end.
+        The number of boosting rounds is chosen by early stopping on a time-ordered
+        validation fold (the latest valid_fraction of the window, never a random split);
+        the model is then refit on the whole window with that many rounds
+        (at least min_boost_rounds), so the most recent matches are trained on too.
+        """
+        window = data[data['date'] < pd.to_datetime(train_end)].sort_values('date', kind='stable')
+        if len(window) < 20:
+            logger.warning(f"Not enough matches before {train_end} to train.")
+            return None
+
+        self.model_dir.mkdir(parents=True, exist_ok=True)
+        name = self._window_name(window['date'].min(), pd.to_datetime(train_end))
+        model_path = self.model_dir / f"{name}.json"
+
+        if model_path.exists():
+            bst = xgb.Booster()
+            bst.load_model(str(model_path))
+            # Marks the window as recently used for eviction
+            model_path.touch()
+            logger.info(f"Loaded model artifact {model_path.name}")
+            return bst
+
+        split = int(len(window) * (1 - self.valid_fraction))
+        dtrain = self._dmatrix(window.iloc[:split], f"{name}_train")
+        dvalid = self._dmatrix(window.iloc[split:], f"{name}_valid")
+
+        params = dict(XGB_PARAMS)
+        if self.nthread:
+            params['nthread'] = self.nthread
+
+        probe = xgb.train(params, dtrain, num_boost_round=self.num_boost_round,
+                          evals=[(dvalid, 'valid')], early_stopping_rounds=self.early_stopping_rounds,
+                          verbose_eval=False)
+        rounds = max(probe.best_iteration + 1, self.min_boost_rounds)
+
+        dfull = self._dmatrix(window, f"{name}_full")
+        bst = xgb.train(params, dfull, num_boost_round=rounds, verbose_eval=False)
+        bst.save_model(str(model_path))
+        logger.info(f"Trained {model_path.name} on {len(window)} matches: best iteration {probe.best_iteration} "
+                    f"on the {len(window) - split}-match validation fold, refit with {rounds} rounds")
+        self._evict()
+        return bst
+
+    @timed()
+    def predict_proba(self, bst: xgb.Booster, frame: pd.DataFrame) -> np.ndarray:
+        """Class probabilities [draw, home, away] (only the early-stopped trees of a booster that has best_iteration)."""
+        dmatrix = xgb.DMatrix(frame[self.feature_cols], nthread=self.nthread)
+        best = bst.attr('best_iteration')
+        if best is not None:
+            return bst.predict(dmatrix, iteration_range=(0, int(best) + 1))
+        return bst.predict(dmatrix)
+
+    @timed()
+    def train_and_eval(self, split_date='2024-03-01'):
         data = self.prepare_features()
         if data.empty:
             logger.warning("No data.")
             return
 
-        # Time-based split
-        # Train on first 70%, Test on last 30%
-        # Or better: Walk-forward validation.
-        # Simple for now: Split by date.
-        
-        split_date = pd.to_datetime('2024-03-01')
+        # Time-based split (see walk_forward for expanding-window retraining)
+        split_date = pd.to_datetime(split_date)
         train = data[data['date'] < split_date]
         test = data[data['date'] >= split_date]
         
         features = [c for c in data.columns if c not in ['match_id', 'date', 'target']]
         self.feature_cols = features
         
-        X_train = train[features]
-        y_train = train['target']
         X_test = test[features]
         y_test = test['target']
         
-        dtrain = xgb.DMatrix(X_train, label=y_train)
-        dtest = xgb.DMatrix(X_test, label=y_test)
-        
-        params = {
-            'max_depth': 4,
-            'eta': 0.1,
-            'objective': 'multi:softprob',
-            'num_class': 3,
-            'eval_metric': 'mlogloss'
-        }
-        
-        bst = xgb.train(params, dtrain, num_boost_round=100)
+        bst = self.train_window(data, split_date)
+        if bst is None:
+            return
+        self.model = bst
         
         # Eval
-        preds = bst.predict(dtest)
+        preds = self.predict_proba(bst, test)
         y_pred_class = np.argmax(preds, axis=1)
         acc = accuracy_score(y_test, y_pred_class)
-        loss = log_loss(y_test, preds)
+        loss = log_loss(y_test, preds, labels=[0, 1, 2])
         
         logger.info(f"XGBoost Test Accuracy: {acc:.2%}")
         logger.info(f"Log Loss: {loss:.4f}")
@@ -371,107 +331,77 @@ class MLModel:
             
         return bst, X_test, y_test, test
 
-    def backtest(self):
-        bst, X_test, y_test, test_df = self.train_and_eval()
+    @timed()
+    def walk_forward(self, start_date='2024-03-01', retrain_freq='MS') -> pd.DataFrame:
+        """
+        Expanding-window walk-forward predictions: the model is retrained at start_date and
+        then at every retrain_freq boundary (default month start) on all matches before it,
+        and predicts the matches up to the next boundary.
+        Returns the test rows with p_draw, p_home, p_away columns.
+        """
+        data = self.prepare_features()
+        self.feature_cols = [c for c in data.columns if c not in ['match_id', 'date', 'target']]
+        start_date = pd.to_datetime(start_date)
+        test = data[data['date'] >= start_date]
+        if test.empty:
+            return test.assign(p_draw=[], p_home=[], p_away=[])
+
+        boundaries = [start_date] + [d for d in pd.date_range(start_date, test['date'].max(), freq=retrain_freq) if d > start_date]
+        boundaries.append(test['date'].max() + pd.Timedelta(days=1))
+
+        periods = []
+        for period_start, period_end in zip(boundaries[:-1], boundaries[1:]):
+            period = test[(test['date'] >= period_start) & (test['date'] < period_end)]
+            if period.empty:
+                continue
+            bst = self.train_window(data, period_start)
+            if bst is None:
+                continue
+            probs = self.predict_proba(bst, period)
+            periods.append(period.assign(p_draw=probs[:, 0], p_home=probs[:, 1], p_away=probs[:, 2]))
+
+        logger.info(f"Walk-forward: {len(periods)} retraining windows, {sum(len(p) for p in periods)} predictions")
+        return pd.concat(periods) if periods else test.iloc[0:0].assign(p_draw=[], p_home=[], p_away=[])
+
+    @timed()
+    def backtest(self, start_date='2024-03-01', retrain_freq='MS', devig='multiplicative'):
+        # XGBoost outputs are ordered by class label: 0, 1, 2.
+        # So p_draw = class 0, p_home = class 1, p_away = class 2.
+        # (target = 1 Home Win, 2 Away Win, 0 Draw - see prepare_features)
+        test_df = self.walk_forward(start_date=start_date, retrain_freq=retrain_freq)
         
         logger.info("Running ML Backtest...")
         
-        # Predict probabilities
-        dtest = xgb.DMatrix(X_test)
-        probs = bst.predict(dtest)
-        
         # Load Odds for Test Set
         # test_df has match_id
         match_ids = test_df['match_id'].tolist()
         if not match_ids:
             return
             
-        placeholders = ','.join(['?'] * len(match_ids))
-        self.db.connect()
-        odds_query = f"""
-            SELECT match_id, bookmaker, home_win, draw, away_win 
-            FROM odds 
-            WHERE bookmaker = 'Bet365' AND match_id IN ({placeholders})
-        """
-        odds_df = pd.read_sql_query(odds_query, self.db.conn, params=match_ids)
-        self.db.close()
+        odds_df = self.snapshot.load('odds', nullable=False, columns=['match_id', 'bookmaker', 'home_win', 'draw', 'away_win'])
+        odds_df = odds_df[(odds_df['bookmaker'] == 'Bet365') & odds_df['match_id'].isin(match_ids)]
         
         # Merge odds
-        test_df = test_df.merge(odds_df, on='match_id', how='inner')
-        
-        bankroll = 10000.0
-        stake = 100.0
-        bets = 0
-        wins = 0
-        
-        # Evaluate bets
-        # probs is array of [prob_draw, prob_home, prob_away] (0, 1, 2)
-        # Wait, check class mapping:
-        # In prepare_features: 
-        # target = 1 (Home > Away) -> Home Win
-        # target = 2 (Away > Home) -> Away Win
-        # target = 0 (Draw)
-        
-        # XGBoost outputs are usually ordered by class label: 0, 1, 2.
-        # So probs[i][0] = Draw, probs[i][1] = Home, probs[i][2] = Away.
+        test_df = test_df.merge(odds_df, on='match_id', how='inner').reset_index(drop=True)
         
-        history = []
+        # Home, Draw, Away; one bet max per match, first qualifying market wins
+        model_probs = test_df[['p_home', 'p_draw', 'p_away']].to_numpy(dtype=float)
+        odds = test_df[['home_win', 'draw', 'away_win']].to_numpy(dtype=float)
+        outcomes = test_df['target'].to_numpy()[:, None] == np.array([1, 0, 2])[None, :]
+        # Edges against margin-free probabilities (devig=None: raw 1/odds)
+        implied = None if devig is None else fair_probabilities(odds, devig)
         
-        # Reset index to align with probs
-        test_df = test_df.reset_index(drop=True)
-        
-        for idx, row in test_df.iterrows():
-            # Get model probs
-            p_draw = probs[idx][0]
-            p_home = probs[idx][1]
-            p_away = probs[idx][2]
-            
-            # Betting logic (Kelly or Fixed Edge)
-            edge_threshold = 0.05
-            
-            # Home
-            if row['home_win'] > 1.0:
-                implied_h = 1.0 / row['home_win']
-                edge_h = p_home - implied_h
-                if edge_h > edge_threshold:
-                    # Place Home Bet
-                    outcome = 1 if row['target'] == 1 else 0 # 1 is Home Win
-                    pnl = stake * (row['home_win'] - 1) if outcome else -stake
-                    bankroll += pnl
-                    bets += 1
-                    if outcome: wins += 1
-                    continue # One bet per match? Or multiple? Let's do one max for simplicity.
-            
-            # Draw
-            if row['draw'] > 1.0:
-                implied_d = 1.0 / row['draw']
-                edge_d = p_draw - implied_d
-                if edge_d > edge_threshold:
-                    outcome = 1 if row['target'] == 0 else 0
-                    pnl = stake * (row['draw'] - 1) if outcome else -stake
-                    bankroll += pnl
-                    bets += 1
-                    if outcome: wins += 1
-                    continue
-                    
-            # Away
-            if row['away_win'] > 1.0:
-                implied_a = 1.0 / row['away_win']
-                edge_a = p_away - implied_a
-                if edge_a > edge_threshold:
-                    outcome = 1 if row['target'] == 2 else 0
-                    pnl = stake * (row['away_win'] - 1) if outcome else -stake
-                    bankroll += pnl
-                    bets += 1
-                    if outcome: wins += 1
-                    continue
+        evaluator = BetEvaluator(['H', 'D', 'A'])
+        strategy = {'name': 'ml', 'edge_threshold': 0.05, 'stake': 100.0, 'max_bets_per_match': 1}
+        bets, summary = evaluator.evaluate(model_probs, odds, outcomes, [strategy], implied=implied, bankroll=10000.0)
+        result = summary.iloc[0]
         
-        roi = ((bankroll - 10000.0) / (bets * stake)) * 100 if bets > 0 else 0
         logger.info(f"ML Backtest Results:")
-        logger.info(f"Bets: {bets}")
-        logger.info(f"Win Rate: {wins/bets:.2%}" if bets > 0 else "0%")
-        logger.info(f"ROI: {roi:.2f}%")
-        logger.info(f"Final Bankroll: ${bankroll:.2f}")
+        logger.info(f"Bets: {result['bets']}")
+        logger.info(f"Win Rate: {result['win_rate']:.2%}" if result['bets'] > 0 else "0%")
+        logger.info(f"ROI: {result['roi']:.2f}%")
+        logger.info(f"Final Bankroll: ${result['final_bankroll']:.2f}")
+        return bets
 
 if __name__ == "__main__":
     ml = MLModel()
@@ -1,288 +1,586 @@
 import pandas as pd
 import numpy as np
 from scipy.stats import poisson
-from typing import Dict, Tuple
+from scipy.optimize import minimize
+from typing import Dict, Any, Tuple
 from .database import Database
+from .snapshot import AnalyticSnapshot, league_rows
+from .profiling import timed
+import hashlib
+import json
 import logging
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Scorelines are truncated at 10 goals per team
+MAX_GOALS = 10
+GOALS = np.arange(MAX_GOALS)
+_HOME_GOALS, _AWAY_GOALS = np.meshgrid(GOALS, GOALS, indexing='ij')
+_TOTAL_GOALS = _HOME_GOALS + _AWAY_GOALS
+_BOTH_SCORE = (_HOME_GOALS > 0) & (_AWAY_GOALS > 0)
+
+# Outcome masks over the (home goals, away goals) grid, reduced against score matrices
+OUTCOMES = ['home_win', 'draw', 'away_win', 'over_2_5', 'under_2_5', 'btts_yes', 'btts_no']
+OUTCOME_MASKS = np.stack([
+    _HOME_GOALS > _AWAY_GOALS,
+    _HOME_GOALS == _AWAY_GOALS,
+    _HOME_GOALS < _AWAY_GOALS,
+    _TOTAL_GOALS > 2.5,
+    _TOTAL_GOALS < 2.5,
+    _BOTH_SCORE,
+    ~_BOTH_SCORE
+]).astype(float)
+
+class EWMState:
+    """
+    Running exponentially weighted mean that updates in O(1).
+    Matches pandas `Series.ewm(span=span).mean().iloc[-1]` (adjust=True).
+    """
+    __slots__ = ('decay', 'weighted_sum', 'weight')
+
+    def __init__(self, span: int):
+        self.decay = 1.0 - 2.0 / (span + 1.0)
+        self.weighted_sum = 0.0
+        self.weight = 0.0
+
+    def update(self, value: float):
+        self.weighted_sum = self.weighted_sum * self.decay + value
+        self.weight = self.weight * self.decay + 1.0
+
+    @property
+    def mean(self) -> float:
+        return self.weighted_sum / self.weight if self.weight > 0 else 0.0
+
+
+class TeamState:
+    """Per-team EWM goals scored/conceded, split by venue."""
+    __slots__ = ('home_scored', 'home_conceded', 'away_scored', 'away_conceded')
+
+    def __init__(self, span: int):
+        self.home_scored = EWMState(span)
+        self.home_conceded = EWMState(span)
+        self.away_scored = EWMState(span)
+        self.away_conceded = EWMState(span)
+
+
+class PairTable:
+    """
+    Outcome probabilities for every ordered (home, away) team pair at one point in time.
+    probs is a (T, T, len(OUTCOMES)) array and home_xg/away_xg are (T, T); the diagonal is NaN.
+    Predictions are plain array lookups.
+    """
+    __slots__ = ('teams', 'index', 'home_xg', 'away_xg', 'probs')
+
+    def __init__(self, teams, home_xg: np.ndarray, away_xg: np.ndarray, probs: np.ndarray):
+        self.teams = list(teams)
+        self.index = {team: i for i, team in enumerate(self.teams)}
+        self.home_xg = home_xg
+        self.away_xg = away_xg
+        self.probs = probs
+
+    @property
+    def nbytes(self) -> int:
+        return self.home_xg.nbytes + self.away_xg.nbytes + self.probs.nbytes
+
+    def lookup(self, home_teams, away_teams) -> pd.DataFrame:
+        """Same layout as PoissonModel.predict_batch (NaN for unknown teams)."""
+        home_idx = np.array([self.index.get(t, -1) for t in home_teams], dtype=np.int64)
+        away_idx = np.array([self.index.get(t, -1) for t in away_teams], dtype=np.int64)
+        valid = (home_idx >= 0) & (away_idx >= 0)
+
+        probs = np.full((len(home_idx), len(OUTCOMES)), np.nan)
+        home_xg = np.full(len(home_idx), np.nan)
+        away_xg = np.full(len(home_idx), np.nan)
+        probs[valid] = self.probs[home_idx[valid], away_idx[valid]]
+        home_xg[valid] = self.home_xg[home_idx[valid], away_idx[valid]]
+        away_xg[valid] = self.away_xg[home_idx[valid], away_idx[valid]]
+
+        result = pd.DataFrame(probs, columns=OUTCOMES)
+        result.insert(0, 'away_xg', away_xg)
+        result.insert(0, 'home_xg', home_xg)
+        result.insert(0, 'away_team', list(away_teams))
+        result.insert(0, 'home_team', list(home_teams))
+        return result
+
+
 class PoissonModel:
-    def __init__(self):
-        self.db = Database()
-        self.attack_strength = {}
-        self.defense_strength = {}
-        self.league_avg_home_goals = 0.0
-        self.league_avg_away_goals = 0.0
+    def __init__(self, team_span: int = 10, league_span: int = 40, db: Database = None, league: str = None):
+        self.db = db or Database()
+        self.snapshot = AnalyticSnapshot(db=self.db)
+        # Only matches of this league are loaded (None = every league in the database)
+        self.league = league
+        # 10 games is standard for "form".
+        # There are 380 games. A span of 40 represents about a month of league play (4 weeks * 10 games).
+        self.team_span = team_span
+        self.league_span = league_span
+        self.history = None
+        self.history_fingerprint = ''
+        self.reset()
+
+    @property
+    def params(self) -> Dict[str, Any]:
+        return {'team_span': self.team_span, 'league_span': self.league_span, 'league': self.league}
+
+    @property
+    def version(self) -> str:
+        """Identifies the model class, its parameters and the loaded history (for prediction caches)."""
+        config = json.dumps([type(self).__name__, self.params, self.history_fingerprint], sort_keys=True, default=str)
+        return hashlib.sha256(config.encode()).hexdigest()[:16]
+
+    def reset(self):
+        """Clears the incremental state (no matches seen)."""
+        self._pair_table = None
+        self.team_state: Dict[str, TeamState] = {}
+        self.league_home = EWMState(self.league_span)
+        self.league_away = EWMState(self.league_span)
+        self.n_matches = 0
+        self._cursor = 0  # Index of the next match in self.history to feed
+
+    @property
+    def league_avg_home_goals(self) -> float:
+        return self.league_home.mean
+
+    @property
+    def league_avg_away_goals(self) -> float:
+        return self.league_away.mean
+
+    def update(self, match):
+        """
+        Advances the model state by one played match in O(1).
+        match: mapping with home_team, away_team, home_score, away_score
+        """
+        self._update(match['home_team'], match['away_team'], match['home_score'], match['away_score'])
+
+    def _update(self, home_team: str, away_team: str, home_score: float, away_score: float):
+        self._pair_table = None
+        self.league_home.update(home_score)
+        self.league_away.update(away_score)
+
+        home = self.team_state.get(home_team)
+        if home is None:
+            home = self.team_state[home_team] = TeamState(self.team_span)
+        away = self.team_state.get(away_team)
+        if away is None:
+            away = self.team_state[away_team] = TeamState(self.team_span)
 
+        home.home_scored.update(home_score)
+        home.home_conceded.update(away_score)
+        away.away_scored.update(away_score)
+        away.away_conceded.update(home_score)
+        self.n_matches += 1
+
+    def _strengths(self, team: str) -> Tuple[Dict[str, float], Dict[str, float]]:
+        """Attack and defense strengths of a team relative to the current league averages."""
+        state = self.team_state[team]
+        lh = self.league_avg_home_goals
+        la = self.league_avg_away_goals
+        # Teams without home (or away) games fall back to 0 goals, though should ideally use league avg
+        attack = {
+            'home': state.home_scored.mean / lh if lh > 0 else 1,
+            'away': state.away_scored.mean / la if la > 0 else 1
+        }
+        defense = {
+            'home': state.home_conceded.mean / la if la > 0 else 1,
+            'away': state.away_conceded.mean / lh if lh > 0 else 1
+        }
+        return attack, defense
+
+    @property
+    def attack_strength(self) -> Dict[str, Dict[str, float]]:
+        return {team: self._strengths(team)[0] for team in self.team_state}
+
+    @property
+    def defense_strength(self) -> Dict[str, Dict[str, float]]:
+        return {team: self._strengths(team)[1] for team in self.team_state}
+
+    @timed()
+    def load_history(self, history: pd.DataFrame = None):
+        """
+        Loads all played matches once, sorted by date, for walk-forward use with advance_to().
+        If history is not provided it is read from the matches snapshot.
+        """
+        if history is None:
+            history = self.snapshot.load('matches', nullable=False, columns=[
+                'date', 'home_team', 'away_team', 'home_score', 'away_score', 'league'])
+            history = league_rows(history, self.league).drop(columns='league')
+
+        # Unplayed fixtures (NULL scores) would turn the EWM state into NaN
+        history = history.dropna(subset=['home_score', 'away_score']).copy()
+        history['date'] = pd.to_datetime(history['date'])
+        self.history = history.sort_values('date', kind='stable').reset_index(drop=True)
+        self._dates = self.history['date'].values
+        cols = ['date', 'home_team', 'away_team', 'home_score', 'away_score']
+        self.history_fingerprint = hashlib.sha256(
+            pd.util.hash_pandas_object(self.history[cols], index=False).values.tobytes()).hexdigest()[:16]
+        self.reset()
+
+    @timed()
+    def advance_to(self, max_date=None):
+        """
+        Feeds every loaded match played before max_date into the incremental state.
+        Walking forward in time only processes the new matches; going back replays from scratch.
+        """
+        if self.history is None:
+            self.load_history()
+
+        if max_date is None:
+            end = len(self.history)
+        else:
+            end = int(np.searchsorted(self._dates, np.datetime64(pd.to_datetime(max_date)), side='left'))
+
+        if end < self._cursor:
+            self.reset()
+
+        if end > self._cursor:
+            chunk = self.history.iloc[self._cursor:end]
+            for home, away, hs, aws in zip(chunk['home_team'].values, chunk['away_team'].values,
+                                           chunk['home_score'].values, chunk['away_score'].values):
+                self._update(home, away, hs, aws)
+            self._cursor = end
+
+    @timed()
     def train(self, max_date=None):
         """
         Trains the Poisson model on historical matches.
         If max_date is provided, only uses matches played before that date.
         """
-        logger.info(f"Training Poisson model (max_date={max_date})...")
-        
-        # Fetch all matches
-        self.db.connect()
-        query = "SELECT date, home_team, away_team, home_score, away_score FROM matches"
-        df = pd.read_sql_query(query, self.db.conn)
-        self.db.close()
-        
-        if df.empty:
+        logger.info(f"Training Poisson model (league={self.league}, max_date={max_date})...")
+
+        self.load_history()
+        if self.history.empty:
             logger.warning("No data to train on.")
             return
 
-        # Convert date column
-        df['date'] = pd.to_datetime(df['date'])
-
-        # Filter by max_date
-        if max_date:
-            df = df[df['date'] < pd.to_datetime(max_date)]
-            
-        if df.empty:
-            # logger.warning("No data before max_date.")
+        self.advance_to(max_date)
+        if self.n_matches == 0:
             return
 
-        # Calculate league averages using EWM to capture trends
-        # We need to sort by date first to interpret EWM correctly as "time series"
-        df_sorted = df.sort_values('date')
-        
-        # We'll use the final EWM value as the current "state" of the league
-        # span=38 roughly implies a "season" memory, or maybe shorter for trends?
-        # Let's use span=10 matches * 10 games/week? No, span is number of observations.
-        # There are 380 games. A span of 40 represents about a month of league play (4 weeks * 10 games).
-        league_span = 40 
-        self.league_avg_home_goals = df_sorted['home_score'].ewm(span=league_span).mean().iloc[-1]
-        self.league_avg_away_goals = df_sorted['away_score'].ewm(span=league_span).mean().iloc[-1]
-        
-        # Calculate team stats
-        teams = pd.concat([df['home_team'], df['away_team']]).unique()
-        
-        team_span = 10 # 10 games is standard for "form"
-        
-        for team in teams:
-            # Home stats
-            home_games = df[df['home_team'] == team].sort_values('date')
-            if not home_games.empty:
-                avg_home_goals_scored = home_games['home_score'].ewm(span=team_span).mean().iloc[-1]
-                avg_home_goals_conceded = home_games['away_score'].ewm(span=team_span).mean().iloc[-1]
-            else:
-                avg_home_goals_scored = 0 # Default fallback, though should ideally use league avg
-                avg_home_goals_conceded = 0
-            
-            # Away stats
-            away_games = df[df['away_team'] == team].sort_values('date')
-            if not away_games.empty:
-                avg_away_goals_scored = away_games['away_score'].ewm(span=team_span).mean().iloc[-1]
-                avg_away_goals_conceded = away_games['home_score'].ewm(span=team_span).mean().iloc[-1]
-            else:
-                avg_away_goals_scored = 0
-                avg_away_goals_conceded = 0
-            
-            self.attack_strength[team] = {
-                'home': avg_home_goals_scored / self.league_avg_home_goals if self.league_avg_home_goals > 0 else 1,
-                'away': avg_away_goals_scored / self.league_avg_away_goals if self.league_avg_away_goals > 0 else 1
-            }
-            
-            self.defense_strength[team] = {
-                'home': avg_home_goals_conceded / self.league_avg_away_goals if self.league_avg_away_goals > 0 else 1,
-                'away': avg_away_goals_conceded / self.league_avg_home_goals if self.league_avg_home_goals > 0 else 1
-            }
-            
-        logger.info(f"Trained on {len(df)} matches. League Avg Home Goals: {self.league_avg_home_goals:.2f}")
+        logger.info(f"Trained on {self.n_matches} matches. League Avg Home Goals: {self.league_avg_home_goals:.2f}")
+
+    def expected_goals_batch(self, home_teams, away_teams) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Expected goals for many fixtures at once.
+        Returns (home_xg, away_xg, valid); fixtures with unknown teams are NaN and valid=False.
+        """
+        teams = list(self.team_state)
+        index = {team: i for i, team in enumerate(teams)}
+        home_idx = np.array([index.get(t, -1) for t in home_teams], dtype=np.int64)
+        away_idx = np.array([index.get(t, -1) for t in away_teams], dtype=np.int64)
+        valid = (home_idx >= 0) & (away_idx >= 0)
+        if not teams:
+            nan = np.full(len(home_idx), np.nan)
+            return nan, nan.copy(), valid
+
+        states = [self.team_state[t] for t in teams]
+        home_scored = np.array([s.home_scored.mean for s in states])
+        home_conceded = np.array([s.home_conceded.mean for s in states])
+        away_scored = np.array([s.away_scored.mean for s in states])
+        away_conceded = np.array([s.away_conceded.mean for s in states])
+
+        lh = self.league_avg_home_goals
+        la = self.league_avg_away_goals
+        ones = np.ones(len(teams))
+        attack_home = home_scored / lh if lh > 0 else ones
+        attack_away = away_scored / la if la > 0 else ones
+        defense_home = home_conceded / la if la > 0 else ones
+        defense_away = away_conceded / lh if lh > 0 else ones
+
+        # Home Goals = Home Attack * Away Defense * League Avg Home Goals
+        # Away Goals = Away Attack * Home Defense * League Avg Away Goals
+        home_xg = np.where(valid, attack_home[home_idx] * defense_away[away_idx] * lh, np.nan)
+        away_xg = np.where(valid, attack_away[away_idx] * defense_home[home_idx] * la, np.nan)
+        return home_xg, away_xg, valid
+
+    def score_matrices(self, home_xg: np.ndarray, away_xg: np.ndarray) -> np.ndarray:
+        """
+        Scoreline probabilities for many fixtures: an (n, MAX_GOALS, MAX_GOALS) tensor
+        where [i, h, a] is P(home scores h, away scores a) for fixture i.
+        """
+        home_probs = poisson.pmf(GOALS[None, :], np.asarray(home_xg, dtype=float)[:, None])
+        away_probs = poisson.pmf(GOALS[None, :], np.asarray(away_xg, dtype=float)[:, None])
+        return home_probs[:, :, None] * away_probs[:, None, :]
+
+    @timed()
+    def predict_batch(self, fixtures) -> pd.DataFrame:
+        """
+        Predicts many fixtures in one NumPy pass.
+        fixtures: list of (home_team, away_team) tuples or a DataFrame with home_team/away_team columns.
+        Returns one row per fixture with expected goals and 1X2, O/U 2.5 and BTTS probabilities
+        (NaN for fixtures with teams not seen in training).
+        """
+        if isinstance(fixtures, pd.DataFrame):
+            home_teams = fixtures['home_team'].tolist()
+            away_teams = fixtures['away_team'].tolist()
+        else:
+            home_teams = [f[0] for f in fixtures]
+            away_teams = [f[1] for f in fixtures]
+
+        home_xg, away_xg, valid = self.expected_goals_batch(home_teams, away_teams)
+        probs = np.full((len(home_teams), len(OUTCOMES)), np.nan)
+        if valid.any():
+            matrices = self.score_matrices(home_xg[valid], away_xg[valid])
+            probs[valid] = np.einsum('nij,kij->nk', matrices, OUTCOME_MASKS)
+
+        result = pd.DataFrame(probs, columns=OUTCOMES)
+        result.insert(0, 'away_xg', away_xg)
+        result.insert(0, 'home_xg', home_xg)
+        result.insert(0, 'away_team', away_teams)
+        result.insert(0, 'home_team', home_teams)
+        return result
+
+    @timed()
+    def precompute_pairs(self, block_size: int = 64) -> PairTable:
+        """
+        Predicts every ordered team pair for the current state in one pass
+        (home teams processed in blocks to bound the scoreline tensor size).
+        """
+        teams = list(self.team_state)
+        n = len(teams)
+        home_xg = np.full((n, n), np.nan)
+        away_xg = np.full((n, n), np.nan)
+        probs = np.full((n, n, len(OUTCOMES)), np.nan)
+        for start in range(0, n, block_size):
+            block = teams[start:start + block_size]
+            home = np.repeat(block, n)
+            away = np.tile(teams, len(block))
+            hxg, axg, _ = self.expected_goals_batch(home, away)
+            rows = slice(start, start + len(block))
+            home_xg[rows] = hxg.reshape(len(block), n)
+            away_xg[rows] = axg.reshape(len(block), n)
+            matrices = self.score_matrices(hxg, axg)
+            probs[rows] = np.einsum('nij,kij->nk', matrices, OUTCOME_MASKS).reshape(len(block), n, -1)
+
+        # A team never plays itself
+        diagonal = np.arange(n)
+        home_xg[diagonal, diagonal] = np.nan
+        away_xg[diagonal, diagonal] = np.nan
+        probs[diagonal, diagonal] = np.nan
+        return PairTable(teams, home_xg, away_xg, probs)
+
+    def pair_table(self) -> PairTable:
+        """All-pairs table for the current state, rebuilt only after the state changes."""
+        if self._pair_table is None:
+            self._pair_table = self.precompute_pairs()
+        return self._pair_table
+
+    def _predict_single(self, home_team: str, away_team: str) -> Dict[str, float]:
+        if home_team not in self.team_state or away_team not in self.team_state:
+            logger.warning(f"Teams {home_team} or {away_team} not found in training data.")
+            return {}
+
+        # Look up the all-pairs table only if something already built it for this state;
+        # building its T^2 fixtures for one prediction costs far more than predicting it
+        if self._pair_table is not None:
+            row = self._pair_table.lookup([home_team], [away_team]).iloc[0]
+        else:
+            row = self.predict_batch([(home_team, away_team)]).iloc[0]
+        return row.to_dict()
 
     def predict_match(self, home_team: str, away_team: str) -> Dict[str, float]:
         """
         Predicts the outcome probabilities for a match.
         Returns dictionary with 'home_win', 'draw', 'away_win' probabilities.
         """
-        if home_team not in self.attack_strength or away_team not in self.attack_strength:
-            logger.warning(f"Teams {home_team} or {away_team} not found in training data.")
+        pred = self._predict_single(home_team, away_team)
+        if not pred:
             return {}
+        return {k: pred[k] for k in ('home_team', 'away_team', 'home_xg', 'away_xg', 'home_win', 'draw', 'away_win')}
+
+def dixon_coles_nll(params: np.ndarray, home_idx: np.ndarray, away_idx: np.ndarray,
+                    home_goals: np.ndarray, away_goals: np.ndarray, weights: np.ndarray,
+                    n_teams: int, l2: float = 0.0) -> Tuple[float, np.ndarray]:
+    """
+    Weighted Dixon-Coles negative log-likelihood and its analytic gradient.
+
+    params = [attack (n_teams), defense (n_teams), home_advantage, rho]
+    log(lambda) = attack[home] + defense[away] + home_advantage
+    log(mu)     = attack[away] + defense[home]
+    The log(x!) terms are constant and dropped. A small L2 penalty on
+    attack/defense identifies the model (and pulls unseen teams to average).
+    """
+    attack = params[:n_teams]
+    defense = params[n_teams:2 * n_teams]
+    home_adv = params[-2]
+    rho = params[-1]
+
+    log_lam = attack[home_idx] + defense[away_idx] + home_adv
+    log_mu = attack[away_idx] + defense[home_idx]
+    lam = np.exp(log_lam)
+    mu = np.exp(log_mu)
+
+    # tau and its partial derivatives (w.r.t. log lambda, log mu and rho)
+    h0 = home_goals == 0
+    h1 = home_goals == 1
+    a0 = away_goals == 0
+    a1 = away_goals == 1
+    c00, c01, c10, c11 = h0 & a0, h0 & a1, h1 & a0, h1 & a1
+
+    tau = np.ones_like(lam)
+    dtau_dlam = np.zeros_like(lam)
+    dtau_dmu = np.zeros_like(lam)
+    dtau_drho = np.zeros_like(lam)
+
+    lam_mu = lam * mu
+    tau[c00] = 1 - lam_mu[c00] * rho
+    dtau_dlam[c00] = -lam_mu[c00] * rho
+    dtau_dmu[c00] = -lam_mu[c00] * rho
+    dtau_drho[c00] = -lam_mu[c00]
+
+    tau[c01] = 1 + lam[c01] * rho
+    dtau_dlam[c01] = lam[c01] * rho
+    dtau_drho[c01] = lam[c01]
+
+    tau[c10] = 1 + mu[c10] * rho
+    dtau_dmu[c10] = mu[c10] * rho
+    dtau_drho[c10] = mu[c10]
+
+    tau[c11] = 1 - rho
+    dtau_drho[c11] = -1.0
+
+    tau = np.maximum(tau, 1e-10)
+
+    log_lik = weights * (np.log(tau) + home_goals * log_lam - lam + away_goals * log_mu - mu)
+    nll = -log_lik.sum() + l2 * (attack @ attack + defense @ defense)
+
+    g_lam = weights * (home_goals - lam + dtau_dlam / tau)
+    g_mu = weights * (away_goals - mu + dtau_dmu / tau)
+
+    grad = np.empty_like(params)
+    grad[:n_teams] = -(np.bincount(home_idx, g_lam, n_teams) + np.bincount(away_idx, g_mu, n_teams)) + 2 * l2 * attack
+    grad[n_teams:2 * n_teams] = -(np.bincount(away_idx, g_lam, n_teams) + np.bincount(home_idx, g_mu, n_teams)) + 2 * l2 * defense
+    grad[-2] = -g_lam.sum()
+    grad[-1] = -(weights * dtau_drho / tau).sum()
+    return nll, grad
 
-        # Expected Goals
-        # Home Goals = Home Attack * Away Defense * League Avg Home Goals
-        home_xg = self.attack_strength[home_team]['home'] * self.defense_strength[away_team]['away'] * self.league_avg_home_goals
-        
-        # Away Goals = Away Attack * Home Defense * League Avg Away Goals
-        away_xg = self.attack_strength[away_team]['away'] * self.defense_strength[home_team]['home'] * self.league_avg_away_goals
-        
-        # Calculate probabilities using Poisson distribution
-        # We simulate scores up to 10 goals
-        max_goals = 10
-        home_probs = [poisson.pmf(i, home_xg) for i in range(max_goals)]
-        away_probs = [poisson.pmf(i, away_xg) for i in range(max_goals)]
-        
-        home_win_prob = 0.0
-        draw_prob = 0.0
-        away_win_prob = 0.0
-        
-        for h in range(max_goals):
-            for a in range(max_goals):
-                prob = home_probs[h] * away_probs[a]
-                if h > a:
-                    home_win_prob += prob
-                elif h == a:
-                    draw_prob += prob
-                else:
-                    away_win_prob += prob
-                    
-        return {
-            'home_team': home_team,
-            'away_team': away_team,
-            'home_xg': home_xg,
-            'away_xg': away_xg,
-            'home_win': home_win_prob,
-            'draw': draw_prob,
-            'away_win': away_win_prob
-        }
 
 class DixonColesModel(PoissonModel):
-    def __init__(self):
-        super().__init__()
-        self.rho = 0.0 # Dependence parameter
+    def __init__(self, rho: float = -0.13, fit: str = 'ewm', xi: float = 0.0019, l2: float = 1e-3, **kwargs):
+        """
+        fit='ewm' takes strengths from the EWM goal ratios with a fixed rho.
+        fit='mle' refits attack, defense, home advantage and rho by time-decay-weighted
+        maximum likelihood (weights exp(-xi * days_ago)) every time the model advances,
+        warm-starting from the previous fit.
+        """
+        if fit not in ('ewm', 'mle'):
+            raise ValueError(f"Unknown fit method: {fit}")
+        # Dependence parameter; literature suggests rho is often around -0.13 for soccer
+        self.rho = rho
+        self.initial_rho = rho
+        self.fit = fit
+        self.xi = xi
+        self.l2 = l2
+        super().__init__(**kwargs)
 
-    def predict_match(self, home_team: str, away_team: str) -> Dict[str, float]:
+    @property
+    def params(self) -> Dict[str, Any]:
+        return {**super().params, 'rho': self.initial_rho, 'fit': self.fit, 'xi': self.xi, 'l2': self.l2}
+
+    @timed()
+    def load_history(self, history: pd.DataFrame = None):
+        super().load_history(history)
+        # Integer team codes for the vectorized likelihood
+        teams = pd.concat([self.history['home_team'], self.history['away_team']]).unique()
+        self.team_index = {team: i for i, team in enumerate(teams)}
+        self._home_idx = self.history['home_team'].map(self.team_index).values.astype(np.int64)
+        self._away_idx = self.history['away_team'].map(self.team_index).values.astype(np.int64)
+        self._home_goals = self.history['home_score'].values.astype(float)
+        self._away_goals = self.history['away_score'].values.astype(float)
+
+    def reset(self):
+        super().reset()
+        # The MLE fit (and the rho it estimated) is state too: replaying from scratch must not warm-start from it
+        self.mle_params = None
+        self.rho = self.initial_rho
+
+    @timed()
+    def advance_to(self, max_date=None):
+        super().advance_to(max_date)
+        if self.fit == 'mle' and self._cursor > 0:
+            self.fit_mle(max_date)
+
+    @timed()
+    def fit_mle(self, as_of=None):
         """
-        Predicts match outcome using Dixon-Coles adjustment.
+        Fits attack/defense/home advantage/rho on all matches fed so far with L-BFGS-B.
+        Matches are weighted by exp(-xi * days before as_of); the previous solution is the starting point.
         """
-        base_pred = super().predict_match(home_team, away_team)
-        if not base_pred:
-            return {}
-            
-        home_xg = base_pred['home_xg']
-        away_xg = base_pred['away_xg']
-        
-        # Dixon-Coles Adjustment
-        # We need to recalculate the probability matrix with the adjustment
-        max_goals = 10
-        home_probs = [poisson.pmf(i, home_xg) for i in range(max_goals)]
-        away_probs = [poisson.pmf(i, away_xg) for i in range(max_goals)]
-        
-        # Rho correction (using a fixed rho for now, or we can optimize)
-        # Literature suggests rho is often around -0.13 for soccer
-        self.rho = -0.13 
-        
-        matrix = np.outer(home_probs, away_probs)
-        
-        # Apply adjustment factor tau(x, y)
-        # tau(0, 0) = 1 - (lambda*mu*rho)
-        # tau(0, 1) = 1 + (lambda*rho)
-        # tau(1, 0) = 1 + (mu*rho)
-        # tau(1, 1) = 1 - rho
-        # All others = 1
-        
-        def tau(x, y, lam, mu, rho):
-            if x == 0 and y == 0:
-                return 1 - (lam * mu * rho)
-            elif x == 0 and y == 1:
-                return 1 + (lam * rho)
-            elif x == 1 and y == 0:
-                return 1 + (mu * rho)
-            elif x == 1 and y == 1:
-                return 1 - rho
-            else:
-                return 1.0
-                
-        # Apply correction to the matrix
-        # We only need to correct 0-0, 0-1, 1-0, 1-1
-        # But we must ensure probabilities sum to 1? 
-        # Dixon-Coles usually doesn't strictly sum to 1 after adjustment without normalization, 
-        # but the adjustment is small.
-        
-        new_matrix = np.zeros((max_goals, max_goals))
-        
-        for h in range(max_goals):
-            for a in range(max_goals):
-                correction = tau(h, a, home_xg, away_xg, self.rho)
-                new_matrix[h, a] = matrix[h, a] * correction
-                
-        # Normalize to ensure sum is 1
-        new_matrix /= new_matrix.sum()
-        
-        home_win_prob = np.sum(np.tril(new_matrix, -1))
-        draw_prob = np.trace(new_matrix)
-        away_win_prob = np.sum(np.triu(new_matrix, 1))
-        
-        return {
-            'home_team': home_team,
-            'away_team': away_team,
-            'home_xg': home_xg,
-            'away_xg': away_xg,
-            'home_win': home_win_prob,
-            'draw': draw_prob,
-            'away_win': away_win_prob
-        }
+        n = self._cursor
+        dates = self._dates[:n]
+        as_of = np.datetime64(pd.to_datetime(as_of)) if as_of is not None else dates[-1]
+        days_ago = (as_of - dates) / np.timedelta64(1, 'D')
+        weights = np.exp(-self.xi * days_ago)
+
+        n_teams = len(self.team_index)
+        cold_start = np.zeros(2 * n_teams + 2)
+        cold_start[-2] = 0.25  # Typical log home advantage
+        cold_start[-1] = self.initial_rho
+
+        bounds = [(None, None)] * (2 * n_teams + 1) + [(-0.25, 0.25)]
+        args = (self._home_idx[:n], self._away_idx[:n], self._home_goals[:n], self._away_goals[:n],
+                weights, n_teams, self.l2)
+        x0 = cold_start if self.mle_params is None else self.mle_params
+        result = minimize(dixon_coles_nll, x0, jac=True, method='L-BFGS-B', bounds=bounds, args=args)
+        if not result.success and self.mle_params is not None:
+            # Fits on the first few matches put strengths far out (a team's only match was a 0-4);
+            # the line search can stall from there, so start again from scratch
+            result = minimize(dixon_coles_nll, cold_start, jac=True, method='L-BFGS-B', bounds=bounds, args=args)
+        self.mle_params = result.x
+        self.rho = float(result.x[-1])
+        self._pair_table = None
+        return result
+
+    def expected_goals_batch(self, home_teams, away_teams) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if self.fit != 'mle' or self.mle_params is None:
+            return super().expected_goals_batch(home_teams, away_teams)
+
+        n_teams = len(self.team_index)
+        attack = self.mle_params[:n_teams]
+        defense = self.mle_params[n_teams:2 * n_teams]
+        home_adv = self.mle_params[-2]
+
+        # Only teams that have played before the current date can be predicted
+        home_idx = np.array([self.team_index[t] if t in self.team_state else -1 for t in home_teams], dtype=np.int64)
+        away_idx = np.array([self.team_index[t] if t in self.team_state else -1 for t in away_teams], dtype=np.int64)
+        valid = (home_idx >= 0) & (away_idx >= 0)
+
+        home_xg = np.where(valid, np.exp(attack[home_idx] + defense[away_idx] + home_adv), np.nan)
+        away_xg = np.where(valid, np.exp(attack[away_idx] + defense[home_idx]), np.nan)
+        return home_xg, away_xg, valid
+
+    def score_matrices(self, home_xg: np.ndarray, away_xg: np.ndarray) -> np.ndarray:
+        """
+        Dixon-Coles adjusted scoreline tensor (n, MAX_GOALS, MAX_GOALS).
+
+        tau(0, 0) = 1 - (lambda*mu*rho)
+        tau(0, 1) = 1 + (lambda*rho)
+        tau(1, 0) = 1 + (mu*rho)
+        tau(1, 1) = 1 - rho
+        All others = 1
+        """
+        lam = np.asarray(home_xg, dtype=float)
+        mu = np.asarray(away_xg, dtype=float)
+        matrices = super().score_matrices(lam, mu)
+        rho = self.rho
+
+        # Only the four low-scoring cells are corrected
+        matrices[:, 0, 0] *= 1 - lam * mu * rho
+        matrices[:, 0, 1] *= 1 + lam * rho
+        matrices[:, 1, 0] *= 1 + mu * rho
+        matrices[:, 1, 1] *= 1 - rho
+
+        # Normalize to ensure each matrix sums to 1
+        matrices /= matrices.sum(axis=(1, 2), keepdims=True)
+        return matrices
 
     def predict_ou_btts(self, home_team: str, away_team: str) -> Dict[str, float]:
         """
         Calculates Over/Under 2.5 and BTTS probabilities from the scoreline matrix.
         """
-        base_pred = super().predict_match(home_team, away_team)
-        if not base_pred:
+        pred = self._predict_single(home_team, away_team)
+        if not pred:
             return {}
-            
-        home_xg = base_pred['home_xg']
-        away_xg = base_pred['away_xg']
-        
-        # Rebuild the Dixon-Coles adjusted matrix
-        max_goals = 10
-        home_probs = [poisson.pmf(i, home_xg) for i in range(max_goals)]
-        away_probs = [poisson.pmf(i, away_xg) for i in range(max_goals)]
-        
-        self.rho = -0.13 
-        matrix = np.outer(home_probs, away_probs)
-        
-        def tau(x, y, lam, mu, rho):
-            if x == 0 and y == 0:
-                return 1 - (lam * mu * rho)
-            elif x == 0 and y == 1:
-                return 1 + (lam * rho)
-            elif x == 1 and y == 0:
-                return 1 + (mu * rho)
-            elif x == 1 and y == 1:
-                return 1 - rho
-            else:
-                return 1.0
-        
-        new_matrix = np.zeros((max_goals, max_goals))
-        for h in range(max_goals):
-            for a in range(max_goals):
-                correction = tau(h, a, home_xg, away_xg, self.rho)
-                new_matrix[h, a] = matrix[h, a] * correction
-       
-        new_matrix /= new_matrix.sum()
-        
-        # Calculate Over/Under 2.5
-        over_2_5 = 0.0
-        under_2_5 = 0.0
-        btts_yes = 0.0
-        btts_no = 0.0
-        
-        for h in range(max_goals):
-            for a in range(max_goals):
-                total_goals = h + a
-                prob = new_matrix[h, a]
-                
-                if total_goals > 2.5:
-                    over_2_5 += prob
-                else:
-                    under_2_5 += prob
-                
-                if h > 0 and a > 0:
-                    btts_yes += prob
-                else:
-                    btts_no += prob
-        
-        return {
-            'home_team': home_team,
-            'away_team': away_team,
-            'over_2_5': over_2_5,
-            'under_2_5': under_2_5,
-            'btts_yes': btts_yes,
-            'btts_no': btts_no
-        }
+        return {k: pred[k] for k in ('home_team', 'away_team', 'over_2_5', 'under_2_5', 'btts_yes', 'btts_no')}
 
 if __name__ == "__main__":
     model = PoissonModel()
@@ -1,138 +1,110 @@
 import pandas as pd
 import numpy as np
 from .database import Database
+from .snapshot import AnalyticSnapshot, league_rows
+from .betting import BetEvaluator
+from .profiling import timed
 from .models import DixonColesModel
+from .implied_probability import add_fair_columns, fair_matrix
+from .prediction_cache import walk_forward_predict
 import logging
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Odds columns of one market, de-vigged together
+MARKET_COLUMNS = {'ou_2_5': ['over_2_5', 'under_2_5'], 'btts': ['btts_yes', 'btts_no']}
+
 class NicheBacktester:
-    def __init__(self, start_date='2023-09-01', bankroll=10000.0, stake_size=100.0):
-        self.db = Database()
-        self.model = DixonColesModel()
+    def __init__(self, start_date='2023-09-01', bankroll=10000.0, stake_size=100.0, model=None, edge_threshold=0.05, prediction_cache=None, db=None, league=None, devig='multiplicative'):
+        self.db = db or Database()
+        self.snapshot = AnalyticSnapshot(db=self.db)
+        self.league = league
+        self.model = model if model is not None else DixonColesModel(db=self.db, league=league)
         self.start_date = pd.to_datetime(start_date)
+        self.initial_bankroll = bankroll
         self.bankroll = bankroll
         self.stake_size = stake_size
+        self.edge_threshold = edge_threshold
+        # Overround removal method for the implied probabilities (implied_probability.METHODS);
+        # None compares against the raw 1/odds
+        self.devig = devig
+        # Optional PredictionCache shared across backtests of the same model configuration
+        self.prediction_cache = prediction_cache
         self.history = []
+        self.evaluator = BetEvaluator(['O2.5', 'U2.5', 'BTTS_Y', 'BTTS_N'])
 
-    def run(self):
-        """Runs the backtest on niche markets (O/U and BTTS)."""
-        logger.info("Starting niche markets backtest...")
+    @timed()
+    def load_data(self) -> pd.DataFrame:
+        """Loads matches joined with Bet365 odds (plus their fair probabilities), ordered by date."""
+        # Matches joined with Bet365 odds, both read from the Parquet snapshot
+        matches = league_rows(self.snapshot.load('matches', nullable=False, columns=[
+            'id', 'match_no', 'date', 'home_team', 'away_team', 'home_score', 'away_score', 'league']), self.league)
+        odds = self.snapshot.load('odds', nullable=False, columns=[
+            'match_no', 'over_2_5', 'under_2_5', 'btts_yes', 'btts_no', 'bookmaker'])
+        odds = odds[(odds['bookmaker'] == 'Bet365') & odds['over_2_5'].notna()]
+        data = matches.merge(odds, on='match_no').sort_values('date', kind='stable').reset_index(drop=True)
+        data = data[['id', 'date', 'home_team', 'away_team', 'home_score', 'away_score',
+                     'over_2_5', 'under_2_5', 'btts_yes', 'btts_no', 'bookmaker']]
         
-        # Fetch all matches and odds
-        self.db.connect()
-        query = """
-            SELECT m.id, m.date, m.home_team, m.away_team, m.home_score, m.away_score,
-                   o.over_2_5, o.under_2_5, o.btts_yes, o.btts_no, o.bookmaker
-            FROM matches m
-            JOIN odds o ON m.id = o.match_id
-            WHERE o.bookmaker = 'Bet365' AND o.over_2_5 IS NOT NULL
-            ORDER BY m.date ASC
+        data['date'] = pd.to_datetime(data['date'])
+        if self.devig is not None:
+            data = add_fair_columns(data, MARKET_COLUMNS, self.devig)
+        return data
+
+    @timed()
+    def predict(self, test_matches: pd.DataFrame, history: pd.DataFrame = None) -> pd.DataFrame:
+        """Walk-forward predictions aligned with test_matches (see prediction_cache.walk_forward_predict)."""
+        return walk_forward_predict(self.model, test_matches, history, self.prediction_cache)
+
+    @timed()
+    def run(self, data: pd.DataFrame = None, history: pd.DataFrame = None):
         """
-        data = pd.read_sql_query(query, self.db.conn)
-        self.db.close()
+        Runs the backtest on niche markets (O/U and BTTS).
+        data/history can be passed in (e.g. by the parameter sweep) to skip the database reads.
+        """
+        logger.info("Starting niche markets backtest...")
         
-        data['date'] = pd.to_datetime(data['date'])
+        if data is None:
+            data = self.load_data()
         
         test_matches = data[data['date'] >= self.start_date]
         logger.info(f"Backtesting on {len(test_matches)} matches starting from {self.start_date.date()}")
         
-        total_bets = 0
-        wins = 0
-        current_date = None
+        # Predict niche markets
+        preds = self.predict(test_matches, history)
+        probs = preds[['over_2_5', 'under_2_5', 'btts_yes', 'btts_no']].to_numpy(dtype=float)
+        odds = test_matches[['over_2_5', 'under_2_5', 'btts_yes', 'btts_no']].to_numpy(dtype=float)
+        implied = None if self.devig is None else fair_matrix(test_matches, MARKET_COLUMNS, self.devig)
+        
+        # Determine results
+        home_score = test_matches['home_score'].to_numpy()
+        away_score = test_matches['away_score'].to_numpy()
+        total_goals = home_score + away_score
+        both_score = (home_score > 0) & (away_score > 0)
+        outcomes = np.column_stack([total_goals > 2.5, total_goals < 2.5, both_score, ~both_score])
+        
+        strategy = {'name': 'niche', 'edge_threshold': self.edge_threshold, 'stake': self.stake_size}
+        bets, summary = self.evaluator.evaluate(probs, odds, outcomes, [strategy], implied=implied, bankroll=self.bankroll)
         
-        for idx, row in test_matches.iterrows():
-            match_date = row['date']
-            
-            # Re-train model daily
-            if current_date != match_date:
-                self.model.train(max_date=match_date)
-                current_date = match_date
-            
-            # Predict niche markets
-            pred = self.model.predict_ou_btts(row['home_team'], row['away_team'])
-            if not pred:
-                continue
-            
-            # Betting Logic
-            bets = []
-            
-            # Over 2.5
-            if row['over_2_5'] and row['over_2_5'] > 1.0:
-                implied = 1.0 / row['over_2_5']
-                edge = pred['over_2_5'] - implied
-                if edge > 0.05:  # 5% edge threshold
-                    bets.append(('O2.5', row['over_2_5'], pred['over_2_5'], edge))
-            
-            # Under 2.5
-            if row['under_2_5'] and row['under_2_5'] > 1.0:
-                implied = 1.0 / row['under_2_5']
-                edge = pred['under_2_5'] - implied
-                if edge > 0.05:
-                    bets.append(('U2.5', row['under_2_5'], pred['under_2_5'], edge))
-            
-            # BTTS Yes (if available)
-            if row['btts_yes'] and row['btts_yes'] > 1.0:
-                implied = 1.0 / row['btts_yes']
-                edge = pred['btts_yes'] - implied
-                if edge > 0.05:
-                    bets.append(('BTTS_Y', row['btts_yes'], pred['btts_yes'], edge))
-            
-            # BTTS No (if available)
-            if row['btts_no'] and row['btts_no'] > 1.0:
-                implied = 1.0 / row['btts_no']
-                edge = pred['btts_no'] - implied
-                if edge > 0.05:
-                    bets.append(('BTTS_N', row['btts_no'], pred['btts_no'], edge))
-            
-            # Determine results
-            total_goals = row['home_score'] + row['away_score']
-            result_ou = 'O2.5' if total_goals > 2.5 else 'U2.5'
-            result_btts = 'BTTS_Y' if (row['home_score'] > 0 and row['away_score'] > 0) else 'BTTS_N'
-            
-            # Execute Bets
-            for bet_type, odds, prob, edge in bets:
-                total_bets += 1
-                wager = self.stake_size
-                
-                pnl = -wager
-                won = False
-                
-                if bet_type in ['O2.5', 'U2.5']:
-                    if bet_type == result_ou:
-                        pnl = wager * (odds - 1)
-                        won = True
-                        wins += 1
-                elif bet_type in ['BTTS_Y', 'BTTS_N']:
-                    if bet_type == result_btts:
-                        pnl = wager * (odds - 1)
-                        won = True
-                        wins += 1
-                
-                self.bankroll += pnl
-                
-                self.history.append({
-                    'date': match_date,
-                    'match': f"{row['home_team']} vs {row['away_team']}",
-                    'bet': bet_type,
-                    'odds': odds,
-                    'prob': prob,
-                    'edge': edge,
-                    'won': won,
-                    'pnl': pnl,
-                    'bankroll': self.bankroll
-                })
+        rows = test_matches.iloc[bets['row'].to_numpy()]
+        self.history = pd.DataFrame({
+            'date': rows['date'].to_numpy(),
+            'match': (rows['home_team'] + ' vs ' + rows['away_team']).to_numpy(),
+            'bet': bets['bet'].to_numpy(),
+            'odds': bets['odds'].to_numpy(),
+            'prob': bets['prob'].to_numpy(),
+            'edge': bets['edge'].to_numpy(),
+            'won': bets['won'].to_numpy(),
+            'pnl': bets['pnl'].to_numpy(),
+            'bankroll': bets['bankroll'].to_numpy()
+        })
         
         # Summary
-        roi = ((self.bankroll - 10000.0) / (total_bets * self.stake_size)) * 100 if total_bets > 0 else 0
-        logger.info(f"Backtest Complete.")
-        logger.info(f"Total Bets: {total_bets}")
-        logger.info(f"Win Rate: {wins/total_bets:.2%}" if total_bets > 0 else "Win Rate: 0%")
-        logger.info(f"Final Bankroll: ${self.bankroll:.2f}")
-        logger.info(f"ROI: {roi:.2f}%")
+        self.bankroll = summary.iloc[0]['final_bankroll']
+        self.evaluator.log_summary(summary.iloc[0])
         
-        return pd.DataFrame(self.history)
+        return self.history
 
 if __name__ == "__main__":
     backtester = NicheBacktester()
@@ -1,100 +1,188 @@
-import soccerdata as sd
 import pandas as pd
+import numpy as np
 import logging
-import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import List, Optional, Union
 from .database import Database
+from .teams import FOOTBALL_DATA_CODES, canonical_team
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+ODDS_URL = "https://www.football-data.co.uk/mmz4281/{season}/{league}.csv"
+ODDS_CACHE_DIR = Path(__file__).parent / "data" / "odds_cache"
+
+# football-data.co.uk column -> odds table column, per bookmaker (stored in odds.bookmaker).
+# Max/Average are the best and mean prices across the bookmakers football-data tracks;
+# before 2019-20 they came from BetBrain (BbMx*/BbAv*). Where a file has several
+# spellings of one field, the first listed wins.
+BOOKMAKER_COLUMNS = {
+    'Bet365': {'B365H': 'home_win', 'B365D': 'draw', 'B365A': 'away_win',
+               'B365>2.5': 'over_2_5', 'B365<2.5': 'under_2_5'},
+    'Pinnacle': {'PSH': 'home_win', 'PSD': 'draw', 'PSA': 'away_win',
+                 'P>2.5': 'over_2_5', 'P<2.5': 'under_2_5'},
+    'Max': {'MaxH': 'home_win', 'MaxD': 'draw', 'MaxA': 'away_win',
+            'Max>2.5': 'over_2_5', 'Max<2.5': 'under_2_5',
+            'BbMxH': 'home_win', 'BbMxD': 'draw', 'BbMxA': 'away_win',
+            'BbMx>2.5': 'over_2_5', 'BbMx<2.5': 'under_2_5'},
+    'Average': {'AvgH': 'home_win', 'AvgD': 'draw', 'AvgA': 'away_win',
+                'Avg>2.5': 'over_2_5', 'Avg<2.5': 'under_2_5',
+                'BbAvH': 'home_win', 'BbAvD': 'draw', 'BbAvA': 'away_win',
+                'BbAv>2.5': 'over_2_5', 'BbAv<2.5': 'under_2_5'}
+}
+# football-data has no BTTS prices, so odds.btts_yes/btts_no stay NULL for collected rows
+ODDS_FIELDS = ['home_win', 'draw', 'away_win', 'over_2_5', 'under_2_5']
+
 class OddsCollector:
-    def __init__(self, season: str = '2324'):
-        self.season = season
-        self.db = Database()
-        self.csv_url = f"https://www.football-data.co.uk/mmz4281/{season}/E0.csv"
+    """
+    Downloads football-data.co.uk odds CSVs for several seasons and leagues
+    (E0 = Premier League, E1 = Championship, ...) into a local file cache and
+    bulk-loads every bookmaker in BOOKMAKER_COLUMNS. Leagues may also be given by
+    their soccerdata id (see teams.FOOTBALL_DATA_CODES). Odds rows join to matches
+    through match_id, so they need no league column of their own.
+    """
+
+    def __init__(self, seasons: Union[str, List[str]] = '2324', leagues: Union[str, List[str]] = 'E0',
+                 cache_dir: Path = ODDS_CACHE_DIR, max_workers: int = 8, db: Database = None):
+        self.seasons = [seasons] if isinstance(seasons, str) else list(seasons)
+        leagues = [leagues] if isinstance(leagues, str) else list(leagues)
+        self.leagues = [FOOTBALL_DATA_CODES.get(league, league) for league in leagues]
+        self.cache_dir = Path(cache_dir)
+        self.max_workers = max_workers
+        self.db = db or Database()
 
-    def fetch_and_save_odds(self):
-        """Fetches historical odds from football-data.co.uk and saves to DB."""
+    def cache_path(self, season: str, league: str) -> Path:
+        return self.cache_dir / f"{league}_{season}.csv"
+
+    def download(self, season: str, league: str, refresh: bool = False) -> Optional[Path]:
+        """
+        Returns the cached CSV for a season/league, downloading it first if missing
+        (or if refresh=True). Falls back to the cached copy when the download fails.
+        """
+        path = self.cache_path(season, league)
+        if path.exists() and not refresh:
+            return path
+
+        url = ODDS_URL.format(season=season, league=league)
         try:
-            logger.info(f"Downloading odds from {self.csv_url}...")
-            # Read CSV directly into DataFrame
-            df = pd.read_csv(self.csv_url)
-            
-            logger.info(f"Found {len(df)} odds entries.")
-            
-            # Iterate and save
-            for idx, row in df.iterrows():
-                # Date format in CSV is usually dd/mm/yyyy
-                date_str = row['Date']
-                try:
-                    date = pd.to_datetime(date_str, dayfirst=True)
-                except:
-                    logger.warning(f"Could not parse date: {date_str}")
-                    continue
-                
-                home_team = row['HomeTeam']
-                away_team = row['AwayTeam']
-                
-                # Team Name Mapping
-                # FBref and Football-Data use slightly different names
-                # We need a simple mapper or fuzzy match. 
-                # Let's try to match by creating the ID and if it fails, we log it.
-                # But wait, we need to match the ID we created in historical_data.py
-                # ID format: YYYY-MM-DD_HomeTeam_AwayTeam
-                
-                # Mappings for common mismatches
-                team_map = {
-                    "Man City": "Manchester City",
-                    "Man United": "Manchester Utd",
-                    "Nott'm Forest": "Nott'ham Forest",
-                    "Sheffield United": "Sheffield Utd",
-                    "Luton": "Luton Town",
-                    "Spurs": "Tottenham"
-                }
-                
-                home_team_mapped = team_map.get(home_team, home_team)
-                away_team_mapped = team_map.get(away_team, away_team)
-                
-                match_id = f"{date.strftime('%Y-%m-%d')}_{home_team_mapped}_{away_team_mapped}".replace(" ", "")
-                
-                # Bet365 Odds - 1x2
-                home_win = row.get('B365H')
-                draw = row.get('B365D')
-                away_win = row.get('B365A')
-                
-                # Bet365 Odds - Over/Under 2.5
-                over_2_5 = row.get('B365>2.5')
-                under_2_5 = row.get('B365<2.5')
-                
-                # BTTS (Both Teams To Score)
-                # Note: CSV may use different column names like 'BbAHh' or might not have BTTS
-                # Let's check common variations
-                btts_yes = row.get('BbMxAHY')  # Max BTTS Yes
-                btts_no = row.get('BbMxAHN')   # Max BTTS No
-                
-                if pd.isna(home_win):
+            logger.info(f"Downloading odds from {url}...")
+            with urllib.request.urlopen(url, timeout=30) as response:
+                content = response.read()
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix('.tmp')
+            tmp.write_bytes(content)
+            tmp.replace(path)
+            return path
+        except Exception as e:
+            if path.exists():
+                logger.warning(f"Download of {url} failed ({e}); using cached {path.name}")
+                return path
+            logger.error(f"Download of {url} failed and no cached copy exists: {e}")
+            return None
+
+    @staticmethod
+    def read_csv(path: Path) -> pd.DataFrame:
+        # Recent files are UTF-8 (with BOM), older seasons are Latin-1
+        try:
+            return pd.read_csv(path, encoding='utf-8-sig')
+        except UnicodeDecodeError:
+            return pd.read_csv(path, encoding='latin-1')
+
+    @staticmethod
+    def parse_odds(df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Vectorized conversion of a football-data CSV into odds rows:
+        one row per match and bookmaker, with columns match_id, bookmaker and ODDS_FIELDS.
+        """
+        if df.empty or 'Date' not in df.columns:
+            return pd.DataFrame(columns=['match_id', 'bookmaker'] + ODDS_FIELDS)
+
+        # Dates are dd/mm/yyyy (dd/mm/yy in older seasons)
+        dates = pd.to_datetime(df['Date'], dayfirst=True, format='mixed', errors='coerce')
+        valid = dates.notna() & df['HomeTeam'].notna() & df['AwayTeam'].notna()
+        if (~valid).any():
+            logger.warning(f"Skipping {int((~valid).sum())} rows with unparseable dates or teams")
+        df = df[valid]
+        dates = dates[valid]
+
+        # Football-Data names differ from FBref ("Man United", "Nott'm Forest", ...);
+        # map the unique names once through the canonical alias table
+        names = pd.unique(pd.concat([df['HomeTeam'], df['AwayTeam']]))
+        canonical = {name: canonical_team(name) for name in names}
+        match_ids = (dates.dt.strftime('%Y-%m-%d') + '_' + df['HomeTeam'].map(canonical) + '_'
+                     + df['AwayTeam'].map(canonical)).str.replace(' ', '', regex=False)
+
+        frames = []
+        for bookmaker, columns in BOOKMAKER_COLUMNS.items():
+            present = {}
+            for src, dst in columns.items():
+                if src in df.columns and dst not in present.values():
+                    present[src] = dst
+            if 'home_win' not in present.values():
+                continue
+            prices = df[list(present)].rename(columns=present).apply(pd.to_numeric, errors='coerce')
+            prices = prices.reindex(columns=ODDS_FIELDS)
+            prices.insert(0, 'bookmaker', bookmaker)
+            prices.insert(0, 'match_id', match_ids)
+            frames.append(prices[prices['home_win'].notna()])
+
+        if not frames:
+            return pd.DataFrame(columns=['match_id', 'bookmaker'] + ODDS_FIELDS)
+        return pd.concat(frames, ignore_index=True)
+
+    def log_unmatched(self, match_ids: pd.Series) -> List[str]:
+        """
+        Logs (and returns) odds match ids with no row in matches: usually a team spelling
+        missing from teams.TEAM_ALIASES, or a fixture FBref hasn't been imported for yet.
+        Those odds never join to a match, so the backtests would skip them silently.
+        """
+        known = set(self.db.read_sql("SELECT id FROM matches")['id'])
+        unmatched = sorted(set(match_ids) - known)
+        if unmatched:
+            # Team names involved, most frequent first, to point at the missing aliases
+            teams = pd.Series([team for match_id in unmatched for team in match_id.split('_')[1:]]).value_counts()
+            logger.warning(f"{len(unmatched)} odds match ids don't resolve to a match (e.g. {unmatched[:5]}); "
+                           f"most frequent teams: {teams.head(10).index.tolist()}")
+        return unmatched
+
+    def fetch_and_save_odds(self, refresh: bool = False) -> int:
+        """
+        Fetches every season/league concurrently (served from the cache where possible),
+        parses them and writes all bookmakers in one transaction. Returns the row count.
+        """
+        try:
+            jobs = [(season, league) for league in self.leagues for season in self.seasons]
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                paths = list(pool.map(lambda job: self.download(*job, refresh=refresh), jobs))
+
+            frames = []
+            for (season, league), path in zip(jobs, paths):
+                if path is None:
                     continue
-                    
-                self.db.save_odds(
-                    match_id, 
-                    "Bet365", 
-                    float(home_win), 
-                    float(draw), 
-                    float(away_win),
-                    float(over_2_5) if not pd.isna(over_2_5) else None,
-                    float(under_2_5) if not pd.isna(under_2_5) else None,
-                    float(btts_yes) if not pd.isna(btts_yes) else None,
-                    float(btts_no) if not pd.isna(btts_no) else None
-                )
-                
-            logger.info("Odds import complete.")
-            
+                parsed = self.parse_odds(self.read_csv(path))
+                logger.info(f"{league} {season}: {len(parsed)} odds rows")
+                frames.append(parsed)
+
+            if not frames:
+                logger.warning("No odds files available.")
+                return 0
+
+            odds = pd.concat(frames, ignore_index=True)
+            # NaN -> None so SQLite stores NULL
+            rows = odds.astype(object).where(odds.notna(), None).to_dict('records')
+            self.db.save_odds_bulk(rows)
+            self.log_unmatched(odds['match_id'])
+            logger.info(f"Odds import complete ({len(rows)} rows).")
+            return len(rows)
+
         except Exception as e:
             logger.error(f"Error fetching odds: {e}")
             import traceback
             traceback.print_exc()
+            return 0
 
 if __name__ == "__main__":
-    collector = OddsCollector(season='2324')
+    collector = OddsCollector(seasons=['2122', '2223', '2324'], leagues=['E0'])
     collector.fetch_and_save_odds()
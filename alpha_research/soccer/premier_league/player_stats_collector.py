@@ -1,23 +1,97 @@
 import soccerdata as sd
 import pandas as pd
 from .database import Database
+from .teams import DEFAULT_LEAGUE, canonical_team, make_match_id
 import logging
+import threading
 import time
-import random
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Any, List, Union
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def fetch_and_save_player_stats_incremental():
+# Flattened FBref summary columns -> player_stats columns
+STAT_COLUMNS = {
+    'min': 'minutes',
+    'Performance_Gls': 'goals',
+    'Performance_Ast': 'assists',
+    'Performance_Sh': 'shots',
+    'Performance_SoT': 'shots_on_target',
+    'Expected_xG': 'xg',
+    'Expected_xAG': 'xa',
+    'Expected_npxG': 'npxg'
+}
+COUNT_STATS = ['minutes', 'goals', 'assists', 'shots', 'shots_on_target']
+EXPECTED_STATS = ['xg', 'xa', 'npxg']
+
+class RateLimiter:
+    """Thread-safe limiter that spaces calls at least min_interval seconds apart."""
+
+    def __init__(self, requests_per_minute: float):
+        self.min_interval = 60.0 / requests_per_minute
+        self.lock = threading.Lock()
+        self.next_time = 0.0
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_time - now
+            self.next_time = max(now, self.next_time) + self.min_interval
+        if delay > 0:
+            time.sleep(delay)
+
+def match_page_cached(fbref: sd.FBref, game_id: str) -> bool:
+    """Whether soccerdata already has the FBref match page in its cache (reading it costs no request)."""
+    return (Path(fbref.data_dir) / "matches" / f"{game_id}.html").exists()
+
+def parse_player_stats(df: pd.DataFrame, match_id: str) -> List[Dict[str, Any]]:
+    """
+    Vectorized conversion of an FBref player summary table into player_stats rows.
+    Players with missing minutes or counting stats are dropped; missing xG values become 0.
     """
-    Fetches player match stats from FBref match by match and saves to database.
+    if df.empty:
+        return []
+    df = df.reset_index()
+    # Columns are like ('Performance', 'Gls') or ('min', ''); join them with '_'
+    df.columns = ['_'.join(col).strip('_') if isinstance(col, tuple) else col for col in df.columns.values]
+
+    stats = pd.DataFrame({
+        'match_id': match_id,
+        'team': df['team'].map(canonical_team),
+        'player': df['player'],
+        'position': df['pos'].fillna('') if 'pos' in df.columns else ''
+    })
+    for src, dst in STAT_COLUMNS.items():
+        stats[dst] = pd.to_numeric(df[src], errors='coerce') if src in df.columns else 0
+    stats[EXPECTED_STATS] = stats[EXPECTED_STATS].fillna(0.0).astype(float)
+
+    stats = stats.dropna(subset=COUNT_STATS)
+    stats[COUNT_STATS] = stats[COUNT_STATS].astype(int)
+    return stats.to_dict('records')
+
+def fetch_and_save_player_stats_incremental(seasons: Union[str, List[str]] = None, max_workers: int = 4,
+                                            requests_per_minute: float = 10, batch_size: int = 20,
+                                            league: str = DEFAULT_LEAGUE):
+    """
+    Fetches player match stats from FBref and saves them to the database.
+
+    Resumable: matches whose match_id already has player stats are skipped, and results
+    are committed every batch_size matches, so an interrupted backfill continues where
+    it stopped. Fetches run on a bounded thread pool, each worker with its own FBref
+    reader (readers share a requests session and aren't thread-safe); requests_per_minute
+    keeps the combined rate of actual downloads polite (FBref blocks clients that go much
+    above ~10/min), while pages already in soccerdata's cache are read without waiting.
     """
+    seasons = ['2324'] if seasons is None else seasons
+    seasons = [seasons] if isinstance(seasons, str) else list(seasons)
     db = Database()
-    fbref = sd.FBref(leagues="ENG-Premier League", seasons="2324")
-    
+    fbref = sd.FBref(leagues=league, seasons=seasons)
+
     logger.info("Fetching schedule...")
     schedule = fbref.read_schedule()
-    
+
     # Check for game_id presence
     if 'game_id' not in schedule.columns:
         # Sometimes it's in the index?
@@ -26,125 +100,61 @@ def fetch_and_save_player_stats_incremental():
             logger.error("Could not find 'game_id' in schedule.")
             return
 
-    game_ids = schedule['game_id'].unique()
-    logger.info(f"Found {len(game_ids)} matches.")
-    
-    # Helper to map team names
-    def clean_team_name(name):
-        mapping = {
-            "Brighton & Hove Albion": "Brighton",
-            "West Ham United": "West Ham",
-            "Tottenham Hotspur": "Tottenham",
-            "Wolverhampton Wanderers": "Wolves",
-            "Nottingham Forest": "Nott'ham Forest",
-            "Sheffield United": "Sheffield Utd",
-            "Luton Town": "Luton",
-            "Manchester United": "Man United",
-            "Newcastle United": "Newcastle"
-        }
-        return mapping.get(name, name)
-
-    # Check existing data to skip
+    # Only played matches have stats
+    if 'score' in schedule.columns:
+        schedule = schedule[schedule['score'].notna()]
+    schedule = schedule.dropna(subset=['game_id', 'date']).drop_duplicates('game_id')
+    schedule = schedule.assign(match_id=[make_match_id(d, h, a) for d, h, a in
+                                         zip(schedule['date'], schedule['home_team'], schedule['away_team'])])
+
+    # Checkpoint: skip everything already stored
     db.connect()
-    existing_matches = pd.read_sql_query("SELECT DISTINCT match_id FROM player_stats", db.conn)
+    existing = set(pd.read_sql_query("SELECT DISTINCT match_id FROM player_stats", db.conn)['match_id'])
     db.close()
-    
-    # We store match_id as YYYY-MM-DD_Home_Away.
-    # But here we iterate by game_id. 
-    # To check if we already have it, we need to know the mapping or just try to insert (REPLACE is fine).
-    # Since we can't easily map game_id -> our match_id without fetching, 
-    # we'll just process everything. The REPLACE query handles duplicates.
-    # Optimization: If we trust the order, we could skip?
-    # No, let's just run it. Cached ones are fast.
-
-    processed_count = 0
-    
-    # Iterate through schedule to get context
-    # schedule has index or columns: 'date', 'home_team', 'away_team', 'game_id'
-    
-    for idx, row in schedule.iterrows():
-        try:
-            game_id = row['game_id']
-            date_val = row['date']
-            home_team = row['home_team']
-            away_team = row['away_team']
-            
-            # Construct match_id upfront
-            date_str = date_val.strftime('%Y-%m-%d')
-            home_clean = clean_team_name(home_team)
-            away_clean = clean_team_name(away_team)
-            match_id = f"{date_str}_{home_clean}_{away_clean}".replace(" ", "")
-            
-            processed_count += 1
-            # Optimization: check if stats exist for this match_id
-            # if match_id in existing_matches['match_id'].values:
-            #     continue 
-            
-            logger.info(f"[{processed_count}/{len(schedule)}] Processing {match_id} (game_id={game_id})...")
-            
-            # Fetch stats
-            df = fbref.read_player_match_stats(match_id=game_id, stat_type="summary")
-            
-            if df.empty:
-                logger.warning(f"No stats for {game_id}")
+
+    todo = schedule[~schedule['match_id'].isin(existing)]
+    logger.info(f"Found {len(schedule)} matches, {len(schedule) - len(todo)} already stored, {len(todo)} to fetch.")
+    if todo.empty:
+        return
+
+    limiter = RateLimiter(requests_per_minute)
+    readers = threading.local()
+
+    def fetch(game_id: str, match_id: str) -> List[Dict[str, Any]]:
+        if not hasattr(readers, 'fbref'):
+            readers.fbref = sd.FBref(leagues=league, seasons=seasons)
+        if not match_page_cached(readers.fbref, game_id):
+            limiter.wait()
+        df = readers.fbref.read_player_match_stats(match_id=game_id, stat_type="summary")
+        return parse_player_stats(df, match_id)
+
+    pending: List[Dict[str, Any]] = []
+    pending_matches = 0
+    done = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(fetch, row.game_id, row.match_id): row for row in todo.itertuples()}
+        for future in as_completed(futures):
+            row = futures[future]
+            done += 1
+            try:
+                stats_batch = future.result()
+            except Exception as e:
+                logger.error(f"Error processing {row.game_id}: {e}")
+                continue
+
+            if not stats_batch:
+                logger.warning(f"No stats for {row.game_id}")
                 continue
-                
-            df = df.reset_index()
-            
-            # Flatten columns
-            # Columns are like ('Performance', 'Gls') or ('min', '')
-            # We join them with '_'
-            df.columns = ['_'.join(col).strip('_') for col in df.columns.values]
-            
-            stats_batch = []
-            
-            for _, p_row in df.iterrows():
-                # Team name in p_row is player's team.
-                p_team = clean_team_name(p_row['team'])
-                p_pos = p_row.get('pos', '')
-                
-                try:
-                    # Map flattened names to DB columns
-                    # min -> min
-                    # Performance_Gls -> goals
-                    # Performance_Ast -> assists
-                    # Performance_Sh -> shots
-                    # Performance_SoT -> shots_on_target
-                    # Expected_xG -> xg
-                    # Expected_xAG -> xa
-                    # Expected_npxG -> npxg
-                    
-                    minutes = int(p_row.get('min', 0))
-                    goals = int(p_row.get('Performance_Gls', 0))
-                    assists = int(p_row.get('Performance_Ast', 0))
-                    shots = int(p_row.get('Performance_Sh', 0))
-                    sot = int(p_row.get('Performance_SoT', 0))
-                    xg = float(p_row.get('Expected_xG', 0.0)) if not pd.isna(p_row.get('Expected_xG')) else 0.0
-                    xa = float(p_row.get('Expected_xAG', 0.0)) if not pd.isna(p_row.get('Expected_xAG')) else 0.0
-                    npxg = float(p_row.get('Expected_npxG', 0.0)) if not pd.isna(p_row.get('Expected_npxG')) else 0.0
-                except ValueError:
-                    continue
-                
-                stats_batch.append({
-                    'team': p_team,
-                    'player': p_row['player'],
-                    'position': p_pos,
-                    'minutes': minutes,
-                    'goals': goals,
-                    'assists': assists,
-                    'shots': shots,
-                    'shots_on_target': sot,
-                    'xg': xg,
-                    'xa': xa,
-                    'npxg': npxg
-                })
-            
-            if stats_batch:
-                db.save_player_stats(match_id, stats_batch)
-                
-        except Exception as e:
-            logger.error(f"Error processing {row.get('game_id')}: {e}")
-            continue
+
+            logger.info(f"[{done}/{len(todo)}] Fetched {row.match_id} ({len(stats_batch)} players)")
+            pending.extend(stats_batch)
+            pending_matches += 1
+            if pending_matches >= batch_size:
+                db.save_player_stats_bulk(pending)
+                pending, pending_matches = [], 0
+
+    if pending:
+        db.save_player_stats_bulk(pending)
 
     logger.info("Incremental import complete.")
 
@@ -0,0 +1,80 @@
+import pandas as pd
+import logging
+from collections import OrderedDict
+from typing import Optional, Tuple
+from .models import PoissonModel, PairTable
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class PredictionCache:
+    """
+    LRU cache of all-pairs prediction tables keyed by (model version, date).
+
+    The table for a date holds the model's probabilities for every ordered team pair
+    after training on all matches before that date, so any fixture on that date is an
+    array lookup. Backtest variants that share a model configuration (e.g. different
+    edge thresholds or markets in a sweep) share the tables.
+    """
+
+    def __init__(self, maxsize: int = 512):
+        self.maxsize = maxsize
+        self.tables: "OrderedDict[Tuple[str, pd.Timestamp], PairTable]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.tables)
+
+    def clear(self):
+        self.tables.clear()
+        self.hits = self.misses = 0
+
+    def get(self, model: PoissonModel, date) -> PairTable:
+        """
+        Table for `model` as of `date`. On a miss the model is advanced to the date
+        (its history must already be loaded) and the table is computed and stored.
+        """
+        key = (model.version, pd.Timestamp(date))
+        table = self.tables.get(key)
+        if table is not None:
+            self.hits += 1
+            self.tables.move_to_end(key)
+            return table
+
+        self.misses += 1
+        model.advance_to(date)
+        table = model.pair_table()
+        self.tables[key] = table
+        if len(self.tables) > self.maxsize:
+            self.tables.popitem(last=False)
+        return table
+
+    def predict(self, model: PoissonModel, date, fixtures: pd.DataFrame) -> pd.DataFrame:
+        """predict_batch-compatible predictions for fixtures played on `date`."""
+        return self.get(model, date).lookup(fixtures['home_team'].tolist(), fixtures['away_team'].tolist())
+
+    @property
+    def nbytes(self) -> int:
+        return sum(table.nbytes for table in self.tables.values())
+
+
+def walk_forward_predict(model: PoissonModel, test_matches: pd.DataFrame, history: pd.DataFrame = None,
+                         cache: Optional[PredictionCache] = None) -> pd.DataFrame:
+    """
+    Walk-forward predictions aligned with test_matches: the model is advanced to each
+    match date (only matches played since the previous date are processed) and the
+    day's fixtures are predicted in one batch (or looked up in the cache, when given).
+    """
+    # Load match history once; the model is advanced incrementally as we walk forward
+    model.load_history(history)
+    preds = []
+    for match_date, day in test_matches.groupby('date', sort=True):
+        if cache is not None:
+            preds.append(cache.predict(model, match_date, day).set_index(day.index))
+            continue
+        model.advance_to(match_date)
+        preds.append(model.predict_batch(day).set_index(day.index))
+    if not preds:
+        return model.predict_batch([])
+    return pd.concat(preds).reindex(test_matches.index)
@@ -0,0 +1,173 @@
+import pandas as pd
+import numpy as np
+import logging
+from typing import Dict, List, Tuple
+from .models import PoissonModel, DixonColesModel, GOALS
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+_HOME, _AWAY = np.meshgrid(GOALS, GOALS, indexing='ij')
+_TOTAL = _HOME + _AWAY
+_MARGIN = _HOME - _AWAY
+
+# Default line ladders (quarter lines included where bookmakers offer them)
+TOTAL_LINES = np.arange(0.5, 6.75, 0.25)
+HANDICAP_LINES = np.arange(-3.0, 3.25, 0.25)
+TEAM_TOTAL_LINES = np.arange(0.5, 4.0, 0.5)
+CORRECT_SCORE_MAX = 5
+
+
+def _split_line(line: float) -> List[float]:
+    """Quarter lines settle half the stake on each neighbouring half/whole line (e.g. -0.75 -> -0.5, -1.0)."""
+    if round(line * 4) % 2 == 1:
+        return [line - 0.25, line + 0.25]
+    return [line]
+
+
+def settlement_weights(margin: np.ndarray, line: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Fraction of the stake that wins and that loses in each scoreline cell for a bet
+    that wins when margin + line > 0 (whole lines push at 0, quarter lines split the stake).
+    """
+    parts = _split_line(line)
+    win = sum((margin + p > 0).astype(float) for p in parts) / len(parts)
+    loss = sum((margin + p < 0).astype(float) for p in parts) / len(parts)
+    return win, loss
+
+
+def _label(value: float) -> str:
+    return f"{value:g}"
+
+
+def build_markets(total_lines=TOTAL_LINES, handicap_lines=HANDICAP_LINES,
+                  team_total_lines=TEAM_TOTAL_LINES, correct_score_max: int = CORRECT_SCORE_MAX):
+    """
+    Market labels and their (win, loss) stake-weight masks over the scoreline grid.
+    Labels follow BetEvaluator's convention ('H', 'D', 'A', 'O2.5', 'BTTS_Y', ...):
+        1X2 / double chance: H, D, A, 1X, X2, 12
+        Totals:              O<line>, U<line>
+        Asian handicap:      AH_H<line>, AH_A<line> (line applied to that side, e.g. AH_H-0.75)
+        Team totals:         H_O<line>, H_U<line>, A_O<line>, A_U<line>
+        Both teams score:    BTTS_Y, BTTS_N
+        Correct score:       CS_<h>-<a>, CS_OTHER
+    Returns (labels, win_masks, loss_masks) with masks shaped (n_markets, MAX_GOALS, MAX_GOALS).
+    """
+    markets: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def binary(mask: np.ndarray):
+        mask = mask.astype(float)
+        return mask, 1.0 - mask
+
+    markets['H'] = binary(_MARGIN > 0)
+    markets['D'] = binary(_MARGIN == 0)
+    markets['A'] = binary(_MARGIN < 0)
+    markets['1X'] = binary(_MARGIN >= 0)
+    markets['X2'] = binary(_MARGIN <= 0)
+    markets['12'] = binary(_MARGIN != 0)
+
+    for line in total_lines:
+        markets[f"O{_label(line)}"] = settlement_weights(_TOTAL, -line)
+        markets[f"U{_label(line)}"] = settlement_weights(-_TOTAL, line)
+
+    for line in handicap_lines:
+        markets[f"AH_H{line:+g}"] = settlement_weights(_MARGIN, line)
+        markets[f"AH_A{line:+g}"] = settlement_weights(-_MARGIN, line)
+
+    for side, goals in (('H', _HOME), ('A', _AWAY)):
+        for line in team_total_lines:
+            markets[f"{side}_O{_label(line)}"] = settlement_weights(goals, -line)
+            markets[f"{side}_U{_label(line)}"] = settlement_weights(-goals, line)
+
+    both = (_HOME > 0) & (_AWAY > 0)
+    markets['BTTS_Y'] = binary(both)
+    markets['BTTS_N'] = binary(~both)
+
+    listed = np.zeros_like(_MARGIN, dtype=bool)
+    for h in range(correct_score_max + 1):
+        for a in range(correct_score_max + 1):
+            cell = (_HOME == h) & (_AWAY == a)
+            listed |= cell
+            markets[f"CS_{h}-{a}"] = binary(cell)
+    markets['CS_OTHER'] = binary(~listed)
+
+    labels = list(markets)
+    win = np.stack([markets[m][0] for m in labels])
+    loss = np.stack([markets[m][1] for m in labels])
+    return labels, win, loss
+
+
+class MarketPricer:
+    """
+    Prices many markets from one scoreline matrix per fixture.
+
+    The model (PoissonModel or DixonColesModel) supplies expected goals and the
+    (n, G, G) scoreline tensor once per fixture; every market is then a contraction
+    against precomputed stake-weight masks:
+        prob      = E[winning stake fraction]
+        fair odds = 1 + E[losing stake fraction] / E[winning stake fraction]
+    which is 1 / prob for markets without pushes, and accounts for pushes and
+    half-win/half-loss settlement on whole and quarter lines.
+    """
+
+    def __init__(self, model: PoissonModel, chunk_size: int = 10_000, **market_kwargs):
+        self.model = model
+        self.chunk_size = chunk_size
+        self.labels, self.win_masks, self.loss_masks = build_markets(**market_kwargs)
+
+    def price_matrices(self, matrices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(win, loss) expected stake fractions, each (n_fixtures, n_markets), for a scoreline tensor."""
+        win = np.einsum('nij,mij->nm', matrices, self.win_masks)
+        loss = np.einsum('nij,mij->nm', matrices, self.loss_masks)
+        return win, loss
+
+    def price_batch(self, fixtures, odds: bool = False) -> pd.DataFrame:
+        """
+        Prices every market for many fixtures at once.
+        fixtures: list of (home_team, away_team) tuples or a DataFrame with home_team/away_team columns.
+        Returns one row per fixture with expected goals and a column per market label:
+        win probabilities, or fair decimal odds if odds=True (NaN for fixtures with unknown teams).
+        """
+        if isinstance(fixtures, pd.DataFrame):
+            home_teams = fixtures['home_team'].tolist()
+            away_teams = fixtures['away_team'].tolist()
+        else:
+            home_teams = [f[0] for f in fixtures]
+            away_teams = [f[1] for f in fixtures]
+
+        home_xg, away_xg, valid = self.model.expected_goals_batch(home_teams, away_teams)
+        values = np.full((len(home_teams), len(self.labels)), np.nan)
+        rows = np.flatnonzero(valid)
+        for start in range(0, len(rows), self.chunk_size):
+            chunk = rows[start:start + self.chunk_size]
+            win, loss = self.price_matrices(self.model.score_matrices(home_xg[chunk], away_xg[chunk]))
+            if odds:
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    values[chunk] = 1.0 + loss / win
+            else:
+                values[chunk] = win
+
+        result = pd.DataFrame(values, columns=self.labels)
+        result.insert(0, 'away_xg', away_xg)
+        result.insert(0, 'home_xg', home_xg)
+        result.insert(0, 'away_team', away_teams)
+        result.insert(0, 'home_team', home_teams)
+        return result
+
+    def price_match(self, home_team: str, away_team: str, odds: bool = False) -> Dict[str, float]:
+        """Single-fixture convenience wrapper around price_batch."""
+        row = self.price_batch([(home_team, away_team)], odds=odds).iloc[0]
+        if pd.isna(row[self.labels[0]]):
+            logger.warning(f"Teams {home_team} or {away_team} not found in training data.")
+            return {}
+        return row.to_dict()
+
+
+if __name__ == "__main__":
+    model = DixonColesModel()
+    model.train()
+    pricer = MarketPricer(model)
+    prices = pricer.price_match("Manchester City", "Arsenal", odds=True)
+    if prices:
+        for market in ['H', 'D', 'A', '1X', 'O2.5', 'O2.75', 'AH_H-0.75', 'AH_A+0.75', 'H_O1.5', 'BTTS_Y', 'CS_1-1']:
+            print(f"{market:>10}: {prices[market]:.2f}")
@@ -0,0 +1,177 @@
+import pandas as pd
+import atexit
+import cProfile
+import functools
+import io
+import logging
+import os
+import pstats
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Optional
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Set to 1 to time every instrumented stage of a run and log the summary at exit
+PROFILE_ENV = "SOCCER_PROFILE"
+PROFILE_DIR = Path(__file__).parent / "data" / "profiles"
+
+
+class StageTimer:
+    """
+    Opt-in wall-clock timers and call counters keyed by stage name
+    (e.g. "Database.read_sql", "Backtester.predict").
+
+    Stages nest: total_s is inclusive, self_s excludes time spent in instrumented
+    stages called from within, so self times add up to the instrumented wall time.
+    When disabled, stage() and @timed cost one attribute check.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.calls = defaultdict(int)
+            self.total = defaultdict(float)
+            self.own = defaultdict(float)
+
+    def _stack(self) -> list:
+        if not hasattr(self.local, 'stack'):
+            self.local.stack = []
+        return self.local.stack
+
+    @contextmanager
+    def stage(self, name: str):
+        if not self.enabled:
+            yield
+            return
+        stack = self._stack()
+        # Time spent in child stages, subtracted from this stage's self time
+        stack.append(0.0)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            children = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            with self.lock:
+                self.calls[name] += 1
+                self.total[name] += elapsed
+                self.own[name] += elapsed - children
+
+    def timed(self, name: Optional[str] = None) -> Callable:
+        """Decorator timing every call of a function as a stage (default name: its qualified name)."""
+        def decorator(func: Callable) -> Callable:
+            stage_name = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self.stage(stage_name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def summary(self) -> pd.DataFrame:
+        """One row per stage, slowest self time first."""
+        with self.lock:
+            df = pd.DataFrame({
+                'stage': list(self.calls),
+                'calls': [self.calls[k] for k in self.calls],
+                'total_s': [self.total[k] for k in self.calls],
+                'self_s': [self.own[k] for k in self.calls]
+            })
+        if df.empty:
+            return df
+        df['mean_ms'] = df['total_s'] / df['calls'] * 1000
+        df['self_share'] = df['self_s'] / df['self_s'].sum()
+        return df.sort_values('self_s', ascending=False).reset_index(drop=True)
+
+    def log_summary(self, title: str = "Stage timings"):
+        df = self.summary()
+        if df.empty:
+            logger.info(f"{title}: no instrumented stages ran")
+            return
+        logger.info(f"{title}:\n" + df.to_string(index=False, formatters={
+            'total_s': '{:.3f}'.format, 'self_s': '{:.3f}'.format,
+            'mean_ms': '{:.2f}'.format, 'self_share': '{:.1%}'.format
+        }))
+
+
+TIMER = StageTimer(enabled=os.environ.get(PROFILE_ENV, '') not in ('', '0'))
+stage = TIMER.stage
+timed = TIMER.timed
+
+if TIMER.enabled:
+    atexit.register(TIMER.log_summary)
+
+
+def enable(reset: bool = True):
+    if reset:
+        TIMER.reset()
+    TIMER.enabled = True
+
+
+def disable():
+    TIMER.enabled = False
+
+
+def summary() -> pd.DataFrame:
+    return TIMER.summary()
+
+
+@contextmanager
+def profile(name: str = "run", output_dir: Optional[Path] = PROFILE_DIR, cprofile: bool = False, top: int = 25):
+    """
+    Times the enclosed run's stages (and optionally runs it under cProfile). On exit the
+    stage summary is logged and, with output_dir set, written to <output_dir>/<name>-<timestamp>.csv
+    (plus a .prof file loadable with pstats/snakeviz when cprofile=True).
+
+        with profile("backtest", cprofile=True):
+            Backtester().run()
+    """
+    was_enabled = TIMER.enabled
+    enable()
+    profiler = cProfile.Profile() if cprofile else None
+    if profiler:
+        profiler.enable()
+    started = time.perf_counter()
+    try:
+        yield TIMER
+    finally:
+        if profiler:
+            profiler.disable()
+        TIMER.enabled = was_enabled
+        TIMER.log_summary(f"Stage timings for {name} ({time.perf_counter() - started:.2f}s wall)")
+
+        if profiler:
+            stream = io.StringIO()
+            pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(top)
+            logger.info(f"cProfile top {top} by cumulative time:\n{stream.getvalue()}")
+
+        if output_dir is not None:
+            output_dir = Path(output_dir)
+            output_dir.mkdir(parents=True, exist_ok=True)
+            stem = f"{name}-{pd.Timestamp.now():%Y%m%d-%H%M%S}"
+            TIMER.summary().to_csv(output_dir / f"{stem}.csv", index=False)
+            if profiler:
+                profiler.dump_stats(output_dir / f"{stem}.prof")
+            logger.info(f"Profile written to {output_dir / stem}.*")
+
+
+if __name__ == "__main__":
+    from .backtester import Backtester
+
+    with profile("backtest", cprofile=True):
+        Backtester().run()
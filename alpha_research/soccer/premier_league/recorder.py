@@ -1,6 +1,8 @@
+import re
 import time
+import datetime
 import logging
-from typing import List
+from typing import List, Dict, Any, Optional
 # Updated imports to point to the shared market_data package
 from alpha_research.market_data.polymarket import PolymarketClient
 from alpha_research.market_data.kalshi import KalshiClient
@@ -9,65 +11,125 @@ from .database import Database
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+SOCCER_KEYWORDS = ["Premier League", "Soccer", "Football", "Man City", "Liverpool", "Arsenal", "Man Utd", "Chelsea"]
+
+# Fields compared between cycles; a snapshot is stored only when one of them moves
+SNAPSHOT_FIELDS = ('yes_price', 'no_price', 'yes_volume', 'no_volume')
+
+def build_keyword_matcher(keywords: List[str]) -> re.Pattern:
+    """Single case-insensitive regex matching any keyword (longest alternatives first)."""
+    alternatives = sorted({k.lower() for k in keywords}, key=len, reverse=True)
+    return re.compile("|".join(re.escape(k) for k in alternatives), re.IGNORECASE)
+
 class MarketRecorder:
-    def __init__(self):
-        self.db = Database()
+    """
+    Records soccer market snapshots from Polymarket and Kalshi.
+
+    Each cycle filters titles with one precompiled keyword regex, keeps only markets
+    whose prices or volumes changed since their last stored snapshot, and writes
+    them in a single transaction. run() repeats cycles on a fixed schedule and
+    periodically rolls old snapshots into OHLC bars (see Database.downsample_snapshots).
+    """
+
+    def __init__(self, keywords: List[str] = SOCCER_KEYWORDS, bar_seconds: int = 3600,
+                 retention_hours: float = 24.0, db: Database = None):
+        self.db = db or Database()
         self.polymarket = PolymarketClient()
         self.kalshi = KalshiClient()
+        self.matcher = build_keyword_matcher(keywords)
+        self.bar_seconds = bar_seconds
+        self.retention_hours = retention_hours
+        # Last stored values per market, seeded from the database so restarts stay change-only
+        self.last_values = {
+            market_id: tuple(row[f] for f in SNAPSHOT_FIELDS)
+            for market_id, row in self.db.get_latest_snapshots().items()
+        }
+
+    @staticmethod
+    def values(market: Dict[str, Any]) -> tuple:
+        return tuple(market.get(f) for f in SNAPSHOT_FIELDS)
+
+    def changed(self, market: Dict[str, Any]) -> bool:
+        # last_values is only updated once the snapshot is saved (see record_snapshots)
+        return self.last_values.get(market['id']) != self.values(market)
+
+    def collect(self, client, platform: str) -> List[Dict[str, Any]]:
+        """Fetches, filters and normalizes one platform's markets; returns the changed ones."""
+        raw_markets = client.fetch_markets()
+        logger.info(f"Found {len(raw_markets)} active markets on {platform}")
 
-    def record_snapshots(self):
-        """Fetches current markets from all sources and saves snapshots."""
+        changed = []
+        relevant = 0
+        for raw_market in raw_markets:
+            market = client.normalize_data(raw_market)
+            logger.debug(f"{platform} Candidate: {market['title']}")
+            if not self.matcher.search(market['title']):
+                continue
+            relevant += 1
+            if self.changed(market):
+                changed.append(market)
+
+        logger.info(f"{platform}: {relevant} relevant markets, {len(changed)} changed")
+        return changed
+
+    def record_snapshots(self) -> int:
+        """Fetches current markets from all sources and saves snapshots of the ones that changed."""
         logger.info("Starting market recording cycle...")
-        
-        # Fetch Polymarket
-        try:
-            logger.info("Fetching Polymarket data...")
-            poly_markets = self.polymarket.fetch_markets()
-            logger.info(f"Found {len(poly_markets)} active markets on Polymarket")
-            
-            # Filter for Premier League if possible, or just save all for now and filter later
-            # The clients currently fetch 'active' markets. 
-            # We might want to add keyword filtering here to reduce noise.
-            soccer_keywords = ["Premier League", "Soccer", "Football", "Man City", "Liverpool", "Arsenal", "Man Utd", "Chelsea"]
-            
-            count = 0
-            for raw_market in poly_markets:
-                market = self.polymarket.normalize_data(raw_market)
-                logger.info(f"Polymarket Candidate: {market['title']}")
-                
-                # Basic keyword filter
-                if any(k.lower() in market['title'].lower() for k in soccer_keywords):
-                    self.db.save_market_snapshot(market)
-                    count += 1
-            
-            logger.info(f"Saved {count} relevant Polymarket snapshots")
-            
-        except Exception as e:
-            logger.error(f"Error recording Polymarket: {e}")
-
-        # Fetch Kalshi
+
+        snapshots = []
+        for client, platform in ((self.polymarket, "Polymarket"), (self.kalshi, "Kalshi")):
+            try:
+                snapshots.extend(self.collect(client, platform))
+            except Exception as e:
+                logger.error(f"Error recording {platform}: {e}")
+
+        if snapshots:
+            try:
+                self.db.save_market_snapshots_bulk(snapshots)
+            except Exception as e:
+                # Keep the schedule alive; the unsaved markets still differ from last_values
+                # and are retried next cycle
+                logger.error(f"Error saving {len(snapshots)} snapshots: {e}")
+                return 0
+            for market in snapshots:
+                self.last_values[market['id']] = self.values(market)
+        logger.info(f"Recording cycle complete ({len(snapshots)} snapshots saved).")
+        return len(snapshots)
+
+    def downsample(self) -> int:
+        """Rolls snapshots older than retention_hours into OHLC bars."""
+        cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(hours=self.retention_hours)
+        removed = self.db.downsample_snapshots(cutoff, bar_seconds=self.bar_seconds)
+        if removed:
+            logger.info(f"Downsampled {removed} snapshots into {self.bar_seconds}s bars")
+        return removed
+
+    def run(self, interval: float = 60.0, downsample_every: int = 60, max_cycles: Optional[int] = None):
+        """
+        Records a cycle every `interval` seconds (fixed cadence, not interval + work time)
+        and downsamples old snapshots every `downsample_every` cycles.
+        """
+        cycle = 0
+        next_run = time.monotonic()
         try:
-            logger.info("Fetching Kalshi data...")
-            kalshi_markets = self.kalshi.fetch_markets()
-            logger.info(f"Found {len(kalshi_markets)} active markets on Kalshi")
-            
-            count = 0
-            for raw_market in kalshi_markets:
-                market = self.kalshi.normalize_data(raw_market)
-                logger.info(f"Kalshi Candidate: {market['title']}")
-                
-                # Basic keyword filter
-                if any(k.lower() in market['title'].lower() for k in soccer_keywords):
-                    self.db.save_market_snapshot(market)
-                    count += 1
-            
-            logger.info(f"Saved {count} relevant Kalshi snapshots")
-            
-        except Exception as e:
-            logger.error(f"Error recording Kalshi: {e}")
-            
-        logger.info("Recording cycle complete.")
+            while max_cycles is None or cycle < max_cycles:
+                self.record_snapshots()
+                cycle += 1
+                if cycle % downsample_every == 0:
+                    self.downsample()
+
+                next_run += interval
+                delay = next_run - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    # Fell behind (slow APIs); skip the missed slots instead of bursting
+                    next_run = time.monotonic()
+        except KeyboardInterrupt:
+            logger.info("Recorder stopped.")
+        finally:
+            self.db.close(force=True)
 
 if __name__ == "__main__":
     recorder = MarketRecorder()
-    recorder.record_snapshots()
+    recorder.run()
@@ -0,0 +1,224 @@
+import pandas as pd
+import json
+import logging
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from .database import DB_PATH, Database, VERSIONED_TABLES
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_DIR = Path(__file__).parent / "data" / "snapshot"
+
+
+def snapshot_root(db_path: Path) -> Path:
+    """Snapshot directory of a database: SNAPSHOT_DIR for the default one, <name>_snapshot next to others."""
+    db_path = Path(db_path)
+    if db_path.resolve() == DB_PATH.resolve():
+        return SNAPSHOT_DIR
+    return db_path.parent / f"{db_path.stem}_snapshot"
+
+
+def league_rows(df: pd.DataFrame, league: Optional[str], column: str = 'league') -> pd.DataFrame:
+    """Rows of one league (None = every league); the DataFrame counterpart of database.league_clause."""
+    return df if league is None else df[df[column] == league]
+
+
+def _numpy_types(df: pd.DataFrame) -> pd.DataFrame:
+    """Nullable integer columns as int64, or float64 with NaN when values are missing (as read_sql returns them)."""
+    for column in df.columns:
+        dtype = df[column].dtype
+        if pd.api.types.is_extension_array_dtype(dtype) and pd.api.types.is_integer_dtype(dtype):
+            df[column] = df[column].astype('float64' if df[column].hasnans else 'int64')
+    return df
+
+
+def _write_atomic(path: Path, write):
+    """Writes through a per-process temporary file renamed over path (concurrent readers never see partial files)."""
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    write(tmp)
+    tmp.replace(path)
+
+# Bump when the exported columns or types change to force a full rebuild
+SNAPSHOT_FORMAT = "1"
+
+# Column types of the exported tables (other columns keep the types SQLite returns)
+SNAPSHOT_TYPES: Dict[str, Dict[str, str]] = {
+    'matches': {
+        'date': 'datetime64[ns]', 'home_score': 'Int16', 'away_score': 'Int16',
+        'match_no': 'Int64', 'home_team_id': 'Int32', 'away_team_id': 'Int32'
+    },
+    'odds': {
+        'id': 'int64', 'match_no': 'Int64', 'updated_at': 'datetime64[ns]',
+        'home_win': 'float64', 'draw': 'float64', 'away_win': 'float64',
+        'over_2_5': 'float64', 'under_2_5': 'float64', 'btts_yes': 'float64', 'btts_no': 'float64'
+    },
+    'team_stats': {
+        'id': 'int64', 'match_no': 'Int64', 'team_id': 'Int32', 'xg': 'float64',
+        'shots': 'Int16', 'shots_on_target': 'Int16', 'corners': 'Int16', 'possession': 'float64'
+    },
+    'player_stats': {
+        'match_no': 'Int64', 'team_id': 'Int32', 'minutes': 'Int16', 'goals': 'Int16', 'assists': 'Int16',
+        'shots': 'Int16', 'shots_on_target': 'Int16', 'xg': 'float64', 'xa': 'float64', 'npxg': 'float64'
+    }
+}
+
+
+class AnalyticSnapshot:
+    """
+    Typed Parquet copy of the matches / odds / team_stats / player_stats tables,
+    partitioned by season (root/<table>/season=<season>/part-0.parquet).
+
+    refresh() compares the database's per-season change counters (table_versions,
+    bumped by the Database bulk savers) with the manifest and rewrites only the
+    partitions whose source rows changed; dependent tables are also rewritten when
+    their season's matches change. load() reads a table back with memory-mapped I/O,
+    refreshing it first when it is stale.
+    """
+
+    def __init__(self, root: Path = None, db: Database = None):
+        self.db = db or Database()
+        self.root = Path(root) if root is not None else snapshot_root(self.db.db_path)
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.root / "manifest.json"
+
+    def manifest(self) -> Dict:
+        if not self.manifest_path.exists():
+            return {}
+        return json.loads(self.manifest_path.read_text())
+
+    def partition_path(self, table: str, season: str) -> Path:
+        return self.root / table / f"season={season}" / "part-0.parquet"
+
+    def _read_partition(self, table: str, season: str) -> pd.DataFrame:
+        """One season of a table from SQLite, typed per SNAPSHOT_TYPES (season is kept in the path)."""
+        self.db.connect()
+        if table == 'matches':
+            query = "SELECT * FROM matches WHERE COALESCE(season, 'unknown') = ?"
+        else:
+            query = f"""
+                SELECT t.* FROM {table} t
+                LEFT JOIN matches m ON m.id = t.match_id
+                WHERE COALESCE(m.season, 'unknown') = ?
+            """
+        df = pd.read_sql_query(query, self.db.conn, params=(season,))
+        self.db.close()
+
+        df = df.drop(columns=['season'], errors='ignore')
+        for column, dtype in SNAPSHOT_TYPES.get(table, {}).items():
+            if column not in df.columns:
+                continue
+            if dtype.startswith('datetime'):
+                df[column] = pd.to_datetime(df[column], format='mixed').astype(dtype)
+            else:
+                df[column] = df[column].astype(dtype)
+        return df
+
+    def _partition_keys(self, versions: Dict[Tuple[str, str], int]) -> Dict[str, Dict[str, List[int]]]:
+        """Per table and season, the counters a partition depends on: its own and its season's matches."""
+        keys: Dict[str, Dict[str, List[int]]] = {table: {} for table in VERSIONED_TABLES}
+        for (table, season), version in versions.items():
+            if table not in keys:
+                continue
+            key = [version]
+            if table != 'matches':
+                key.append(versions.get(('matches', season), 0))
+            keys[table][season] = key
+        return keys
+
+    def refresh(self, force: bool = False, tables: Optional[Iterable[str]] = None) -> Dict[str, List[str]]:
+        """
+        Brings the snapshot (or only the given tables) up to date. Returns the rewritten
+        seasons per table (empty lists if nothing changed).
+        """
+        started = time.time()
+        manifest = self.manifest()
+        schema_version = self.db.schema_version
+        if force or manifest.get('format') != SNAPSHOT_FORMAT or manifest.get('schema_version') != schema_version:
+            manifest = {}
+        stored = manifest.get('tables', {})
+        wanted = set(VERSIONED_TABLES if tables is None else tables)
+
+        rebuilt: Dict[str, List[str]] = {}
+        entries_by_table = dict(stored)
+        for table, seasons in self._partition_keys(self.db.table_versions()).items():
+            if table not in wanted:
+                continue
+            old = stored.get(table, {})
+            entries = {}
+            rebuilt[table] = []
+            for season, key in sorted(seasons.items()):
+                path = self.partition_path(table, season)
+                if season in old and old[season]['key'] == key and path.exists():
+                    entries[season] = old[season]
+                    continue
+
+                df = self._read_partition(table, season)
+                rebuilt[table].append(season)
+                if df.empty:
+                    shutil.rmtree(path.parent, ignore_errors=True)
+                    continue
+                path.parent.mkdir(parents=True, exist_ok=True)
+                _write_atomic(path, lambda tmp: df.to_parquet(tmp, index=False))
+                entries[season] = {'key': key, 'rows': len(df)}
+
+            # Seasons that no longer exist in the source
+            for season in set(old) - set(seasons):
+                shutil.rmtree(self.partition_path(table, season).parent, ignore_errors=True)
+                rebuilt[table].append(season)
+            entries_by_table[table] = entries
+
+        changed = sum(len(seasons) for seasons in rebuilt.values())
+        if changed == 0 and manifest:
+            logger.debug("Snapshot up to date")
+            return rebuilt
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        content = json.dumps({
+            'format': SNAPSHOT_FORMAT,
+            'schema_version': schema_version,
+            'source': str(self.db.db_path),
+            'refreshed_at': pd.Timestamp.now().isoformat(timespec='seconds'),
+            'tables': entries_by_table
+        }, indent=2, sort_keys=True)
+        _write_atomic(self.manifest_path, lambda tmp: tmp.write_text(content))
+        logger.info(f"Snapshot refresh: {changed} partitions rewritten in {time.time() - started:.2f}s")
+        return rebuilt
+
+    def load(self, table: str, seasons: Optional[List[str]] = None, columns: Optional[List[str]] = None,
+             refresh: bool = True, nullable: bool = True) -> pd.DataFrame:
+        """
+        Reads a table from the snapshot with memory-mapped I/O, optionally only some
+        seasons (partitions are pruned, not filtered after reading) and columns.
+        With refresh set, stale partitions of the table are rewritten first; with
+        nullable=False integer columns come back as numpy int64 / float64 (NaN for NULL).
+        """
+        if refresh:
+            self.refresh(tables=[table])
+        entries = self.manifest().get('tables', {}).get(table, {})
+        wanted = sorted(entries) if seasons is None else [s for s in map(str, seasons) if s in entries]
+        file_columns = None if columns is None else [c for c in columns if c != 'season']
+        frames = []
+        for season in wanted:
+            df = pd.read_parquet(self.partition_path(table, season), columns=file_columns, memory_map=True)
+            if columns is None or 'season' in columns:
+                df['season'] = season
+            frames.append(df)
+
+        if not frames:
+            return pd.DataFrame(columns=columns or [])
+        df = pd.concat(frames, ignore_index=True)
+        return df if nullable else _numpy_types(df)
+
+
+if __name__ == "__main__":
+    snapshot = AnalyticSnapshot()
+    rebuilt = snapshot.refresh(force='--force' in sys.argv)
+    for table, seasons in rebuilt.items():
+        print(f"{table}: {', '.join(seasons) or 'up to date'}")
@@ -0,0 +1,199 @@
+import pandas as pd
+import numpy as np
+import itertools
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Dict, List, Any
+from .database import Database, DB_PATH
+from .snapshot import AnalyticSnapshot, league_rows
+from .models import DixonColesModel
+from .backtester import Backtester
+from .niche_backtester import NicheBacktester
+from .prediction_cache import PredictionCache
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+RESULTS_PATH = Path(__file__).parent / "data" / "sweep_results.csv"
+
+# Column layout of the shared float64 arrays
+MATCH_COLS = ['date', 'home_team', 'away_team', 'home_score', 'away_score']
+ODDS_COLS = ['date', 'home_team', 'away_team', 'home_score', 'away_score',
+             'odd_h', 'odd_d', 'odd_a', 'over_2_5', 'under_2_5', 'btts_yes', 'btts_no']
+
+DEFAULT_GRID = {
+    'backtester': ['1x2', 'niche'],
+    'edge_threshold': [0.03, 0.05, 0.10],
+    'team_span': [5, 10, 20],
+    'league_span': [20, 40, 80],
+    'start_date': ['2023-09-01', '2023-10-01'],
+    'fit': ['ewm']
+}
+
+# Parameters that change the model (configurations that agree on these share predictions)
+MODEL_KEYS = ['team_span', 'league_span', 'fit']
+
+# Per-worker views onto the shared arrays and prediction cache (set by _attach_shared)
+_shared: Dict[str, Any] = {}
+
+
+def expand_grid(grid: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """Cartesian product of a parameter grid, one dict per configuration."""
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def load_arrays(db: Database = None, league: str = None):
+    """
+    Loads matches and Bet365 odds once (optionally for one league) from the Parquet
+    snapshot and encodes them as float64 arrays (dates as epoch nanoseconds, teams as
+    their integer team ids). Returns (match_array, odds_array, team_names).
+    """
+    db = db or Database()
+    snapshot = AnalyticSnapshot(db=db)
+    # Teams are already integer-keyed in the database; codes index into team_names
+    matches = snapshot.load('matches', nullable=False, columns=[
+        'match_no', 'date', 'home_team_id', 'away_team_id', 'home_score', 'away_score', 'league'])
+    matches = league_rows(matches, league).rename(columns={'home_team_id': 'home_team', 'away_team_id': 'away_team'})
+    odds = snapshot.load('odds', nullable=False, columns=[
+        'match_no', 'bookmaker', 'home_win', 'draw', 'away_win', 'over_2_5', 'under_2_5', 'btts_yes', 'btts_no'])
+    odds = odds[odds['bookmaker'] == 'Bet365'].rename(columns={'home_win': 'odd_h', 'draw': 'odd_d', 'away_win': 'odd_a'})
+    odds = matches.merge(odds, on='match_no').sort_values('date', kind='stable')
+    db.connect()
+    teams = pd.read_sql_query("SELECT id, name FROM teams", db.conn)
+    db.close()
+
+    team_names = [''] * (int(teams['id'].max()) + 1 if not teams.empty else 0)
+    for team_id, name in zip(teams['id'], teams['name']):
+        team_names[team_id] = name
+
+    def encode(df: pd.DataFrame, cols: List[str]) -> np.ndarray:
+        df = df.copy()
+        df['date'] = pd.to_datetime(df['date']).astype('datetime64[ns]').astype(np.int64)
+        return df[cols].to_numpy(dtype=np.float64)
+
+    return encode(matches, MATCH_COLS), encode(odds, ODDS_COLS), team_names
+
+
+def decode(array: np.ndarray, cols: List[str], teams: List[str]) -> pd.DataFrame:
+    """Rebuilds a DataFrame (real dates and team names) from a shared array view."""
+    df = pd.DataFrame(array, columns=cols)
+    df['date'] = pd.to_datetime(df['date'].astype(np.int64))
+    names = np.array(teams, dtype=object)
+    df['home_team'] = names[df['home_team'].astype(np.int64)]
+    df['away_team'] = names[df['away_team'].astype(np.int64)]
+    return df
+
+
+def _to_shared(array: np.ndarray) -> shared_memory.SharedMemory:
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[:] = array
+    return shm
+
+
+def _attach_shared(specs: Dict[str, tuple], teams: List[str], db_path: Path):
+    """
+    Process pool initializer: attach to the shared blocks as read-only arrays, decode
+    them into the DataFrames every configuration reads (the backtesters copy or filter
+    them, never modify them) and open the worker's one Database (schema setup runs once
+    per worker, not per configuration).
+    """
+    logging.getLogger().setLevel(logging.WARNING)
+    for key, (name, shape) in specs.items():
+        shm = shared_memory.SharedMemory(name=name)
+        view = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        view.flags.writeable = False
+        _shared[key] = (shm, view)  # Keep the handle alive with the view
+    _shared['teams'] = teams
+    _shared['history'] = decode(_shared['matches'][1], MATCH_COLS, teams)
+    _shared['data'] = decode(_shared['odds'][1], ODDS_COLS, teams)
+    _shared['prediction_cache'] = PredictionCache()
+    _shared['db'] = Database(db_path=db_path)
+
+
+def run_config(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Runs one walk-forward backtest configuration against the worker's decoded arrays."""
+    started = time.time()
+    history = _shared['history']
+    data = _shared['data']
+    db = _shared['db']
+
+    model = DixonColesModel(team_span=params['team_span'], league_span=params['league_span'],
+                            fit=params.get('fit', 'ewm'), db=db)
+    cache = _shared.get('prediction_cache')
+    if params['backtester'] == 'niche':
+        backtester = NicheBacktester(start_date=params['start_date'], model=model,
+                                     edge_threshold=params['edge_threshold'], prediction_cache=cache,
+                                     devig=params.get('devig', 'multiplicative'), db=db)
+        data = data[data['over_2_5'].notna()]
+    else:
+        backtester = Backtester(start_date=params['start_date'], model=model,
+                                edge_threshold=params['edge_threshold'], prediction_cache=cache,
+                                devig=params.get('devig', 'multiplicative'), db=db)
+
+    bets = backtester.run(data=data, history=history)
+    n_bets = len(bets)
+    wins = int((bets['pnl'] > 0).sum()) if n_bets else 0
+    pnl = float(bets['pnl'].sum()) if n_bets else 0.0
+
+    return {
+        **params,
+        'bets': n_bets,
+        'wins': wins,
+        'win_rate': wins / n_bets if n_bets else 0.0,
+        'pnl': pnl,
+        'roi': pnl / (n_bets * backtester.stake_size) * 100 if n_bets else 0.0,
+        'final_bankroll': backtester.bankroll,
+        'seconds': time.time() - started
+    }
+
+
+def run_sweep(grid: Dict[str, List[Any]] = None, max_workers: int = None,
+              output_path: Path = RESULTS_PATH, league: str = None, db_path: Path = DB_PATH) -> pd.DataFrame:
+    """
+    Runs walk-forward backtests for every configuration in the grid across a process pool.
+    Match and odds arrays are loaded once and shared read-only through shared memory;
+    each worker keeps a PredictionCache so configurations differing only in betting
+    parameters reuse the model's all-pairs predictions.
+    Results are written to one tidy table (one row per configuration).
+    """
+    # Hand each worker runs of configurations with the same model so its prediction cache is reused
+    configs = sorted(expand_grid(grid or DEFAULT_GRID), key=lambda c: tuple(str(c.get(k)) for k in MODEL_KEYS))
+    match_array, odds_array, teams = load_arrays(db=Database(db_path=db_path), league=league)
+    logger.info(f"Sweeping {len(configs)} configurations over {len(match_array)} matches...")
+
+    blocks = {'matches': _to_shared(match_array), 'odds': _to_shared(odds_array)}
+    specs = {
+        'matches': (blocks['matches'].name, match_array.shape),
+        'odds': (blocks['odds'].name, odds_array.shape)
+    }
+
+    started = time.time()
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_attach_shared,
+                                 initargs=(specs, teams, Path(db_path))) as pool:
+            n_models = len({tuple(str(c.get(k)) for k in MODEL_KEYS) for c in configs})
+            rows = list(pool.map(run_config, configs, chunksize=max(1, len(configs) // n_models)))
+    finally:
+        for shm in blocks.values():
+            shm.close()
+            shm.unlink()
+
+    results = pd.DataFrame(rows).sort_values('roi', ascending=False).reset_index(drop=True)
+    logger.info(f"Sweep complete in {time.time() - started:.1f}s")
+
+    if output_path:
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        results.to_csv(output_path, index=False)
+        logger.info(f"Results written to {output_path}")
+
+    return results
+
+
+if __name__ == "__main__":
+    results = run_sweep()
+    print(results.head(10).to_string())
@@ -0,0 +1,222 @@
+import pandas as pd
+import numpy as np
+import logging
+from pathlib import Path
+from typing import Dict, List, Tuple
+from scipy.stats import poisson
+from .database import Database
+from .models import GOALS, OUTCOME_MASKS
+from .teams import make_match_id
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Data scale -> (leagues, seasons); 1x is one 20-team season (380 matches)
+SCALES = {1: (1, 1), 10: (2, 5), 100: (10, 10)}
+
+# Log-scale goal model: log(xg) = BASE_RATE + attack - defense (+ HOME_ADVANTAGE at home)
+BASE_RATE = np.log(1.25)
+HOME_ADVANTAGE = 0.22
+STRENGTH_SD = 0.25
+SEASON_DRIFT_SD = 0.08
+
+# Bookmaker -> (overround per market, pricing noise); Bet365 is what the backtesters read
+BOOKMAKERS = {
+    'Bet365': (0.05, 0.06),
+    'Pinnacle': (0.025, 0.03)
+}
+
+# Players per team and their share of the team's attacking output
+PLAYER_WEIGHTS = np.array([0.01, 0.03, 0.03, 0.03, 0.03, 0.07, 0.09, 0.09, 0.14, 0.18, 0.30])
+
+
+def round_robin(n_teams: int) -> List[List[Tuple[int, int]]]:
+    """Double round-robin schedule (circle method): 2 * (n_teams - 1) rounds of (home, away) index pairs."""
+    teams = list(range(n_teams))
+    rounds = []
+    for r in range(n_teams - 1):
+        pairs = [(teams[i], teams[n_teams - 1 - i]) for i in range(n_teams // 2)]
+        # Alternate the fixed team's venue so home games are spread evenly
+        rounds.append([(a, b) if r % 2 == 0 else (b, a) for a, b in pairs])
+        teams = [teams[0], teams[-1]] + teams[1:-1]
+    return rounds + [[(b, a) for a, b in pairs] for pairs in rounds]
+
+
+def season_code(year: int) -> str:
+    """Season starting in `year` in the matches table format, e.g. 2023 -> '2324'."""
+    return f"{year % 100:02d}{(year + 1) % 100:02d}"
+
+
+def outcome_probabilities(home_xg: np.ndarray, away_xg: np.ndarray) -> np.ndarray:
+    """True (independent Poisson) probabilities of models.OUTCOMES for each fixture."""
+    home_probs = poisson.pmf(GOALS[None, :], home_xg[:, None])
+    away_probs = poisson.pmf(GOALS[None, :], away_xg[:, None])
+    matrices = home_probs[:, :, None] * away_probs[:, None, :]
+    return np.einsum('nij,kij->nk', matrices, OUTCOME_MASKS)
+
+
+def bookmaker_odds(rng: np.random.Generator, probs: np.ndarray, margin: float, noise: float) -> np.ndarray:
+    """
+    Decimal odds for models.OUTCOMES: the bookmaker's view is the true probability with
+    multiplicative noise, renormalized within each market (1X2, O/U 2.5, BTTS) and
+    then loaded with the overround.
+    """
+    view = probs * np.exp(rng.normal(0.0, noise, probs.shape))
+    for market in (slice(0, 3), slice(3, 5), slice(5, 7)):
+        view[:, market] /= view[:, market].sum(axis=1, keepdims=True)
+    return np.round(1.0 / (view * (1.0 + margin)), 2)
+
+
+def generate_league(rng: np.random.Generator, league: int, seasons: List[int], n_teams: int = 20,
+                    players: bool = True) -> Dict[str, pd.DataFrame]:
+    """
+    Simulates every season of one league: team strengths drift between seasons, goals are
+    Poisson around the true expected goals and stats/odds are derived from them.
+    Returns DataFrames in the matches / team_stats / player_stats / odds table layouts.
+    """
+    teams = np.array([f"L{league:02d} Team {i:02d}" for i in range(n_teams)], dtype=object)
+    attack = rng.normal(0.0, STRENGTH_SD, n_teams)
+    defense = rng.normal(0.0, STRENGTH_SD, n_teams)
+    schedule = np.array(round_robin(n_teams))  # (rounds, n_teams // 2, 2)
+
+    frames = []
+    for year in seasons:
+        attack += rng.normal(0.0, SEASON_DRIFT_SD, n_teams)
+        defense += rng.normal(0.0, SEASON_DRIFT_SD, n_teams)
+        start = pd.Timestamp(year=year, month=8, day=12)
+
+        # Weekly rounds with fixtures spread over the weekend
+        rounds = np.repeat(np.arange(len(schedule)), schedule.shape[1])
+        dates = start + pd.to_timedelta(rounds * 7 + rng.integers(0, 3, len(rounds)), unit='D')
+        home_idx = schedule[:, :, 0].ravel()
+        away_idx = schedule[:, :, 1].ravel()
+
+        home_xg = np.exp(BASE_RATE + HOME_ADVANTAGE + attack[home_idx] - defense[away_idx])
+        away_xg = np.exp(BASE_RATE + attack[away_idx] - defense[home_idx])
+        frames.append(pd.DataFrame({
+            'date': dates,
+            'home_team': teams[home_idx],
+            'away_team': teams[away_idx],
+            'home_score': rng.poisson(home_xg),
+            'away_score': rng.poisson(away_xg),
+            'season': season_code(year),
+            'league': f"SYN-League {league:02d}",
+            'true_home_xg': home_xg,
+            'true_away_xg': away_xg,
+            'home_strength': attack[home_idx] - defense[home_idx],
+            'away_strength': attack[away_idx] - defense[away_idx]
+        }))
+
+    sim = pd.concat(frames, ignore_index=True).sort_values('date', kind='stable').reset_index(drop=True)
+    sim['id'] = [make_match_id(d, h, a) for d, h, a in zip(sim['date'], sim['home_team'], sim['away_team'])]
+    n = len(sim)
+
+    matches = sim[['id', 'date', 'home_team', 'away_team', 'home_score', 'away_score', 'season', 'league']].copy()
+    matches['date'] = matches['date'].dt.strftime('%Y-%m-%d %H:%M:%S')
+
+    # Team stats: one row per (match, side); recorded xG is a noisy estimate of the true rate
+    true_xg = np.concatenate([sim['true_home_xg'], sim['true_away_xg']])
+    xg = rng.gamma(8.0, true_xg / 8.0)
+    shots = rng.poisson(4.0 + 8.0 * true_xg)
+    edge = np.concatenate([sim['home_strength'] - sim['away_strength'],
+                           sim['away_strength'] - sim['home_strength']])
+    home_possession = np.clip(50 + 20 * edge[:n] + rng.normal(0, 5, n), 25, 75).round(1)
+    team_stats = pd.DataFrame({
+        'match_id': np.concatenate([sim['id'], sim['id']]),
+        'team': np.concatenate([sim['home_team'], sim['away_team']]),
+        'xg': xg.round(2),
+        'shots': shots,
+        'shots_on_target': rng.binomial(shots, 0.35),
+        'corners': rng.poisson(3.0 + 2.0 * true_xg),
+        'possession': np.concatenate([home_possession, 100 - home_possession])
+    })
+
+    # Player stats: team goals, shots and xG shared among a fixed squad by attacking weight
+    player_stats = pd.DataFrame()
+    if players:
+        n_players = len(PLAYER_WEIGHTS)
+        goals = np.concatenate([sim['home_score'], sim['away_score']])
+        player_goals = rng.multinomial(goals, PLAYER_WEIGHTS)
+        player_shots = rng.multinomial(shots, PLAYER_WEIGHTS)
+        player_xg = xg[:, None] * PLAYER_WEIGHTS[None, :]
+        player_stats = pd.DataFrame({
+            'match_id': np.repeat(team_stats['match_id'].to_numpy(), n_players),
+            'team': np.repeat(team_stats['team'].to_numpy(), n_players),
+            'player': [f"{t} P{k:02d}" for t in team_stats['team'] for k in range(n_players)],
+            'position': np.tile(['GK'] + ['DF'] * 4 + ['MF'] * 3 + ['FW'] * 3, len(team_stats)),
+            'minutes': rng.choice([90, 90, 90, 75, 60, 45], size=len(team_stats) * n_players),
+            'goals': player_goals.ravel(),
+            'assists': rng.multinomial(rng.binomial(goals, 0.7), PLAYER_WEIGHTS).ravel(),
+            'shots': player_shots.ravel(),
+            'shots_on_target': rng.binomial(player_shots, 0.35).ravel(),
+            'xg': player_xg.ravel().round(2),
+            'xa': (player_xg * 0.7).ravel().round(2),
+            'npxg': (player_xg * 0.9).ravel().round(2)
+        })
+
+    true_probs = outcome_probabilities(sim['true_home_xg'].to_numpy(), sim['true_away_xg'].to_numpy())
+    odds = []
+    for bookmaker, (margin, noise) in BOOKMAKERS.items():
+        prices = bookmaker_odds(rng, true_probs, margin, noise)
+        odds.append(pd.DataFrame({
+            'match_id': sim['id'],
+            'bookmaker': bookmaker,
+            'home_win': prices[:, 0],
+            'draw': prices[:, 1],
+            'away_win': prices[:, 2],
+            'over_2_5': prices[:, 3],
+            'under_2_5': prices[:, 4],
+            'btts_yes': prices[:, 5],
+            'btts_no': prices[:, 6]
+        }))
+
+    return {
+        'matches': matches,
+        'team_stats': team_stats,
+        'player_stats': player_stats,
+        'odds': pd.concat(odds, ignore_index=True)
+    }
+
+
+def generate(n_leagues: int = 1, n_seasons: int = 1, n_teams: int = 20, last_season: int = 2023,
+             players: bool = True, seed: int = 0) -> Dict[str, pd.DataFrame]:
+    """Synthetic leagues x seasons (ending with the season starting in last_season), concatenated per table."""
+    rng = np.random.default_rng(seed)
+    seasons = list(range(last_season - n_seasons + 1, last_season + 1))
+    leagues = [generate_league(rng, league, seasons, n_teams=n_teams, players=players)
+               for league in range(1, n_leagues + 1)]
+    return {table: pd.concat([league[table] for league in leagues], ignore_index=True) for table in leagues[0]}
+
+
+def populate(db: Database, data: Dict[str, pd.DataFrame]):
+    """Bulk-loads generated tables into a database in one transaction."""
+    with db.transaction():
+        db.save_matches_bulk(data['matches'].to_dict('records'))
+        db.save_team_stats_bulk(data['team_stats'].to_dict('records'))
+        if not data['player_stats'].empty:
+            db.save_player_stats_bulk(data['player_stats'].to_dict('records'))
+        db.save_odds_bulk(data['odds'].to_dict('records'))
+    db.close()
+
+
+def build_database(db_path: Path, scale: int = 1, seed: int = 0, **kwargs) -> Database:
+    """
+    Creates (or reuses) a synthetic database at db_path for one of SCALES.
+    Never point this at the real premier_league.db.
+    """
+    db_path = Path(db_path)
+    exists = db_path.exists()
+    db = Database(db_path=db_path)
+    if not exists:
+        n_leagues, n_seasons = SCALES[scale]
+        data = generate(n_leagues=n_leagues, n_seasons=n_seasons, seed=seed, **kwargs)
+        populate(db, data)
+        logger.info(f"Generated {len(data['matches'])} synthetic matches ({scale}x) in {db_path}")
+    return db
+
+
+if __name__ == "__main__":
+    data = generate(n_leagues=2, n_seasons=2)
+    for table, df in data.items():
+        print(f"{table}: {len(df)} rows")
+    print(data['odds'].head())
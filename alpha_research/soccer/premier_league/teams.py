@@ -0,0 +1,196 @@
+import pandas as pd
+from typing import Dict, List
+
+# Canonical team names (the FBref schedule spelling used in the matches table)
+# and every alias seen in the other sources: football-data.co.uk odds CSVs and
+# FBref player match reports. This is the single source of truth for name
+# matching; the database mirrors it in the team_aliases table.
+# Grouped by league; every league in FOOTBALL_DATA_CODES needs its clubs here.
+TEAM_ALIASES: Dict[str, List[str]] = {
+    # ENG-Premier League
+    "Arsenal": [],
+    "Aston Villa": [],
+    "Bournemouth": ["AFC Bournemouth"],
+    "Brentford": [],
+    "Brighton": ["Brighton & Hove Albion", "Brighton and Hove Albion"],
+    "Burnley": [],
+    "Chelsea": [],
+    "Crystal Palace": [],
+    "Everton": [],
+    "Fulham": [],
+    "Ipswich Town": ["Ipswich"],
+    "Leeds United": ["Leeds"],
+    "Leicester City": ["Leicester"],
+    "Liverpool": [],
+    "Luton Town": ["Luton"],
+    "Manchester City": ["Man City"],
+    "Manchester Utd": ["Man United", "Manchester United"],
+    "Newcastle Utd": ["Newcastle", "Newcastle United"],
+    "Nott'ham Forest": ["Nott'm Forest", "Nottingham Forest"],
+    "Sheffield Utd": ["Sheffield United"],
+    "Southampton": [],
+    "Tottenham": ["Spurs", "Tottenham Hotspur"],
+    "West Ham": ["West Ham United"],
+    "Wolves": ["Wolverhampton Wanderers", "Wolverhampton"],
+    "Cardiff City": ["Cardiff"],
+    "Huddersfield": ["Huddersfield Town"],
+    "Hull City": ["Hull"],
+    "Middlesbrough": [],
+    "Norwich City": ["Norwich"],
+    "Stoke City": ["Stoke"],
+    "Sunderland": [],
+    "Swansea City": ["Swansea"],
+    "Watford": [],
+    "West Brom": ["West Bromwich Albion"],
+
+    # ESP-La Liga
+    "Alavés": ["Alaves"],
+    "Almería": ["Almeria"],
+    "Athletic Club": ["Ath Bilbao", "Athletic Bilbao"],
+    "Atlético Madrid": ["Ath Madrid", "Atletico Madrid"],
+    "Barcelona": [],
+    "Betis": ["Real Betis"],
+    "Cádiz": ["Cadiz"],
+    "Celta Vigo": ["Celta"],
+    "Eibar": [],
+    "Elche": [],
+    "Espanyol": ["Espanol"],
+    "Getafe": [],
+    "Girona": [],
+    "Granada": [],
+    "Huesca": [],
+    "Las Palmas": [],
+    "Leganés": ["Leganes"],
+    "Levante": [],
+    "Mallorca": [],
+    "Osasuna": [],
+    "Rayo Vallecano": ["Vallecano"],
+    "Real Madrid": [],
+    "Real Sociedad": ["Sociedad"],
+    "Sevilla": [],
+    "Valencia": [],
+    "Valladolid": ["Real Valladolid"],
+    "Villarreal": [],
+
+    # GER-Bundesliga
+    "Arminia": ["Bielefeld", "Arminia Bielefeld"],
+    "Augsburg": [],
+    "Bayern Munich": ["Bayern München"],
+    "Bochum": [],
+    "Darmstadt 98": ["Darmstadt"],
+    "Dortmund": ["Borussia Dortmund"],
+    "Eint Frankfurt": ["Ein Frankfurt", "Eintracht Frankfurt"],
+    "Freiburg": [],
+    "Gladbach": ["M'gladbach", "Mönchengladbach"],
+    "Greuther Fürth": ["Greuther Furth"],
+    "Hamburger SV": ["Hamburg"],
+    "Heidenheim": [],
+    "Hertha BSC": ["Hertha"],
+    "Hoffenheim": [],
+    "Holstein Kiel": [],
+    "Köln": ["FC Koln", "Koln"],
+    "Leverkusen": ["Bayer Leverkusen"],
+    "Mainz 05": ["Mainz"],
+    "RB Leipzig": [],
+    "Schalke 04": ["Schalke"],
+    "St. Pauli": ["St Pauli"],
+    "Stuttgart": [],
+    "Union Berlin": [],
+    "Werder Bremen": [],
+    "Wolfsburg": [],
+
+    # ITA-Serie A
+    "Atalanta": [],
+    "Benevento": [],
+    "Bologna": [],
+    "Cagliari": [],
+    "Como": [],
+    "Cremonese": [],
+    "Crotone": [],
+    "Empoli": [],
+    "Fiorentina": [],
+    "Frosinone": [],
+    "Genoa": [],
+    "Hellas Verona": ["Verona"],
+    "Inter": ["Inter Milan", "Internazionale"],
+    "Juventus": [],
+    "Lazio": [],
+    "Lecce": [],
+    "Milan": ["AC Milan"],
+    "Monza": [],
+    "Napoli": [],
+    "Parma": [],
+    "Roma": [],
+    "Salernitana": [],
+    "Sampdoria": [],
+    "Sassuolo": [],
+    "Spezia": [],
+    "Torino": [],
+    "Udinese": [],
+    "Venezia": [],
+
+    # FRA-Ligue 1
+    "Ajaccio": [],
+    "Angers": [],
+    "Auxerre": [],
+    "Bordeaux": [],
+    "Brest": [],
+    "Clermont Foot": ["Clermont"],
+    "Dijon": [],
+    "Le Havre": [],
+    "Lens": [],
+    "Lille": [],
+    "Lorient": [],
+    "Lyon": [],
+    "Marseille": [],
+    "Metz": [],
+    "Monaco": [],
+    "Montpellier": [],
+    "Nantes": [],
+    "Nice": [],
+    "Nîmes": ["Nimes"],
+    "Paris S-G": ["Paris SG", "Paris Saint-Germain"],
+    "Reims": [],
+    "Rennes": [],
+    "Saint-Étienne": ["St Etienne", "Saint-Etienne"],
+    "Strasbourg": [],
+    "Toulouse": [],
+    "Troyes": []
+}
+
+# soccerdata league ids (stored in matches.league) and their football-data.co.uk file codes.
+# Odds join to matches through match ids built from canonical names, so each league's
+# football-data spellings ("Ath Madrid", "M'gladbach", "Paris SG") must be in TEAM_ALIASES;
+# OddsCollector.log_unmatched reports any that are missing after an import.
+DEFAULT_LEAGUE = "ENG-Premier League"
+FOOTBALL_DATA_CODES: Dict[str, str] = {
+    "ENG-Premier League": "E0",
+    "ESP-La Liga": "SP1",
+    "GER-Bundesliga": "D1",
+    "ITA-Serie A": "I1",
+    "FRA-Ligue 1": "F1"
+}
+
+_CANONICAL = {alias: name for name, aliases in TEAM_ALIASES.items() for alias in [name, *aliases]}
+# Old match ids were built with spaces stripped, so keep a lookup for that form too
+_CANONICAL_COMPACT = {alias.replace(" ", ""): name for alias, name in _CANONICAL.items()}
+
+
+def canonical_team(name: str) -> str:
+    """Canonical spelling of a team name (unknown names are returned unchanged)."""
+    name = str(name).strip()
+    return _CANONICAL.get(name, _CANONICAL_COMPACT.get(name, name))
+
+
+def make_match_id(date, home_team: str, away_team: str) -> str:
+    """Text match id, e.g. "2023-08-11_Burnley_ManchesterCity", built from canonical names."""
+    date_str = pd.Timestamp(date).strftime('%Y-%m-%d')
+    return f"{date_str}_{canonical_team(home_team)}_{canonical_team(away_team)}".replace(" ", "")
+
+
+def canonical_match_id(match_id: str) -> str:
+    """Rewrites a match id built from non-canonical names (e.g. "..._Newcastle_AstonVilla") to the canonical id."""
+    parts = str(match_id).split('_')
+    if len(parts) != 3:
+        return match_id
+    return make_match_id(parts[0], parts[1], parts[2])
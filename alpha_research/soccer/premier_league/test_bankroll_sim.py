@@ -0,0 +1,72 @@
+"""
+Known-answer tests for the Monte Carlo bankroll simulation.
+
+Run from the repository root with: python -m pytest alpha_research/soccer/premier_league/test_bankroll_sim.py
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from alpha_research.soccer.premier_league.bankroll_sim import kelly_fraction, simulate
+
+
+def uniform_bets(odds: float, prob: float, won: bool, n: int = 5) -> pd.DataFrame:
+    return pd.DataFrame({'odds': [odds] * n, 'prob': [prob] * n, 'won': [won] * n})
+
+
+@pytest.mark.parametrize('prob, odds, expected', [
+    (0.5, 3.0, 0.25),    # (1.5 - 1) / 2
+    (0.6, 2.0, 0.2),
+    (0.4, 2.0, 0.0),     # negative edge: no bet
+    (1.0, 1.5, 0.999),   # capped below the whole bankroll
+    (0.5, 1.0, 0.0),     # no payout: undefined, no bet
+])
+def test_kelly_fraction(prob, odds, expected):
+    assert kelly_fraction(np.array([prob]), np.array([odds]))[0] == pytest.approx(expected)
+
+
+def test_flat_staking_all_winning():
+    summary, dists = simulate(uniform_bets(2.0, 0.6, True), n_bets=10, n_paths=20, initial_bankroll=1000.0,
+                              strategies=[{'name': 'flat', 'staking': 'flat', 'stake': 100.0}], seed=0)
+    dist = dists['flat']
+    assert (dist['final_bankroll'] == 2000.0).all()
+    assert (dist['roi'] == 100.0).all()
+    assert (dist['max_drawdown'] == 0.0).all() and not dist['ruined'].any()
+    assert summary.iloc[0]['ruin_probability'] == 0.0
+
+
+def test_flat_staking_stops_when_broke():
+    _, dists = simulate(uniform_bets(2.0, 0.6, False), n_bets=15, n_paths=5, initial_bankroll=1000.0,
+                        strategies=[{'name': 'flat', 'staking': 'flat', 'stake': 100.0}], seed=0)
+    dist = dists['flat']
+    # Ten stakes of 100 lose the bankroll; the last five bets are never placed
+    assert (dist['final_bankroll'] == 0.0).all()
+    assert (dist['roi'] == -100.0).all()
+    assert dist['ruined'].all() and (dist['max_drawdown'] == 1.0).all()
+
+
+def test_kelly_staking_all_winning():
+    # Full Kelly at p = 0.5, odds 3 stakes 25%: each win multiplies the bankroll by 1 + 0.25 * 2
+    strategies = [{'name': 'full', 'staking': 'kelly', 'kelly_multiplier': 1.0},
+                  {'name': 'half_capped', 'staking': 'kelly', 'kelly_multiplier': 0.5, 'max_fraction': 0.1}]
+    _, dists = simulate(uniform_bets(3.0, 0.5, True), n_bets=4, n_paths=10, initial_bankroll=1000.0,
+                        strategies=strategies, seed=0)
+    np.testing.assert_allclose(dists['full']['final_bankroll'], 1000.0 * 1.5 ** 4)
+    np.testing.assert_allclose(dists['half_capped']['final_bankroll'], 1000.0 * 1.2 ** 4)
+
+
+def test_chunking_does_not_change_results():
+    rng = np.random.default_rng(3)
+    bets = pd.DataFrame({'odds': rng.uniform(1.5, 4.0, 37), 'prob': rng.uniform(0.2, 0.7, 37),
+                         'won': rng.random(37) < 0.4})
+    summary, dists = simulate(bets, n_paths=1000, chunk_size=1000, seed=1)
+    for chunk_size in (333, 7):
+        chunked_summary, chunked = simulate(bets, n_paths=1000, chunk_size=chunk_size, seed=1)
+        pd.testing.assert_frame_equal(summary, chunked_summary)
+        for name, dist in dists.items():
+            pd.testing.assert_frame_equal(dist, chunked[name])
+
+
+def test_no_bets_raises():
+    with pytest.raises(ValueError):
+        simulate(uniform_bets(2.0, 0.5, True, n=0))
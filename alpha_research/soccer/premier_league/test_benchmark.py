@@ -0,0 +1,23 @@
+"""
+Smoke test for the benchmark suite on the smallest synthetic database.
+
+Run from the repository root with: python -m pytest alpha_research/soccer/premier_league/test_benchmark.py
+"""
+import numpy as np
+import pandas as pd
+
+from alpha_research.soccer.premier_league.benchmark import run_benchmarks
+
+
+def test_run_benchmarks_smoke(tmp_path):
+    output_path = tmp_path / "results.csv"
+    results = run_benchmarks(scales=[1], repeat=1, workdir=tmp_path, output_path=output_path)
+
+    assert {'DixonColesModel.precompute_pairs', 'DixonColesModel.predict_match',
+            'Backtester.run', 'NicheBacktester.run'} <= set(results['benchmark'])
+    assert (results['scale'] == 1).all()
+    assert np.isfinite(results['seconds']).all() and (results['seconds'] > 0).all()
+
+    stored = pd.read_csv(output_path)
+    assert len(stored) == len(results)
+    assert set(stored['benchmark']) == set(results['benchmark'])
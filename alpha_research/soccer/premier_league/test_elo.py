@@ -0,0 +1,99 @@
+"""
+Tests for the Elo update rule and EloModel's expected goals.
+
+Run from the repository root with: python -m pytest alpha_research/soccer/premier_league/test_elo.py
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from alpha_research.soccer.premier_league.database import Database
+from alpha_research.soccer.premier_league.elo import (
+    ELO_HOME_ADVANTAGE, ELO_K, INITIAL_RATING, MIN_XG, EloModel, EloRatings, elo_ratings_before,
+    goal_multiplier, rating_change
+)
+
+MATCHES = pd.DataFrame({
+    'home_team': ['A', 'B', 'C', 'A', 'B'],
+    'away_team': ['B', 'C', 'A', 'C', 'A'],
+    'home_score': [2, 0, 1, 5, 1],
+    'away_score': [0, 0, 3, 0, 1]
+})
+
+
+@pytest.fixture
+def model(tmp_path):
+    model = EloModel(db=Database(db_path=tmp_path / "test.db"))
+    yield model
+    model.db.close(force=True)
+
+
+@pytest.mark.parametrize('goal_diff, expected', [(0, 1.0), (1, 1.0), (-2, 1.5), (3, 1.75), (-5, 2.0)])
+def test_goal_multiplier(goal_diff, expected):
+    assert goal_multiplier(goal_diff) == expected
+
+
+def test_rating_change_known_answers():
+    # Evenly matched: expected score 0.5
+    assert rating_change(0.0, 1, ELO_K) == pytest.approx(ELO_K / 2)
+    assert rating_change(0.0, 0, ELO_K) == 0.0
+    # 400 points up: expected score 10 / 11; a three-goal defeat scales K by 1.75
+    assert rating_change(400.0, -3, ELO_K) == pytest.approx(-ELO_K * 1.75 * 10 / 11)
+
+
+def test_updates_are_zero_sum():
+    elo = EloRatings()
+    for match in MATCHES.itertuples():
+        elo.update(match.home_team, match.away_team, match.home_score, match.away_score)
+    assert sum(elo.ratings.values()) == pytest.approx(3 * INITIAL_RATING)
+
+
+def test_ratings_before_match_the_model(model):
+    home_before, away_before = elo_ratings_before(MATCHES)
+    assert home_before[0] == away_before[0] == INITIAL_RATING
+
+    for i, match in enumerate(MATCHES.to_dict('records')):
+        assert (model.elo.get(match['home_team']), model.elo.get(match['away_team'])) == (home_before[i], away_before[i])
+        model.update(match)
+
+
+def test_unplayed_matches_do_not_move_ratings():
+    matches = MATCHES.astype({'home_score': float, 'away_score': float})
+    matches.loc[0, ['home_score', 'away_score']] = np.nan
+    home_before, away_before = elo_ratings_before(matches)
+    assert home_before[1] == away_before[1] == INITIAL_RATING
+
+
+def test_expected_goals_keep_the_league_total(model):
+    for match in MATCHES.to_dict('records'):
+        model.update(match)
+    total = model.league_avg_home_goals + model.league_avg_away_goals
+
+    home_xg, away_xg, valid = model.expected_goals_batch(['A', 'C', 'A'], ['C', 'A', 'Z'])
+    assert valid.tolist() == [True, True, False]
+    np.testing.assert_allclose(home_xg[:2] + away_xg[:2], total)
+    # A has beaten C twice: favoured at home and away
+    assert home_xg[0] > away_xg[0] and away_xg[1] > home_xg[1]
+
+
+def test_supremacy_is_capped(model):
+    for match in MATCHES.to_dict('records'):
+        model.update(match)
+    model.elo.ratings['A'] += 5000
+    total = model.league_avg_home_goals + model.league_avg_away_goals
+
+    home_xg, away_xg, _ = model.expected_goals_batch(['A'], ['C'])
+    assert away_xg[0] == pytest.approx(MIN_XG)
+    assert home_xg[0] + away_xg[0] == pytest.approx(total)
+
+
+def test_home_advantage_between_equal_ratings(model):
+    for match in MATCHES.to_dict('records'):
+        model.update(match)
+    assert model.goals_per_point > 0
+    model.elo.ratings.update({'A': INITIAL_RATING, 'B': INITIAL_RATING})
+
+    assert model.win_probability('A', 'B') == pytest.approx(1 / (1 + 10 ** (-ELO_HOME_ADVANTAGE / 400)))
+    prediction = model.predict_match('A', 'B')
+    assert prediction['home_xg'] - prediction['away_xg'] == pytest.approx(model.goals_per_point * ELO_HOME_ADVANTAGE)
+    assert prediction['home_win'] > prediction['away_win']
@@ -0,0 +1,98 @@
+"""
+Known-answer tests for the de-vig methods.
+
+Run from the repository root with: python -m pytest alpha_research/soccer/premier_league/test_implied_probability.py
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from alpha_research.soccer.premier_league.implied_probability import (
+    METHODS, additive, consensus, fair_probabilities, multiplicative, overround, power, shin
+)
+
+
+TRUE_PROBS = np.array([0.5, 0.3, 0.2])
+MARGIN_ODDS = np.array([[1.50, 4.20, 6.50], [2.60, 3.30, 2.80], [1.10, 9.00, 26.0]])
+
+
+def shin_odds(probs: np.ndarray, z: float) -> np.ndarray:
+    """Prices a bookmaker quotes under Shin's model with insider share z (the inverse of implied_probability.shin)."""
+    quoted = np.sqrt(z * probs + (1 - z) * probs ** 2)
+    return 1.0 / (quoted * quoted.sum())
+
+
+@pytest.mark.parametrize('method', list(METHODS))
+def test_probabilities_sum_to_one(method):
+    probs = fair_probabilities(MARGIN_ODDS, method)
+    np.testing.assert_allclose(probs.sum(axis=1), 1.0, atol=1e-9)
+    assert (probs > 0).all()
+
+
+@pytest.mark.parametrize('method', list(METHODS))
+def test_zero_overround_is_identity(method):
+    odds = 1.0 / TRUE_PROBS[None, :]
+    np.testing.assert_allclose(overround(odds), 0.0, atol=1e-12)
+    np.testing.assert_allclose(fair_probabilities(odds, method), TRUE_PROBS[None, :], atol=1e-9)
+
+
+def test_multiplicative_known_answer():
+    # 1/odds = [0.5, 0.3, 0.25], booksum 1.05
+    odds = np.array([[2.0, 1 / 0.3, 4.0]])
+    np.testing.assert_allclose(multiplicative(odds), [[0.5 / 1.05, 0.3 / 1.05, 0.25 / 1.05]])
+
+
+def test_additive_known_answer():
+    # 1/odds = [0.5, 0.3, 0.25]: 0.05 margin, 1/60 taken off each outcome
+    odds = np.array([[2.0, 1 / 0.3, 4.0]])
+    np.testing.assert_allclose(additive(odds), [[0.5 - 0.05 / 3, 0.3 - 0.05 / 3, 0.25 - 0.05 / 3]])
+
+
+@pytest.mark.parametrize('z', [0.01, 0.03, 0.08])
+def test_shin_recovers_known_z(z):
+    odds = shin_odds(TRUE_PROBS, z)[None, :]
+    assert overround(odds)[0] > 0
+    np.testing.assert_allclose(shin(odds), TRUE_PROBS[None, :], atol=1e-9)
+
+
+def test_shin_equals_additive_for_two_outcomes():
+    odds = np.array([[1.80, 2.05], [1.25, 4.10]])
+    np.testing.assert_allclose(shin(odds), additive(odds), atol=1e-9)
+
+
+def test_power_recovers_known_exponent():
+    # Quoted probabilities p ** (1 / k) sum to more than 1; power solves for k
+    odds = 1.0 / TRUE_PROBS[None, :] ** (1 / 1.08)
+    np.testing.assert_allclose(power(odds), TRUE_PROBS[None, :], atol=1e-9)
+
+
+@pytest.mark.parametrize('method', list(METHODS))
+def test_invalid_rows_are_nan(method):
+    odds = np.array([[2.0, 3.4, 4.0], [np.nan, 3.4, 4.0], [1.0, 3.4, 4.0]])
+    probs = fair_probabilities(odds, method)
+    assert np.isfinite(probs[0]).all()
+    assert np.isnan(probs[1:]).all()
+
+
+def test_unknown_method_raises():
+    with pytest.raises(ValueError):
+        fair_probabilities(MARGIN_ODDS, 'median')
+
+
+def test_consensus_weights_and_best_price():
+    odds = pd.DataFrame({
+        'match_id': ['m1', 'm1', 'm1'],
+        'bookmaker': ['A', 'B', 'Max'],
+        'home_win': [2.0, 1.0 / 0.3, 9.0],
+        'away_win': [2.0, 1.0 / 0.7, 9.0]
+    })
+    groups = {'ha': ['home_win', 'away_win']}
+    result = consensus(odds, method='multiplicative', weights={'B': 3.0}, groups=groups).iloc[0]
+
+    # (1 * 0.5 + 3 * 0.3) / 4; the 'Max' aggregate row is left out
+    assert result['n_bookmakers'] == 2
+    assert result['fair_home_win'] == pytest.approx(0.35)
+    assert result['consensus_home_win'] == pytest.approx(1 / 0.35)
+    # Best prices come from the real bookmakers only (A's away price, B's home price)
+    assert result['best_home_win'] == pytest.approx(1 / 0.3)
+    assert result['best_away_win'] == pytest.approx(2.0)
@@ -0,0 +1,72 @@
+"""
+Tests for walk-forward retraining and the persisted model windows, on a synthetic season.
+
+Run from the repository root with: python -m pytest alpha_research/soccer/premier_league/test_ml_models.py
+"""
+import numpy as np
+import pandas as pd
+import pytest
+import xgboost as xgb
+
+from alpha_research.soccer.premier_league.feature_store import FeatureStore
+from alpha_research.soccer.premier_league.ml_models import MLModel
+from alpha_research.soccer.premier_league.synthetic import build_database
+
+# The synthetic season runs from 2023-08-12 to 2024-04-29: retrained at Feb, Mar and Apr starts
+START_DATE = '2024-02-01'
+N_WINDOWS = 3
+
+
+@pytest.fixture(scope='module')
+def db(tmp_path_factory):
+    db = build_database(tmp_path_factory.mktemp('synthetic') / "synthetic.db", scale=1)
+    yield db
+    db.close(force=True)
+
+
+def make_model(db, tmp_path, **kwargs) -> MLModel:
+    model = MLModel(db=db, model_dir=tmp_path / "models", nthread=1, **kwargs)
+    model.feature_store = FeatureStore(tmp_path / "features")
+    return model
+
+
+def windows(model_dir) -> set:
+    return {path.stem for path in model_dir.glob("xgb_*.json")}
+
+
+def test_walk_forward_retrains_each_month(db, tmp_path):
+    model = make_model(db, tmp_path)
+    preds = model.walk_forward(start_date=START_DATE)
+
+    data = model.prepare_features()
+    assert len(preds) == (data['date'] >= START_DATE).sum()
+    np.testing.assert_allclose(preds[['p_draw', 'p_home', 'p_away']].sum(axis=1), 1.0, rtol=1e-5)
+    # One window per retraining boundary, each named after the boundary it was trained up to
+    names = windows(model.model_dir)
+    assert len(names) == N_WINDOWS
+    assert {name.split('_')[3] for name in names} == {'20240201', '20240301', '20240401'}
+
+
+def test_persisted_windows_are_reused(db, tmp_path, monkeypatch):
+    first = make_model(db, tmp_path).walk_forward(start_date=START_DATE)
+
+    def no_training(*args, **kwargs):
+        raise AssertionError("a persisted window was retrained")
+
+    monkeypatch.setattr(xgb, 'train', no_training)
+    second = make_model(db, tmp_path).walk_forward(start_date=START_DATE)
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_eviction_keeps_most_recent_windows(db, tmp_path):
+    model = make_model(db, tmp_path, max_windows=2)
+    model.walk_forward(start_date=START_DATE)
+
+    names = windows(model.model_dir)
+    assert {name.split('_')[3] for name in names} == {'20240301', '20240401'}
+    # The evicted window's DMatrix buffers go with it
+    assert not list(model.model_dir.glob("*_20240201_*"))
+
+
+def test_train_and_eval_without_enough_history(db, tmp_path):
+    assert make_model(db, tmp_path).train_and_eval(split_date='2023-08-13') is None
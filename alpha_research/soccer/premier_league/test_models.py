@@ -0,0 +1,105 @@
+"""
+Tests for the incremental model state and the Dixon-Coles likelihood gradient.
+
+Run from the repository root with: python -m pytest alpha_research/soccer/premier_league/test_models.py
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.optimize import approx_fprime
+
+from alpha_research.soccer.premier_league.database import Database
+from alpha_research.soccer.premier_league.models import DixonColesModel, EWMState, PoissonModel, dixon_coles_nll
+from alpha_research.soccer.premier_league.synthetic import generate
+
+HISTORY = generate(players=False)['matches'][['date', 'home_team', 'away_team', 'home_score', 'away_score']]
+HISTORY = HISTORY.assign(date=pd.to_datetime(HISTORY['date']))
+DATES = sorted(HISTORY['date'].unique())
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = Database(db_path=tmp_path / "test.db")
+    yield db
+    db.close(force=True)
+
+
+def fixtures(model: PoissonModel) -> list:
+    teams = sorted(model.team_state)
+    return [(home, away) for home in teams for away in teams if home != away]
+
+
+def test_ewm_state_matches_pandas():
+    values = np.random.default_rng(0).poisson(1.4, 50).astype(float)
+    state = EWMState(10)
+    for value in values:
+        state.update(value)
+    assert state.mean == pytest.approx(pd.Series(values).ewm(span=10).mean().iloc[-1])
+
+
+@pytest.mark.parametrize('model_class, kwargs', [(PoissonModel, {}), (DixonColesModel, {'fit': 'mle'})])
+def test_incremental_equals_batch(db, model_class, kwargs):
+    as_of = DATES[-10]
+    incremental = model_class(db=db, **kwargs)
+    incremental.load_history(HISTORY)
+    for date in DATES[::5]:
+        if date < as_of:
+            incremental.advance_to(date)
+    incremental.advance_to(as_of)
+
+    batch = model_class(db=db, **kwargs)
+    batch.load_history(HISTORY[HISTORY['date'] < as_of])
+    batch.advance_to(None)
+
+    assert incremental.n_matches == batch.n_matches
+    rtol = 1e-9 if kwargs.get('fit') != 'mle' else 1e-3  # MLE warm starts converge to the same optimum
+    pd.testing.assert_frame_equal(incremental.predict_batch(fixtures(batch)), batch.predict_batch(fixtures(batch)),
+                                  rtol=rtol)
+
+
+def test_unplayed_matches_are_ignored(db):
+    unplayed = HISTORY.tail(10).assign(home_score=np.nan, away_score=np.nan, date=DATES[-1] + pd.Timedelta(days=7))
+    with_unplayed = PoissonModel(db=db)
+    with_unplayed.load_history(pd.concat([HISTORY, unplayed]))
+    with_unplayed.advance_to(None)
+
+    played = PoissonModel(db=db)
+    played.load_history(HISTORY)
+    played.advance_to(None)
+
+    assert with_unplayed.n_matches == len(HISTORY)
+    pd.testing.assert_frame_equal(with_unplayed.predict_batch(fixtures(played)), played.predict_batch(fixtures(played)))
+
+
+def test_reset_clears_the_mle_fit(db):
+    model = DixonColesModel(db=db, fit='mle')
+    model.load_history(HISTORY)
+    model.advance_to(DATES[-10])
+    assert model.mle_params is not None and model.rho != model.initial_rho
+
+    model.advance_to(DATES[len(DATES) // 2])  # Going back replays from scratch
+    fresh = DixonColesModel(db=db, fit='mle')
+    fresh.load_history(HISTORY)
+    fresh.advance_to(DATES[len(DATES) // 2])
+    np.testing.assert_allclose(model.mle_params, fresh.mle_params)
+    assert model.rho == fresh.rho
+
+    model.reset()
+    assert model.mle_params is None and model.rho == model.initial_rho
+
+
+def test_dixon_coles_gradient_matches_finite_differences():
+    rng = np.random.default_rng(1)
+    n_teams, n = 6, 200
+    home_idx = rng.integers(0, n_teams, n)
+    away_idx = (home_idx + rng.integers(1, n_teams, n)) % n_teams
+    # Plenty of 0-0, 0-1, 1-0 and 1-1 scores, where tau and its derivatives are non-trivial
+    home_goals = rng.poisson(1.2, n).astype(float)
+    away_goals = rng.poisson(0.9, n).astype(float)
+    weights = rng.uniform(0.2, 1.0, n)
+    params = np.concatenate([rng.normal(0, 0.2, 2 * n_teams), [0.25, -0.1]])
+    args = (home_idx, away_idx, home_goals, away_goals, weights, n_teams, 1e-3)
+
+    _, grad = dixon_coles_nll(params, *args)
+    numeric = approx_fprime(params, lambda p: dixon_coles_nll(p, *args)[0], 1e-7)
+    np.testing.assert_allclose(grad, numeric, rtol=1e-4, atol=1e-4)
@@ -0,0 +1,97 @@
+"""
+Tests for parsing football-data.co.uk odds and joining them to FBref matches.
+
+Run from the repository root with: python -m pytest alpha_research/soccer/premier_league/test_odds_collector.py
+"""
+import pandas as pd
+
+from alpha_research.soccer.premier_league.database import Database
+from alpha_research.soccer.premier_league.odds_collector import OddsCollector
+from alpha_research.soccer.premier_league.teams import make_match_id
+
+
+# football-data spellings on the left, FBref schedule spellings (what matches stores) on the right
+FIXTURES = [
+    ('ESP-La Liga', '12/08/2023', 'Ath Madrid', 'Sociedad', 'Atlético Madrid', 'Real Sociedad'),
+    ('ESP-La Liga', '13/08/2023', 'Ath Bilbao', 'Vallecano', 'Athletic Club', 'Rayo Vallecano'),
+    ('GER-Bundesliga', '19/08/2023', "M'gladbach", 'FC Koln', 'Gladbach', 'Köln'),
+    ('ITA-Serie A', '20/08/2023', 'Verona', 'Inter', 'Hellas Verona', 'Inter'),
+    ('FRA-Ligue 1', '13/08/2023', 'Paris SG', 'St Etienne', 'Paris S-G', 'Saint-Étienne'),
+]
+
+CSV = "Div,Date,HomeTeam,AwayTeam,FTHG,FTAG,B365H,B365D,B365A,B365>2.5,B365<2.5,MaxH,MaxD,MaxA\n" + "\n".join(
+    f"X,{date},{home},{away},1,1,2.10,3.40,3.60,1.95,1.90,2.20,3.50,3.80"
+    for _, date, home, away, _, _ in FIXTURES
+)
+
+
+def save_matches(db: Database):
+    db.save_matches_bulk([{
+        'id': make_match_id(pd.to_datetime(date, dayfirst=True), home, away),
+        'date': pd.to_datetime(date, dayfirst=True).strftime('%Y-%m-%d %H:%M:%S'),
+        'home_team': home, 'away_team': away, 'home_score': 1, 'away_score': 1,
+        'season': '2324', 'league': league
+    } for league, date, _, _, home, away in FIXTURES])
+
+
+def test_non_epl_odds_join_matches(tmp_path):
+    path = tmp_path / "SP1_2324.csv"
+    path.write_text(CSV, encoding='utf-8')
+    db = Database(db_path=tmp_path / "test.db")
+    save_matches(db)
+
+    collector = OddsCollector(db=db, cache_dir=tmp_path)
+    odds = collector.parse_odds(collector.read_csv(path))
+    assert len(odds) == 2 * len(FIXTURES)
+    assert collector.log_unmatched(odds['match_id']) == []
+
+    db.save_odds_bulk(odds.astype(object).where(odds.notna(), None).to_dict('records'))
+    joined = db.read_sql("""
+        SELECT m.league, o.bookmaker, o.home_win FROM odds o JOIN matches m ON m.match_no = o.match_no
+    """)
+    assert len(joined) == 2 * len(FIXTURES)
+    assert set(joined['league']) == {league for league, *_ in FIXTURES}
+    assert set(joined['bookmaker']) == {'Bet365', 'Max'}
+    db.close(force=True)
+
+
+def test_unknown_spelling_is_reported(tmp_path):
+    path = tmp_path / "D1_2324.csv"
+    path.write_text(CSV.replace('FC Koln', 'Koeln Typo'), encoding='utf-8')
+    db = Database(db_path=tmp_path / "test.db")
+    save_matches(db)
+
+    collector = OddsCollector(db=db, cache_dir=tmp_path)
+    odds = collector.parse_odds(collector.read_csv(path))
+    assert collector.log_unmatched(odds['match_id']) == ['2023-08-19_Gladbach_KoelnTypo']
+    db.close(force=True)
+
+
+def test_pre_2019_aggregate_columns(tmp_path):
+    # BetBrain spellings of the Max/Average prices; files from 2019-20 on use MaxH/AvgH
+    old = ("Div,Date,HomeTeam,AwayTeam,B365H,B365D,B365A,BbMxH,BbMxD,BbMxA,BbMx>2.5,BbMx<2.5,"
+           "BbAvH,BbAvD,BbAvA,BbAv>2.5,BbAv<2.5\n"
+           "E0,12/08/17,Arsenal,Leicester,1.53,4.50,6.50,1.57,4.75,7.00,1.61,2.50,1.53,4.39,6.27,1.55,2.39")
+    path = tmp_path / "E0_1718.csv"
+    path.write_text(old, encoding='utf-8')
+    db = Database(db_path=tmp_path / "test.db")
+
+    collector = OddsCollector(db=db, cache_dir=tmp_path)
+    odds = collector.parse_odds(collector.read_csv(path)).set_index('bookmaker')
+    assert set(odds.index) == {'Bet365', 'Max', 'Average'}
+    assert (odds.loc['Max', 'home_win'], odds.loc['Max', 'over_2_5']) == (1.57, 1.61)
+    assert (odds.loc['Average', 'draw'], odds.loc['Average', 'under_2_5']) == (4.39, 2.39)
+    assert 'btts_yes' not in odds.columns
+    db.close(force=True)
+
+
+def test_newer_spelling_wins_when_both_are_present(tmp_path):
+    path = tmp_path / "E0_1920.csv"
+    path.write_text("Div,Date,HomeTeam,AwayTeam,MaxH,MaxD,MaxA,BbMxH,BbMxD,BbMxA\n"
+                    "E0,09/08/2019,Liverpool,Norwich,1.16,8.50,17.0,1.20,9.00,19.0", encoding='utf-8')
+    db = Database(db_path=tmp_path / "test.db")
+
+    collector = OddsCollector(db=db, cache_dir=tmp_path)
+    odds = collector.parse_odds(collector.read_csv(path))
+    assert odds[['home_win', 'draw', 'away_win']].values.tolist() == [[1.16, 8.50, 17.0]]
+    db.close(force=True)
@@ -0,0 +1,65 @@
+"""
+Known-answer tests for market settlement and pricing.
+
+Run from the repository root with: python -m pytest alpha_research/soccer/premier_league/test_pricer.py
+"""
+import numpy as np
+import pytest
+from scipy.stats import poisson
+
+from alpha_research.soccer.premier_league.models import GOALS
+from alpha_research.soccer.premier_league.pricer import MarketPricer, settlement_weights
+
+
+def scoreline_matrix(cells: dict) -> np.ndarray:
+    """(1, G, G) scoreline tensor with the given {(home, away): probability} cells."""
+    matrix = np.zeros((1, len(GOALS), len(GOALS)))
+    for (home, away), prob in cells.items():
+        matrix[0, home, away] = prob
+    return matrix
+
+
+def price(pricer: MarketPricer, matrix: np.ndarray) -> dict:
+    win, loss = pricer.price_matrices(matrix)
+    return {label: (win[0, i], loss[0, i]) for i, label in enumerate(pricer.labels)}
+
+
+@pytest.mark.parametrize('line, margin, expected', [
+    # (line on the backed side, goal margin of that side, (win fraction, loss fraction))
+    (-0.25, 0, (0.0, 0.5)),   # draw: half loss, half push
+    (-0.25, 1, (1.0, 0.0)),
+    (+0.25, 0, (0.5, 0.0)),   # draw: half win, half push
+    (-0.75, 1, (0.5, 0.0)),   # one-goal win: half win, half push
+    (-0.75, 2, (1.0, 0.0)),
+    (-1.0, 1, (0.0, 0.0)),    # whole line: full push
+    (-0.5, 0, (0.0, 1.0)),
+    (0.0, -1, (0.0, 1.0)),
+])
+def test_asian_handicap_settlement(line, margin, expected):
+    win, loss = settlement_weights(np.array([margin]), line)
+    assert (win[0], loss[0]) == expected
+
+
+def test_quarter_line_fair_odds():
+    # Home -0.25 with a 1-0 or a 1-1, each half the time: win 0.5, lose 0.25 -> fair odds 1 + 0.25 / 0.5
+    pricer = MarketPricer(model=None)
+    prices = price(pricer, scoreline_matrix({(1, 0): 0.5, (1, 1): 0.5}))
+    assert prices['AH_H-0.25'] == pytest.approx((0.5, 0.25))
+    assert prices['AH_A+0.25'] == pytest.approx((0.25, 0.5))
+
+
+def test_complementary_markets_sum_to_one():
+    home = poisson.pmf(GOALS, 1.6)
+    away = poisson.pmf(GOALS, 1.1)
+    matrix = np.outer(home, away)[None] / np.outer(home, away).sum()
+    prices = price(MarketPricer(model=None), matrix)
+
+    assert sum(prices[m][0] for m in ('H', 'D', 'A')) == pytest.approx(1.0)
+    assert prices['O2.5'][0] + prices['U2.5'][0] == pytest.approx(1.0)
+    assert prices['BTTS_Y'][0] + prices['BTTS_N'][0] == pytest.approx(1.0)
+    # Whole handicap lines push: win + loss + push = 1 with the push on a draw
+    win, loss = prices['AH_H+0']
+    assert win + loss + prices['D'][0] == pytest.approx(1.0)
+    # Independent Poisson: P(both score) = (1 - P(H = 0)) (1 - P(A = 0))
+    expected_btts = (1 - home[0] / home.sum()) * (1 - away[0] / away.sum())
+    assert prices['BTTS_Y'][0] == pytest.approx(expected_btts)
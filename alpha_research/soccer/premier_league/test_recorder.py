@@ -0,0 +1,122 @@
+"""
+Tests for the market recorder: change-only snapshots, save retries and OHLC downsampling.
+
+Run from the repository root with: python -m pytest alpha_research/soccer/premier_league/test_recorder.py
+"""
+import datetime
+
+import pytest
+
+from alpha_research.soccer.premier_league.database import Database
+from alpha_research.soccer.premier_league.recorder import MarketRecorder
+
+
+def market(market_id: str, yes_price: float, title: str = 'Premier League: Arsenal vs Chelsea') -> dict:
+    return {'id': market_id, 'platform': 'Polymarket', 'title': title, 'url': '', 'expiry_date': '',
+            'yes_price': yes_price, 'no_price': round(1 - yes_price, 2), 'yes_volume': 100.0, 'no_volume': 100.0}
+
+
+class StaticClient:
+    """Serves a fixed list of already-normalized markets."""
+
+    def __init__(self, markets=()):
+        self.markets = list(markets)
+
+    def fetch_markets(self):
+        return self.markets
+
+    def normalize_data(self, raw_market):
+        return raw_market
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = Database(db_path=tmp_path / "test.db")
+    yield db
+    db.close(force=True)
+
+
+def make_recorder(db, markets) -> MarketRecorder:
+    recorder = MarketRecorder(db=db)
+    recorder.polymarket = StaticClient(markets)
+    recorder.kalshi = StaticClient()
+    return recorder
+
+
+def insert_snapshots(db, rows):
+    """rows: (market_id, 'YYYY-MM-DD HH:MM:SS' UTC, yes_price)"""
+    db.save_market_snapshots_bulk([market(market_id, 0.5) for market_id in {row[0] for row in rows}])
+    with db.transaction() as cursor:
+        cursor.execute("DELETE FROM market_snapshots")
+        cursor.executemany("""
+            INSERT INTO market_snapshots (market_id, timestamp, yes_price, no_price, yes_volume, no_volume)
+            VALUES (?, ?, ?, 1 - ?, ?, ?)
+        """, [(m, ts, price, price, i, i) for i, (m, ts, price) in enumerate(rows)])
+
+
+def count_snapshots(db) -> int:
+    db.connect()
+    return db.conn.execute("SELECT COUNT(*) FROM market_snapshots").fetchone()[0]
+
+
+def test_change_only_snapshots(db):
+    markets = [market('a', 0.40), market('b', 0.55), market('c', 0.30, title='NBA Finals')]
+    recorder = make_recorder(db, markets)
+
+    # The non-soccer market is filtered out
+    assert recorder.record_snapshots() == 2
+    assert recorder.record_snapshots() == 0
+    markets[1]['yes_price'] = 0.57
+    assert recorder.record_snapshots() == 1
+    assert count_snapshots(db) == 3
+
+    # A restarted recorder picks up the stored values and stays change-only
+    assert make_recorder(db, markets).record_snapshots() == 0
+
+
+def test_failed_save_is_retried(db, monkeypatch):
+    recorder = make_recorder(db, [market('a', 0.40)])
+
+    def locked(snapshots):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(recorder.db, 'save_market_snapshots_bulk', locked)
+    assert recorder.record_snapshots() == 0
+    assert recorder.last_values == {}
+
+    monkeypatch.undo()
+    assert recorder.record_snapshots() == 1
+    assert count_snapshots(db) == 1
+
+
+def test_downsample_twice_across_the_same_bar(db):
+    insert_snapshots(db, [
+        ('a', '2024-01-01 10:05:00', 0.40),
+        ('a', '2024-01-01 10:20:00', 0.52),
+        ('a', '2024-01-01 11:10:00', 0.60),
+    ])
+    cutoff = datetime.datetime(2024, 1, 1, 11, 30)  # Floored to 11:00: only the 10:00 bar is complete
+    assert db.downsample_snapshots(cutoff) == 2
+    assert count_snapshots(db) == 1
+
+    # A snapshot for the already written 10:00 bar (late write) is merged into it
+    with db.transaction() as cursor:
+        cursor.execute("""
+            INSERT INTO market_snapshots (market_id, timestamp, yes_price, no_price, yes_volume, no_volume)
+            VALUES ('a', '2024-01-01 10:50:00', 0.35, 0.65, 9, 9)
+        """)
+    assert db.downsample_snapshots(cutoff) == 1
+
+    [bar] = db.get_market_bars('a')
+    assert bar['bar_start'] == '2024-01-01 10:00:00'
+    assert (bar['yes_open'], bar['yes_high'], bar['yes_low'], bar['yes_close']) == (0.40, 0.52, 0.35, 0.35)
+    assert (bar['no_open'], bar['no_high'], bar['no_low'], bar['no_close']) == (0.60, 0.65, 0.48, 0.65)
+    assert (bar['yes_volume'], bar['snapshots']) == (9, 3)
+    assert count_snapshots(db) == 1
+
+    # The next bar is written once it is complete
+    assert db.downsample_snapshots(datetime.datetime(2024, 1, 1, 12, 0, tzinfo=datetime.timezone.utc)) == 1
+    bars = db.get_market_bars('a')
+    assert [b['snapshots'] for b in bars] == [3, 1]
+    assert bars[1]['yes_open'] == bars[1]['yes_close'] == 0.60
+    assert count_snapshots(db) == 0
@@ -0,0 +1,32 @@
+"""
+Tests that a parallel sweep reproduces sequential backtests, on a synthetic season.
+
+Run from the repository root with: python -m pytest alpha_research/soccer/premier_league/test_sweep.py
+"""
+import pytest
+
+from alpha_research.soccer.premier_league.backtester import Backtester
+from alpha_research.soccer.premier_league.models import DixonColesModel
+from alpha_research.soccer.premier_league.niche_backtester import NicheBacktester
+from alpha_research.soccer.premier_league.sweep import run_sweep
+from alpha_research.soccer.premier_league.synthetic import build_database
+
+GRID = {'backtester': ['1x2', 'niche'], 'edge_threshold': [0.05], 'team_span': [10], 'league_span': [40],
+        'start_date': ['2023-10-01'], 'fit': ['ewm']}
+
+
+def test_sweep_matches_sequential_runs(tmp_path):
+    db_path = tmp_path / "synthetic.db"
+    db = build_database(db_path, scale=1)
+    results = run_sweep(GRID, max_workers=2, output_path=None, db_path=db_path).set_index('backtester')
+
+    for name, backtester_class in (('1x2', Backtester), ('niche', NicheBacktester)):
+        model = DixonColesModel(team_span=10, league_span=40, db=db)
+        backtester = backtester_class(start_date='2023-10-01', model=model, edge_threshold=0.05, db=db)
+        bets = backtester.run()
+
+        row = results.loc[name]
+        assert row['bets'] == len(bets) > 0
+        assert row['pnl'] == pytest.approx(bets['pnl'].sum())
+        assert row['final_bankroll'] == pytest.approx(backtester.bankroll)
+    db.close(force=True)